@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.crypto import salted_hmac
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.fields import DateTimeField
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+AUTH_VERSION_CLAIM = 'auth_version'
+# User fields copied into the tokens, so that ClaimsUser serves the user
+# endpoints (hello_world, get_user_info) without loading the user
+USER_CLAIMS = ('email', 'username', 'first_name', 'last_name', 'date_joined')
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user's business profile in the same query.
+
+    Views can then use ``request.user.business_profile`` without a second
+    lookup; users without a profile still raise ``BusinessProfile.DoesNotExist``.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = self.user_model.objects.select_related('business_profile').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def auth_version(is_active, password):
+    """Stamp that changes when a user is deactivated or changes their password"""
+    return salted_hmac('api.authentication.auth_version', f"{is_active}:{password}").hexdigest()[:20]
+
+
+def tokens_for_user(user):
+    """
+    Refresh token (and through it the access token) carrying the claims that
+    StatelessJWTAuthentication trusts instead of loading the user
+    """
+    refresh = RefreshToken.for_user(user)
+    business_profile = getattr(user, 'business_profile', None)
+    for name in USER_CLAIMS:
+        value = getattr(user, name)
+        # Formatted as UserSerializer would, which passes strings through
+        refresh[name] = DateTimeField().to_representation(value) if isinstance(value, datetime) else value
+    refresh['business_profile_id'] = business_profile.id if business_profile else None
+    refresh[AUTH_VERSION_CLAIM] = auth_version(user.is_active, user.password)
+    return refresh
+
+
+class _AuthVersionCache:
+    """Process-local ``user id -> auth version`` cache with a short TTL"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        # Token claims hold the id as a string, model instances as an int
+        user_id = str(user_id)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        row = User.objects.filter(pk=user_id).values_list('is_active', 'password').first()
+        version = auth_version(*row) if row and row[0] else None
+
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[user_id] = (now + settings.JWT_REVOCATION_CACHE_TTL, version)
+        return version
+
+    def forget(self, user_id):
+        with self.lock:
+            self.entries.pop(str(user_id), None)
+
+
+auth_versions = _AuthVersionCache()
+
+
+@receiver(post_save, sender=User)
+def forget_auth_version(sender, instance, **kwargs):
+    # Other workers pick the change up once their cached entry expires
+    auth_versions.forget(instance.pk)
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user backed by the signed claims added in ``tokens_for_user``.
+
+    Attributes that are not claims (and ``business_profile``) are loaded from
+    the database on first access only; each such read is counted in the
+    ``jwt_claims_user_fallbacks_total`` metric, so a hot endpoint that starts
+    touching the user table shows up. The USER_CLAIMS are as of login. It is
+    not a model instance: hand the ORM ``user_id=request.user.id``, or
+    ``request.user.model_user`` where a CustomUser is needed.
+    """
+
+    @cached_property
+    def business_profile(self):
+        from users.models import BusinessProfile
+        # The profile may have been created after the token was issued
+        lookup = {'id': self.token['business_profile_id']} if self.token.get('business_profile_id') else {}
+        return BusinessProfile.objects.get(user_id=self.id, **lookup)
+
+    @cached_property
+    def model_user(self):
+        """The CustomUser behind the token, loaded on first access"""
+        return User.objects.get(pk=self.id)
+
+    def _from_model_user(self, attr):
+        from users.metrics import CLAIMS_USER_FALLBACKS
+
+        CLAIMS_USER_FALLBACKS.labels(attribute=attr).inc()
+        logger.debug("Reading %s of user %s from the database, it is not a token claim", attr, self.id)
+        return getattr(self.model_user, attr)
+
+    # Tokens issued before the claim existed lack it
+    @cached_property
+    def username(self):
+        if 'username' in self.token:
+            return self.token['username']
+        return self._from_model_user('username')
+
+    # Privileges are not claims, so revoking them takes effect at once
+    @cached_property
+    def is_staff(self):
+        return self._from_model_user('is_staff')
+
+    @cached_property
+    def is_superuser(self):
+        return self._from_model_user('is_superuser')
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return self._from_model_user(attr)
+
+
+class StatelessJWTAuthentication(ProfileJWTAuthentication):
+    """
+    Opt-in (``JWT_STATELESS_AUTH``) authentication that trusts the login claims.
+
+    Revocation (deactivation or a password change) is checked against an auth
+    version cached per process for ``JWT_REVOCATION_CACHE_TTL`` seconds, so hot
+    endpoints usually never touch the user table. Tokens issued without the
+    claims are authenticated against the database as before.
+    """
+
+    def get_user(self, validated_token):
+        if AUTH_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if validated_token[AUTH_VERSION_CLAIM] != auth_versions.get(validated_token[api_settings.USER_ID_CLAIM]):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return ClaimsUser(validated_token)
@@ -0,0 +1,75 @@
+"""
+Conditional GET support backed by per-business ResourceVersion counters.
+
+The counters are bumped by the signals in ``users.signals``, so a repeat load
+with ``If-None-Match`` is answered with a 304 after a single small query,
+before the view builds any queryset or serializer.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.db.models import Q
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from users.models import ResourceVersion
+
+
+def _resource_versions(request, resources):
+    """Load the counters for ``resources`` visible to the current user, once per request"""
+    cached = getattr(request, '_resource_versions', None)
+    if cached is not None:
+        return cached
+
+    rows = ResourceVersion.objects.filter(
+        Q(business_profile__user_id=request.user.id) | Q(business_profile__isnull=True),
+        resource__in=resources,
+    ).values_list('resource', 'business_profile_id', 'version', 'updated_at')
+    versions = {resource: (None, 0, None) for resource in resources}
+    for resource, business_profile_id, version, updated_at in rows:
+        versions[resource] = (business_profile_id, version, updated_at)
+
+    request._resource_versions = versions
+    return versions
+
+
+def versioned(*resources, time_bucket=None):
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` for GET requests from version counters.
+
+    ``time_bucket`` (seconds) is for responses that also change as time passes,
+    such as "last N days" analytics: the ETag then rolls over every bucket and
+    no Last-Modified header is sent.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        versions = _resource_versions(request, resources)
+        parts = [f"user:{request.user.id}"]
+        parts += [f"{resource}:{owner}:{version}" for resource, (owner, version, _) in sorted(versions.items())]
+        if time_bucket:
+            parts.append(f"t:{int(time.time() // time_bucket)}")
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or time_bucket:
+            return None
+        stamps = [updated_at for _, _, updated_at in _resource_versions(request, resources).values() if updated_at]
+        return max(stamps) if stamps else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Responses depend on the bearer token, and must be revalidated
+                patch_vary_headers(response, ['Authorization'])
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
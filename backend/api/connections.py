@@ -0,0 +1,77 @@
+"""
+Database connection reuse metrics.
+
+Production keeps connections open between requests (``CONN_MAX_AGE``) and
+checks them before reuse (``CONN_HEALTH_CHECKS``), so each gunicorn worker
+thread holds one connection per database instead of opening a new one for
+every request. Django 4.2 has no connection pool of its own; the persistent
+per-thread connection serves as one, sized by the number of worker threads.
+
+The receivers below count, per process and database alias, how many
+connections were opened and how many requests started with a connection
+already open. Django's own ``request_started`` handler has closed obsolete or
+unusable connections by the time ``count_request`` runs, so a request counts
+as reusing only if the connection it found survives that check.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_stats = defaultdict(lambda: defaultdict(int))
+_stats_lock = threading.Lock()
+
+
+def _record(alias, name):
+    with _stats_lock:
+        _stats[alias][name] += 1
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    _record(connection.alias, 'connections_opened')
+    connection.opened_at = time.monotonic()
+
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    for connection in connections.all(initialized_only=True):
+        _record(connection.alias, 'requests')
+        if connection.connection is not None:
+            _record(connection.alias, 'requests_reusing_connection')
+
+
+def reset_connection_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def connection_stats():
+    """Connection reuse counts per database alias in this process, plus the calling thread's connection"""
+    with _stats_lock:
+        stats = {alias: dict(counts) for alias, counts in _stats.items()}
+    for alias, counts in stats.items():
+        requests = counts.setdefault('requests', 0)
+        counts.setdefault('connections_opened', 0)
+        counts['reuse_rate'] = round(counts.get('requests_reusing_connection', 0) / requests, 4) if requests else None
+
+    databases = {}
+    for connection in connections.all(initialized_only=True):
+        opened_at = getattr(connection, 'opened_at', None)
+        databases[connection.alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'open': connection.connection is not None,
+            'age_seconds': (
+                round(time.monotonic() - opened_at, 1)
+                if connection.connection is not None and opened_at is not None else None
+            ),
+            **stats.get(connection.alias, {}),
+        }
+    return {'pid': os.getpid(), 'databases': databases}
@@ -0,0 +1,95 @@
+"""
+Per-request SQL recording, for catching N+1 queries.
+
+``record_queries()`` wraps every database connection of the current thread
+and collects the SQL run inside it, normalised so that the same statement
+with different parameters (or a different number of ``IN`` values) counts
+as one pattern. A pattern that repeats within a request is almost always a
+query issued per row of a list: a missing ``select_related`` or
+``prefetch_related``, or a serializer reaching through a relation.
+
+``DuplicateQueryMiddleware`` logs those patterns for every request while
+DEBUG is on and is removed from the stack otherwise. CI sets
+DUPLICATE_QUERIES_RAISE so that a duplicate fails the request instead.
+``python manage.py check_query_counts`` checks every read endpoint at two
+data sizes.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class DuplicateQueriesError(Exception):
+    """Raised by DuplicateQueryMiddleware when DUPLICATE_QUERIES_RAISE is on"""
+
+
+def normalize_sql(sql):
+    """``sql`` with parameters, literals and ``IN`` lists replaced by placeholders"""
+    return _LITERAL.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+class QueryLog:
+    """``execute_wrapper`` collecting the normalised SQL run on the wrapped connections"""
+
+    def __init__(self):
+        self.patterns = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.patterns[(context['connection'].alias, normalize_sql(sql))] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.patterns.values())
+
+    def duplicates(self, threshold=2):
+        """``[(count, alias, sql)]`` of the patterns run at least ``threshold`` times, most frequent first"""
+        return [
+            (count, alias, sql)
+            for (alias, sql), count in self.patterns.most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def record_queries():
+    """Collect the queries run on this thread's connections inside the block in a QueryLog"""
+    query_log = QueryLog()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(query_log))
+        yield query_log
+
+
+class DuplicateQueryMiddleware:
+    """Log (or, with DUPLICATE_QUERIES_RAISE, reject) requests that repeat a query pattern"""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'DUPLICATE_QUERIES_THRESHOLD', 3)
+        self.raise_on_duplicates = getattr(settings, 'DUPLICATE_QUERIES_RAISE', False)
+
+    def __call__(self, request):
+        with record_queries() as query_log:
+            response = self.get_response(request)
+        duplicates = query_log.duplicates(self.threshold)
+        if duplicates:
+            summary = '\n'.join(f"  {count} x [{alias}] {sql}" for count, alias, sql in duplicates)
+            message = f"{request.method} {request.path} repeated {len(duplicates)} query pattern(s) " \
+                      f"in {query_log.count} queries:\n{summary}"
+            if self.raise_on_duplicates:
+                raise DuplicateQueriesError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,52 @@
+"""
+orjson-backed JSON renderer and parser, falling back to DRF's stdlib ones
+when orjson is not installed.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _default(value):
+    """Types orjson does not handle natively (Decimal, lazy strings, ...) as DRF would encode them"""
+    return _encoder.default(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders compact JSON with orjson. Indented output (``; indent=`` in the
+    Accept header), non-compact or ASCII-only settings and a missing orjson
+    all go through the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONParser(JSONParser):
+    """Parses request bodies with orjson when it is installed"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
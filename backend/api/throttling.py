@@ -0,0 +1,207 @@
+"""
+Scoped request throttles and admission control for the AI search endpoint.
+
+Throttle counters live in the ``throttle`` cache alias (see ``CACHES``), so
+every gunicorn worker shares them as long as that alias points at a shared
+backend (Redis or the database cache). The counters are fixed windows driven
+by ``cache.add``/``cache.incr`` instead of
+DRF's default timestamp list, which is a read-modify-write race across workers.
+``incr`` is atomic on Redis; the database cache can under-count slightly under
+heavy contention, which only errs towards letting a request through.
+
+Admission control caps the number of AI calls in flight across all workers.
+Each call leases one of ``AI_ADMISSION_MAX_IN_FLIGHT`` cache slots with
+``cache.add``; leases expire on their own if a worker dies mid-call. When no
+slot is free the request gets a 503 with ``Retry-After`` straight away rather
+than queueing behind calls that can take a minute each.
+"""
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import SimpleRateThrottle
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+
+def _throttle_cache():
+    return caches[THROTTLE_CACHE_ALIAS if THROTTLE_CACHE_ALIAS in settings.CACHES else 'default']
+
+
+class CacheRateThrottle(SimpleRateThrottle):
+    """Fixed-window counter throttle; subclasses set ``scope`` and ``get_cache_key``"""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        return self._increment() <= self.num_requests
+
+    def _window_key(self):
+        """Counter key of ``self.key`` for the current window"""
+        window = int(self.timer() // self.duration)
+        self.window_end = (window + 1) * self.duration
+        return f'{self.key}:{window}'
+
+    def _increment(self):
+        """Count one request in the current window and return the window's count"""
+        cache = _throttle_cache()
+        key = self._window_key()
+        cache.add(key, 0, self.duration)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The window expired between add() and incr()
+            cache.add(key, 1, self.duration)
+            return 1
+
+    def wait(self):
+        return max(self.window_end - self.timer(), 1)
+
+
+class UserRateThrottle(CacheRateThrottle):
+    scope = 'ai_search_user'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.id}
+
+
+class BusinessRateThrottle(CacheRateThrottle):
+    """Shared budget for every user of one business profile"""
+    scope = 'ai_search_business'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        try:
+            business_profile_id = request.user.business_profile.id
+        except ObjectDoesNotExist:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': business_profile_id}
+
+
+class IPRateThrottle(CacheRateThrottle):
+    scope = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AISearchIPThrottle(IPRateThrottle):
+    scope = 'ai_search_ip'
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(CacheRateThrottle):
+    """
+    Limits guesses against one account from many addresses. Only failed logins
+    count (LoginView calls ``record_failure``), so the account owner's own
+    logins never lock them out.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view=None):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        return _throttle_cache().get(self._window_key(), 0) < self.num_requests
+
+    def record_failure(self, request):
+        """Count a failed login against the email of ``request``"""
+        if self.rate is None:
+            return
+        self.key = self.get_cache_key(request)
+        if self.key is not None:
+            self._increment()
+
+
+class PasswordResetIPThrottle(IPRateThrottle):
+    scope = 'password_reset_ip'
+
+
+AI_SEARCH_THROTTLES = [UserRateThrottle, BusinessRateThrottle, AISearchIPThrottle]
+LOGIN_THROTTLES = [LoginIPThrottle, LoginEmailThrottle]
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Too many AI calls in flight, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+@contextmanager
+def ai_call_slot():
+    """
+    Hold one of the global AI call slots for the duration of the block.
+
+    Raises ``AdmissionRejected`` when every slot is leased. A limit of 0 (or
+    less) disables admission control.
+    """
+    limit = getattr(settings, 'AI_ADMISSION_MAX_IN_FLIGHT', 0)
+    if limit <= 0:
+        yield
+        return
+
+    cache = _throttle_cache()
+    lease = getattr(settings, 'AI_ADMISSION_LEASE_SECONDS', 180)
+    token = uuid.uuid4().hex
+    # Start at a random slot so concurrent requests don't all contend for slot 0
+    offset = random.randrange(limit)
+    for i in range(limit):
+        key = f'ai_admission:slot:{(offset + i) % limit}'
+        if cache.add(key, token, lease):
+            break
+    else:
+        raise AdmissionRejected(getattr(settings, 'AI_ADMISSION_RETRY_AFTER', 10))
+
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        # Don't release a slot whose lease already expired and was re-leased
+        if time.monotonic() - started < lease and cache.get(key) == token:
+            cache.delete(key)
+
+
+def admission_controlled(view_func):
+    """Reject the request with 503 and Retry-After when no AI call slot is free"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        from users.metrics import AI_SEARCHES_IN_FLIGHT, AI_SEARCHES_REJECTED
+        
+        try:
+            with ai_call_slot(), AI_SEARCHES_IN_FLIGHT.track_inprogress():
+                return view_func(request, *args, **kwargs)
+        except AdmissionRejected as e:
+            AI_SEARCHES_REJECTED.inc()
+            return Response(
+                {"error": "The AI search service is busy. Please retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(e.retry_after)},
+            )
+    return wrapper
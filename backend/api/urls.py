@@ -7,6 +7,7 @@ urlpatterns = [
     path('auth/login/', views.LoginView.as_view(), name='login'),
     path('auth/user/', views.get_user_info, name='user_info'),
     path('auth/logout/', views.logout, name='logout'),
+    path('bootstrap/', views.bootstrap, name='bootstrap'),
     # Password reset endpoints
     path('auth/password-reset/', views.password_reset_request, name='password_reset_request'),
     path('auth/password-reset-confirm/', views.password_reset_confirm, name='password_reset_confirm'),
@@ -14,10 +15,19 @@ urlpatterns = [
     path('business/profile/', views.business_profile, name='business_profile'),
     path('business/onboarding-status/', views.onboarding_status, name='onboarding_status'),
     path('search-terms/', views.search_terms, name='search_terms'),
+    path('search-terms/bulk/', views.search_terms_bulk, name='search_terms_bulk'),
     path('search-terms/<int:pk>/', views.search_term_detail, name='search_term_detail'),
     path('search-logs/', views.search_logs, name='search_logs'),
+    path('search-logs/export/', views.search_logs_export, name='search_logs_export'),
+    path('search-logs/search/', views.search_log_search, name='search_log_search'),
+    path('search-logs/archived/', views.archived_search_logs, name='archived_search_logs'),
+    path('search-logs/<int:pk>/', views.search_log_detail, name='search_log_detail'),
+    path('analyses/', views.analyses, name='analyses'),
     path('search-analytics/', views.search_analytics, name='search_analytics'),
+    path('search-analytics/timeseries/', views.search_timeseries, name='search_timeseries'),
     path('ai-models/', views.ai_models, name='ai_models'),
+    path('cache-stats/', views.read_cache_stats, name='read_cache_stats'),
+    path('db-stats/', views.db_connection_stats, name='db_connection_stats'),
     path('run-ai-search/', views.run_ai_search, name='run_ai_search'),
     path('run-ai-search', views.run_ai_search, name='run_ai_search_no_slash'),
 ]
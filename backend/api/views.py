@@ -1,20 +1,102 @@
+import logging
+import time
+
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from users.serializers import UserSerializer, RegisterSerializer, LoginSerializer, BusinessProfileSerializer, SearchTermSerializer, AIModelSerializer, SearchLogSerializer
-from users.models import BusinessProfile, SearchTerm, AIModel, SearchLog
+from users.serializers import UserSerializer, RegisterSerializer, LoginSerializer, BusinessProfileSerializer, SearchTermSerializer, AIModelSerializer, SearchLogSerializer, AnalysisSerializer, ArchivedSearchLogSerializer, ANALYSIS_SUMMARY_FIELDS
+from users.models import BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis, ArchivedSearchLog, DailySearchStats
+from users.caching import active_ai_models, cache_stats, cached_view, read_through
+from users.rollups import SENTIMENT_COUNTERS
 from users.ai_service import ai_service
+from users.tracing import current_trace, traced
+from .authentication import tokens_for_user
+from .conditional import versioned
+from core.replicas import replica_alias, replica_reads
+from .throttling import AI_SEARCH_THROTTLES, LOGIN_THROTTLES, LoginEmailThrottle, PasswordResetIPThrottle, admission_controlled
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Large text columns left out of list responses when ``?body=false`` is passed
+SEARCH_LOG_BODY_FIELDS = ('query', 'response', 'analysis.raw_analysis_response')
+ANALYSIS_BODY_FIELDS = ('raw_analysis_response', 'search_log.query', 'search_log.response')
+
+
+def _field_list(value):
+    """Split a comma separated ``fields``/``exclude`` query parameter"""
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+def _id_param(request, name):
+    """Query parameter ``name`` as an id, None when absent; ValueError when it isn't an integer"""
+    value = request.query_params.get(name)
+    return int(value) if value else None
+
+
+def _sparse_fieldset(request, body_fields):
+    """Build ``fields``/``exclude`` serializer kwargs from the query string"""
+    fields = _field_list(request.query_params.get('fields'))
+    exclude = _field_list(request.query_params.get('exclude'))
+    if request.query_params.get('body', '').lower() == 'false':
+        exclude.extend(body_fields)
+    return {'fields': fields or None, 'exclude': exclude or None}
+
+
+def _sparse_columns(model, serializer, prefix=''):
+    """
+    Work out which columns ``serializer`` outputs for ``model``.
+
+    Returns ``(related, columns, deferred)``: relations to ``select_related``,
+    lookups for ``.only()`` and the complementary lookups for ``.defer()``.
+    """
+    related = []
+    columns = ['id']
+    deferred = []
+    for field in model._meta.concrete_fields:
+        if field.name == 'id':
+            continue
+        if field.name in serializer.fields:
+            columns.append(field.name)
+            if field.is_relation:
+                related.append(field.name)
+        else:
+            deferred.append(field.name)
+
+    # The analysis object is built by hand in SearchLogSerializer.to_representation
+    if model is SearchLog and serializer.wants('analysis'):
+        related.append('analysis')
+        for name in ANALYSIS_SUMMARY_FIELDS:
+            if serializer.wants_nested('analysis', name):
+                columns.append(f'analysis__{name}')
+            else:
+                deferred.append(f'analysis__{name}')
+
+    return (
+        [prefix + name for name in related],
+        [prefix + name for name in columns],
+        [prefix + name for name in deferred],
+    )
+
+
+def _sparse_queryset(queryset, sparse, related, columns, deferred):
+    """Restrict loaded columns with ``.only()`` when ``fields`` was given, else ``.defer()``"""
+    queryset = queryset.select_related(*related)
+    if sparse['fields']:
+        return queryset.only(*columns)
+    if deferred:
+        return queryset.defer(*deferred)
+    return queryset
 
 
 @api_view(['GET'])
@@ -30,6 +112,7 @@ def api_root(request):
                 'user': '/api/auth/user/',
                 'logout': '/api/auth/logout/',
             },
+            'bootstrap': '/api/bootstrap/',
             'business': {
                 'profile': '/api/business/profile/',
                 'onboarding_status': '/api/business/onboarding-status/',
@@ -50,6 +133,7 @@ class RegisterView(generics.CreateAPIView):
 
 class LoginView(generics.GenericAPIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = LOGIN_THROTTLES
     serializer_class = LoginSerializer
 
     def post(self, request):
@@ -62,13 +146,14 @@ class LoginView(generics.GenericAPIView):
         user = authenticate(email=email, password=password)
         
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
                 'user': UserSerializer(user).data
             })
         else:
+            LoginEmailThrottle().record_failure(request)
             return Response(
                 {'error': 'Invalid credentials'}, 
                 status=status.HTTP_401_UNAUTHORIZED
@@ -83,6 +168,45 @@ def get_user_info(request):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def bootstrap(request):
+    """
+    Everything the frontend needs on page load in one round trip: the user,
+    onboarding status, business profile, search terms and active AI models
+    """
+    try:
+        profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        profile = None
+    
+    # Same cache entries as the search-terms and ai-models endpoints
+    if profile:
+        search_terms = read_through(
+            'search_terms',
+            lambda: SearchTermSerializer(SearchTerm.objects.filter(business_profile=profile), many=True).data,
+            ('search_terms',), profile.id,
+        )
+    else:
+        search_terms = []
+    ai_models = read_through(
+        'ai_models',
+        lambda: AIModelSerializer(AIModel.objects.filter(is_active=True), many=True).data,
+        ('ai_models',),
+    )
+    
+    return Response({
+        'user': UserSerializer(request.user).data,
+        'onboarding_status': {
+            'onboarding_completed': profile.onboarding_completed if profile else False,
+            'has_profile': profile is not None
+        },
+        'business_profile': BusinessProfileSerializer(profile).data if profile else None,
+        'search_terms': search_terms,
+        'ai_models': ai_models,
+    })
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def logout(request):
@@ -107,9 +231,40 @@ def hello_world(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def read_cache_stats(request):
+    """Read-through cache hit and miss counts for the worker serving the request"""
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_connection_stats(request):
+    """Database connection reuse counts for the worker serving the request"""
+    from .connections import connection_stats
+    
+    return Response(connection_stats())
+
+
+def metrics(request):
+    """Prometheus text exposition of the AI pipeline metrics of every worker"""
+    from django.conf import settings
+    from django.http import HttpResponse
+    from django.utils.crypto import constant_time_compare
+    from users.metrics import render_metrics
+    
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer'})
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
 # Password reset: request reset email
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([PasswordResetIPThrottle])
 def password_reset_request(request):
     email = request.data.get('email')
     if not email:
@@ -184,6 +339,8 @@ def onboarding_status(request):
 
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
+@versioned('business_profile')
+@cached_view('business_profile', 'business_profile')
 def business_profile(request):
     """Handle business profile creation and updates"""
     print(f"DEBUG: Business profile request from user ID: {request.user.id}, Email: {request.user.email}")
@@ -206,13 +363,15 @@ def business_profile(request):
             serializer = BusinessProfileSerializer(data=request.data)
         
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            serializer.save(user_id=request.user.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@versioned('search_terms')
+@cached_view('search_terms', 'search_terms')
 def search_terms(request):
     """Manage search terms for the current user's business"""
     print(f"DEBUG: Search terms request from user ID: {request.user.id}, Email: {request.user.email}")
@@ -243,6 +402,74 @@ def search_terms(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def search_terms_bulk(request):
+    """
+    Create, update and delete many search terms in one transaction.
+
+    Accepts JSON ``{"create": [...], "update": [...], "delete": [ids]}``, a bare
+    JSON array of terms to create, or a CSV upload (``file`` field or a
+    ``text/csv`` body) with a ``term`` column and optional ``description`` and
+    ``is_active`` columns. ``on_conflict=update`` updates terms that already exist
+    instead of skipping them.
+    """
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    import csv
+    import io
+    from users.search_term_bulk import MAX_BULK_ITEMS, apply_search_term_bulk
+    
+    create, update, delete = [], [], []
+    csv_text = None
+    if request.content_type.startswith('text/csv'):
+        csv_text = request.body.decode('utf-8-sig')
+    elif 'file' in request.FILES:
+        csv_text = request.FILES['file'].read().decode('utf-8-sig')
+    elif isinstance(request.data, list):
+        create = request.data
+    elif isinstance(request.data, dict):
+        create = request.data.get('create', [])
+        update = request.data.get('update', [])
+        delete = request.data.get('delete', [])
+    
+    if csv_text is not None:
+        reader = csv.DictReader(io.StringIO(csv_text))
+        if 'term' not in (reader.fieldnames or []):
+            return Response({"error": "CSV must have a 'term' column"}, status=status.HTTP_400_BAD_REQUEST)
+        create = [
+            {name: value for name, value in row.items() if name in ('term', 'description', 'is_active') and value not in (None, '')}
+            for row in reader
+        ]
+    
+    if not all(isinstance(items, list) for items in (create, update, delete)):
+        return Response({"error": "create, update and delete must be lists"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(create) + len(update) + len(delete) > MAX_BULK_ITEMS:
+        return Response(
+            {"error": f"At most {MAX_BULK_ITEMS} items per request"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    on_conflict = request.query_params.get('on_conflict') or (
+        request.data.get('on_conflict') if csv_text is None and isinstance(request.data, dict) else None
+    ) or 'skip'
+    if on_conflict not in ('skip', 'update'):
+        return Response({"error": "on_conflict must be 'skip' or 'update'"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = apply_search_term_bulk(business_profile, create, update, delete, on_conflict=on_conflict)
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return Response({'summary': summary, 'results': results})
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def search_term_detail(request, pk):
@@ -274,6 +501,8 @@ def search_term_detail(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versioned('ai_models')
+@cached_view('ai_models', 'ai_models')
 def ai_models(request):
     """Get list of available AI models"""
     models = AIModel.objects.filter(is_active=True)
@@ -283,6 +512,7 @@ def ai_models(request):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def search_logs(request):
     """View and create search logs"""
     try:
@@ -309,15 +539,20 @@ def search_logs(request):
         # Filter by sentiment if provided
         sentiment = request.query_params.get('sentiment')
         if sentiment:
-            search_logs = search_logs.filter(sentiment=sentiment)
+            search_logs = search_logs.filter(analysis__sentiment=sentiment)
         
         # Filter by business mentioned if provided
         business_mentioned = request.query_params.get('business_mentioned')
         if business_mentioned is not None:
             business_mentioned = business_mentioned.lower() == 'true'
-            search_logs = search_logs.filter(business_mentioned=business_mentioned)
+            search_logs = search_logs.filter(analysis__business_mentioned=business_mentioned)
+        
+        # Only read the columns that will be serialized
+        sparse = _sparse_fieldset(request, SEARCH_LOG_BODY_FIELDS)
+        related, columns, deferred = _sparse_columns(SearchLog, SearchLogSerializer(**sparse))
+        search_logs = _sparse_queryset(search_logs, sparse, related, columns, deferred)
         
-        serializer = SearchLogSerializer(search_logs, many=True)
+        serializer = SearchLogSerializer(search_logs, many=True, **sparse)
         return Response(serializer.data)
     
     elif request.method == 'POST':
@@ -330,6 +565,253 @@ def search_logs(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def search_logs_export(request):
+    """
+    Stream the business's full search history joined to analysis results.
+
+    ``file_format`` is one of csv (default), ndjson, parquet or arrow; rows can be
+    narrowed with ``search_term``, ``ai_model``, ``since`` and ``until``.
+    Archived search logs are included without their text columns.
+    """
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    from django.http import StreamingHttpResponse
+    from django.utils.dateparse import parse_datetime
+    from users.exports import EXPORT_FORMATS, ExportFormatUnavailable, check_format_available, export_rows
+    
+    export_format = request.query_params.get('file_format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"file_format must be one of {sorted(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        check_format_available(export_format)
+    except ExportFormatUnavailable as e:
+        return Response({"error": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    
+    try:
+        search_term_id = _id_param(request, 'search_term')
+        ai_model_id = _id_param(request, 'ai_model')
+    except ValueError:
+        return Response({"error": "search_term and ai_model must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    since = request.query_params.get('since')
+    until = request.query_params.get('until')
+    try:
+        # parse_datetime returns None for text that isn't a datetime at all and
+        # raises ValueError for a well-formed but impossible one
+        parsed_since = parse_datetime(since) if since else None
+        parsed_until = parse_datetime(until) if until else None
+    except ValueError:
+        parsed_since = parsed_until = None
+    if (since and parsed_since is None) or (until and parsed_until is None):
+        return Response({"error": "since and until must be ISO 8601 datetimes"}, status=status.HTTP_400_BAD_REQUEST)
+    since, until = parsed_since, parsed_until
+    
+    # Rows are read while the response streams, after the view has returned
+    rows = export_rows(
+        business_profile.id,
+        search_term_id=search_term_id,
+        ai_model_id=ai_model_id,
+        since=since,
+        until=until,
+        using=replica_alias(request.user),
+    )
+    
+    content_type, extension, chunks = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(chunks(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="search-logs-{business_profile.id}.{extension}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_log_detail(request, pk):
+    """Get a single search log including the full response and analysis bodies"""
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    search_log = SearchLog.objects.select_related(
+        'search_term', 'ai_model', 'business_profile', 'analysis'
+    ).filter(pk=pk, business_profile=business_profile).first()
+    if search_log is not None:
+        serializer = SearchLogSerializer(search_log)
+        return Response(serializer.data)
+    
+    # Archived search logs are read back from their archive file
+    from users.archive import rehydrate
+    
+    archived_search_log = get_object_or_404(
+        ArchivedSearchLog.objects.select_related('archive', 'search_term', 'ai_model'),
+        pk=pk,
+        business_profile=business_profile
+    )
+    record, analysis = read_through(
+        'search_log_archive', lambda: rehydrate(archived_search_log), ['search_logs'],
+        business_profile.id, params=[('pk', pk)]
+    )
+    data = {name: value for name, value in record.items() if not name.endswith('_id')}
+    data.update(
+        id=archived_search_log.id,
+        search_term=SearchTermSerializer(archived_search_log.search_term).data,
+        ai_model=AIModelSerializer(archived_search_log.ai_model).data,
+        business_profile=BusinessProfileSerializer(business_profile).data,
+        analysis={name: analysis[name] for name in ANALYSIS_SUMMARY_FIELDS} if analysis else None,
+        archived=True,
+    )
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def archived_search_logs(request):
+    """
+    List archived search logs, newest first, without their bodies.
+
+    Takes the same ``search_term``, ``ai_model``, ``sentiment`` and
+    ``business_mentioned`` filters as the search log list, plus ``limit`` and
+    ``offset``. The full detail is at ``/api/search-logs/<id>/``.
+    """
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    archived = ArchivedSearchLog.objects.filter(business_profile=business_profile)
+    for name in ('search_term', 'ai_model', 'sentiment'):
+        value = request.query_params.get(name)
+        if value:
+            archived = archived.filter(**{name: value})
+    business_mentioned = request.query_params.get('business_mentioned')
+    if business_mentioned is not None:
+        archived = archived.filter(business_mentioned=business_mentioned.lower() == 'true')
+    try:
+        limit = min(int(request.query_params.get('limit', 100)), 1000)
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return Response({"error": "limit and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    offset = max(offset, 0)
+    archived = archived.select_related('search_term', 'ai_model')[offset:offset + max(limit, 1)]
+    serializer = ArchivedSearchLogSerializer(archived, many=True)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_log_search(request):
+    """Full-text search over AI responses and mention contexts, best matches first"""
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    from users.search import search_search_logs
+    
+    text = request.query_params.get('q', '').strip()
+    if not text:
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 100)
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return Response({"error": "limit and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    matches = search_search_logs(business_profile.id, text, limit=max(limit, 1), offset=max(offset, 0))
+    
+    # Load the matched logs without their bodies; the snippets stand in for them
+    search_logs = SearchLog.objects.filter(id__in=[match['id'] for match in matches]).select_related(
+        'search_term', 'ai_model', 'analysis'
+    ).only(
+        'id', 'search_timestamp', 'search_term__term', 'ai_model__name',
+        'analysis__business_mentioned', 'analysis__sentiment'
+    )
+    search_logs = {search_log.id: search_log for search_log in search_logs}
+    
+    results = []
+    for match in matches:
+        search_log = search_logs.get(match['id'])
+        if search_log is None:
+            continue
+        analysis = getattr(search_log, 'analysis', None)
+        results.append({
+            'id': search_log.id,
+            'rank': round(match['rank'], 6),
+            'search_timestamp': search_log.search_timestamp.isoformat(),
+            'search_term': search_log.search_term.term,
+            'ai_model': search_log.ai_model.name,
+            'business_mentioned': analysis.business_mentioned if analysis else None,
+            'sentiment': analysis.sentiment if analysis else None,
+            'response_snippet': match['response_snippet'],
+            'mention_context_snippet': match['mention_context_snippet'],
+        })
+    
+    return Response({'query': text, 'limit': limit, 'offset': offset, 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def analyses(request):
+    """List analysis results for the current user's business"""
+    try:
+        business_profile = request.user.business_profile
+    except BusinessProfile.DoesNotExist:
+        return Response(
+            {"error": "Business profile not found. Please complete onboarding first."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    queryset = Analysis.objects.filter(business_profile=business_profile)
+    
+    # Filter by sentiment if provided
+    sentiment = request.query_params.get('sentiment')
+    if sentiment:
+        queryset = queryset.filter(sentiment=sentiment)
+    
+    # Filter by business mentioned if provided
+    business_mentioned = request.query_params.get('business_mentioned')
+    if business_mentioned is not None:
+        business_mentioned = business_mentioned.lower() == 'true'
+        queryset = queryset.filter(business_mentioned=business_mentioned)
+    
+    # Only read the columns that will be serialized
+    sparse = _sparse_fieldset(request, ANALYSIS_BODY_FIELDS)
+    serializer = AnalysisSerializer(**sparse)
+    related, columns, deferred = _sparse_columns(Analysis, serializer)
+    if 'search_log' in serializer.fields:
+        nested = _sparse_columns(SearchLog, serializer.fields['search_log'], prefix='search_log__')
+        related, columns, deferred = related + nested[0], columns + nested[1], deferred + nested[2]
+    queryset = _sparse_queryset(queryset, sparse, related, columns, deferred)
+    
+    serializer = AnalysisSerializer(queryset, many=True, **sparse)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+@versioned('search_logs', 'search_terms', 'ai_models', time_bucket=60)
+@cached_view('search_analytics', 'search_logs', 'search_terms', 'ai_models', time_bucket=60)
 def search_analytics(request):
     """Get analytics for search logs"""
     try:
@@ -340,58 +822,94 @@ def search_analytics(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    from django.db.models import Count, Q
+    from django.db.models import Sum
     from django.utils import timezone
     from datetime import timedelta
     
-    # Get date range from query params (default to last 30 days)
-    days = int(request.query_params.get('days', 30))
-    start_date = timezone.now() - timedelta(days=days)
+    # Get date range from query params (default to last 30 days), in whole days
+    try:
+        days = int(request.query_params.get('days', 30))
+    except ValueError:
+        return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if days < 1:
+        return Response({"error": "days must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+    start_day = timezone.localdate() - timedelta(days=days)
     
-    search_logs = SearchLog.objects.filter(
+    # One row per term and model, summed over the daily rollup
+    counters = ['searches', 'mentions', 'tokens_used', 'estimated_cost_usd',
+                'response_time_ms_sum', 'analysis_duration_ms_sum'] + list(SENTIMENT_COUNTERS.values())
+    rows = DailySearchStats.objects.filter(
         business_profile=business_profile,
-        search_timestamp__gte=start_date
-    )
+        day__gte=start_day
+    ).values('search_term__term', 'ai_model__name').annotate(
+        **{f'total_{name}': Sum(name) for name in counters}
+    ).order_by()
     
-    # Total searches
-    total_searches = search_logs.count()
+    totals = dict.fromkeys(counters, 0)
+    term_counts = {}
+    model_counts = {}
+    for row in rows:
+        for name in counters:
+            totals[name] += row[f'total_{name}'] or 0
+        term = row['search_term__term']
+        model = row['ai_model__name']
+        term_counts[term] = term_counts.get(term, 0) + row['total_searches']
+        model_counts[model] = model_counts.get(model, 0) + row['total_searches']
     
-    # Business mentions
-    business_mentions = search_logs.filter(business_mentioned=True).count()
+    total_searches = totals['searches']
+    business_mentions = totals['mentions']
     mention_rate = (business_mentions / total_searches * 100) if total_searches > 0 else 0
     
     # Sentiment breakdown
-    sentiment_counts = search_logs.filter(business_mentioned=True).values('sentiment').annotate(
-        count=Count('sentiment')
-    )
-    
-    # Top search terms
-    top_terms = search_logs.values('search_term__term').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+    sentiment_counts = [
+        {'sentiment': sentiment, 'count': totals[name]}
+        for sentiment, name in SENTIMENT_COUNTERS.items() if totals[name]
+    ]
     
-    # Top AI models
-    top_models = search_logs.values('ai_model__name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
+    # Top search terms and AI models
+    top_terms = sorted(term_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+    top_models = sorted(model_counts.items(), key=lambda item: item[1], reverse=True)[:5]
     
     analytics = {
         'total_searches': total_searches,
         'business_mentions': business_mentions,
         'mention_rate': round(mention_rate, 2),
-        'sentiment_breakdown': list(sentiment_counts),
-        'top_search_terms': list(top_terms),
-        'top_ai_models': list(top_models),
+        'sentiment_breakdown': sentiment_counts,
+        'top_search_terms': [{'search_term__term': term, 'count': count} for term, count in top_terms],
+        'top_ai_models': [{'ai_model__name': model, 'count': count} for model, count in top_models],
+        'total_tokens': totals['tokens_used'],
+        'estimated_cost_usd': totals['estimated_cost_usd'],
+        'avg_response_time_ms': round(totals['response_time_ms_sum'] / total_searches) if total_searches else None,
+        'avg_analysis_duration_ms': round(totals['analysis_duration_ms_sum'] / total_searches) if total_searches else None,
         'date_range': f"Last {days} days"
     }
     
     return Response(analytics)
 
 
-@api_view(['POST'])
+# Grouping options for the time-series endpoint
+TIMESERIES_GROUPS = {
+    'none': (),
+    'term': ('search_term_id', 'search_term__term'),
+    'model': ('ai_model_id', 'ai_model__name'),
+    'term_model': ('search_term_id', 'search_term__term', 'ai_model_id', 'ai_model__name'),
+}
+MAX_TIMESERIES_BUCKETS = 2000
+
+
+@api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def run_ai_search(request):
-    """Run a search term against an AI model and return the result"""
+@replica_reads
+@versioned('search_logs', 'search_terms', 'ai_models', time_bucket=60)
+@cached_view('search_timeseries', 'search_logs', 'search_terms', 'ai_models', time_bucket=60)
+def search_timeseries(request):
+    """
+    Mention-rate and sentiment trends per time bucket, optionally per term and model.
+
+    Windows that reach past the archive cutoff also count the archived search
+    logs; those have no confidence score, so ``avg_confidence`` covers only the
+    search logs still in the database.
+    """
     try:
         business_profile = request.user.business_profile
     except BusinessProfile.DoesNotExist:
@@ -400,44 +918,171 @@ def run_ai_search(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Get parameters from request
-    search_term_id = request.data.get('search_term_id') or request.data.get('search_term')
-    ai_model_id = request.data.get('ai_model_id') or request.data.get('ai_model')
+    from django.db.models import Avg, Count, Q
+    from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+    from django.utils import timezone
+    from datetime import timedelta
+    from users.trends import BUCKET_STEPS, build_series, merge_rows
     
-    if not search_term_id or not ai_model_id:
+    truncs = {'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek}
+    bucket = request.query_params.get('bucket', 'day')
+    group_by = request.query_params.get('group_by', 'term_model')
+    if bucket not in truncs or group_by not in TIMESERIES_GROUPS:
         return Response(
-            {"error": "Both search_term and ai_model are required"},
+            {"error": f"bucket must be one of {sorted(truncs)} and group_by one of {sorted(TIMESERIES_GROUPS)}"},
             status=status.HTTP_400_BAD_REQUEST
         )
     
     try:
-        # Get the search term and AI model
-        search_term = SearchTerm.objects.get(id=search_term_id, business_profile=business_profile)
-        ai_model = AIModel.objects.get(id=ai_model_id, is_active=True)
-    except (SearchTerm.DoesNotExist, AIModel.DoesNotExist):
+        days = int(request.query_params.get('days', 30))
+        window = int(request.query_params.get('window', 7))
+        search_term_id = _id_param(request, 'search_term')
+        ai_model_id = _id_param(request, 'ai_model')
+    except ValueError:
         return Response(
-            {"error": "Search term or AI model not found"},
-            status=status.HTTP_404_NOT_FOUND
+            {"error": "days, window, search_term and ai_model must be integers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if days < 1 or window < 1:
+        return Response({"error": "days and window must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+    if timedelta(days=days) / BUCKET_STEPS[bucket] > MAX_TIMESERIES_BUCKETS:
+        return Response(
+            {"error": f"Too many {bucket} buckets for {days} days, use a larger bucket"},
+            status=status.HTTP_400_BAD_REQUEST
         )
     
+    end = timezone.now()
+    start = end - timedelta(days=days)
+    
+    search_logs = SearchLog.objects.filter(
+        business_profile=business_profile,
+        search_timestamp__gte=start,
+        # Only analysed searches count, as in search_analytics (the daily rollup).
+        # The analysis follows its search, so this bound drops nothing else and
+        # lets Postgres prune old analysis partitions
+        analysis__analysis_timestamp__gte=start
+    )
+    
+    # Archived search logs keep their analysis fields inline; business_mentioned
+    # is empty for the ones that had no analysis
+    archived_search_logs = ArchivedSearchLog.objects.filter(
+        business_profile=business_profile,
+        search_timestamp__gte=start,
+        business_mentioned__isnull=False
+    )
+    
+    # Filter by search term / AI model if provided
+    if search_term_id:
+        search_logs = search_logs.filter(search_term_id=search_term_id)
+        archived_search_logs = archived_search_logs.filter(search_term_id=search_term_id)
+    if ai_model_id:
+        search_logs = search_logs.filter(ai_model_id=ai_model_id)
+        archived_search_logs = archived_search_logs.filter(ai_model_id=ai_model_id)
+    
+    group_fields = TIMESERIES_GROUPS[group_by]
+    
+    def bucket_rows(queryset, analysis_prefix, **extra):
+        mentioned = Q(**{f'{analysis_prefix}business_mentioned': True})
+        sentiment = lambda value: mentioned & Q(**{f'{analysis_prefix}sentiment': value})
+        return queryset.annotate(
+            bucket=truncs[bucket]('search_timestamp')
+        ).values('bucket', *group_fields).annotate(
+            searches=Count('id'),
+            mentions=Count('id', filter=mentioned),
+            positive=Count('id', filter=sentiment('positive')),
+            neutral=Count('id', filter=sentiment('neutral')),
+            negative=Count('id', filter=sentiment('negative')),
+            mixed=Count('id', filter=sentiment('mixed')),
+            avg_response_time_ms=Avg('response_time_ms'),
+            **extra
+        ).order_by()
+    
+    rows = merge_rows(
+        group_fields,
+        bucket_rows(search_logs, 'analysis__', avg_confidence=Avg(
+            'analysis__confidence_score', filter=Q(analysis__business_mentioned=True)
+        )),
+        bucket_rows(archived_search_logs, ''),
+    )
+    
+    buckets, series = build_series(rows, group_fields, start, end, bucket, window=window)
+    
+    return Response({
+        'bucket': bucket,
+        'group_by': group_by,
+        'window': window,
+        'start': buckets[0].isoformat(),
+        'end': end.isoformat(),
+        'series': series,
+    })
+
+
+@traced('run_ai_search')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes(AI_SEARCH_THROTTLES)
+@admission_controlled
+def run_ai_search(request):
+    """
+    Run a search term against an AI model and return the result.
+
+    Each stage is timed (see ``users.tracing``); the timings are stored on
+    the SearchLog and logged for sampled, slow and failed requests.
+    """
+    trace = current_trace()
+    # DRF has authenticated, permission-checked and throttled the request by now
+    trace.add_span('auth', trace.started, time.perf_counter())
+    
+    with trace.span('lookup'):
+        try:
+            business_profile = request.user.business_profile
+        except BusinessProfile.DoesNotExist:
+            return Response(
+                {"error": "Business profile not found. Please complete onboarding first."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Get parameters from request
+        search_term_id = request.data.get('search_term_id') or request.data.get('search_term')
+        ai_model_id = request.data.get('ai_model_id') or request.data.get('ai_model')
+        
+        if not search_term_id or not ai_model_id:
+            return Response(
+                {"error": "Both search_term and ai_model are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # Get the search term and AI model
+            search_term = SearchTerm.objects.get(id=search_term_id, business_profile=business_profile)
+            ai_model = active_ai_models().get(int(ai_model_id))
+            if ai_model is None:
+                raise AIModel.DoesNotExist
+        except (SearchTerm.DoesNotExist, AIModel.DoesNotExist, ValueError):
+            return Response(
+                {"error": "Search term or AI model not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    trace.attributes.update(
+        business_profile_id=business_profile.id, search_term_id=search_term.id, ai_model=ai_model.name,
+    )
+    
     try:
         # Build business context
         business_context = f"{business_profile.business_name} - {business_profile.business_description}"
         
-        print(f"DEBUG: Calling AI service with model: {ai_model.name}, query: {search_term.term}")
-        
         # Query the AI model
-        ai_result = ai_service.query_model(
-            model_name=ai_model.name,
-            query=search_term.term,
-            business_context=business_context,
-            ai_model_obj=ai_model
-        )
-        
-        print(f"DEBUG: AI service returned: {ai_result}")
+        with trace.span('provider'):
+            ai_result = ai_service.query_model(
+                model_name=ai_model.name,
+                query=search_term.term,
+                business_context=business_context,
+                ai_model_obj=ai_model
+            )
+        trace.attributes['tokens_used'] = ai_result['tokens_used']
         
         # Create search log entry
-        try:
+        with trace.span('db_write'):
             search_log = SearchLog.objects.create(
                 business_profile=business_profile,
                 search_term=search_term,
@@ -449,53 +1094,50 @@ def run_ai_search(request):
                 current_cost_input_usd=ai_result.get('current_cost_input_usd'),
                 current_cost_output_usd=ai_result.get('current_cost_output_usd')
             )
-            print(f"DEBUG: SearchLog created successfully with ID: {search_log.id}")
-            
-            # Create analysis entry
+        trace.attributes['search_log_id'] = search_log.id
+        
+        # Create analysis entry; the analysis service times its own provider call and write
+        try:
+            from users.analysis_service import analysis_service
+            analysis_service.analyze_response(
+                ai_result['response'], 
+                business_context, 
+                business_profile, 
+                search_log
+            )
+        except Exception as analysis_error:
+            logger.warning("Analysis of search log %s failed: %s", search_log.id, analysis_error)
+            # Don't fail the entire request if analysis fails
+            # Create a fallback analysis object, unless the service saved one before raising
             try:
-                from users.analysis_service import analysis_service
-                analysis = analysis_service.analyze_response(
-                    ai_result['response'], 
-                    business_context, 
-                    business_profile, 
-                    search_log
-                )
-                print(f"DEBUG: Analysis created successfully with ID: {analysis.id}")
-            except Exception as analysis_error:
-                print(f"DEBUG: Error creating Analysis: {analysis_error}")
-                print(f"DEBUG: Analysis error type: {type(analysis_error)}")
-                # Don't fail the entire request if analysis fails
-                # Create a fallback analysis object
-                try:
-                    from users.models import Analysis
-                    analysis = Analysis.objects.create(
-                        business_profile=business_profile,
-                        search_log=search_log,
-                        business_mentioned=False,
-                        mention_context="",
-                        sentiment="neutral",
-                        confidence_score=0.5,
-                        analysis_model='fallback',
-                        analysis_duration_ms=0,
-                        raw_analysis_response=f"Analysis failed: {str(analysis_error)}"
-                    )
-                    print(f"DEBUG: Fallback analysis created with ID: {analysis.id}")
-                except Exception as fallback_error:
-                    print(f"DEBUG: Even fallback analysis failed: {fallback_error}")
-                
-        except Exception as create_error:
-            print(f"DEBUG: Error creating SearchLog: {create_error}")
-            print(f"DEBUG: Error type: {type(create_error)}")
-            raise create_error
+                with trace.span('db_write'), transaction.atomic():
+                    if not Analysis.objects.filter(search_log_id=search_log.id).exists():
+                        Analysis.objects.create(
+                            business_profile=business_profile,
+                            search_log=search_log,
+                            business_mentioned=False,
+                            mention_context="",
+                            sentiment="neutral",
+                            confidence_score=0.5,
+                            analysis_model='fallback',
+                            analysis_duration_ms=0,
+                            raw_analysis_response=f"Analysis failed: {str(analysis_error)}"
+                        )
+            except Exception:
+                logger.exception("Fallback analysis of search log %s failed", search_log.id)
+        
+        # Everything up to the response is stored; serialization is only in the logged trace
+        with trace.span('db_write'):
+            search_log.timings = trace.timings()
+            SearchLog.objects.filter(pk=search_log.pk).update(timings=search_log.timings)
         
         # Return the result
         try:
-            serializer = SearchLogSerializer(search_log)
-            print(f"DEBUG: Serializer data: {serializer.data}")
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        except Exception as serializer_error:
-            print(f"DEBUG: Error in serializer: {serializer_error}")
-            print(f"DEBUG: Serializer error type: {type(serializer_error)}")
+            with trace.span('serialize'):
+                data = SearchLogSerializer(search_log).data
+            return Response(data, status=status.HTTP_201_CREATED)
+        except Exception:
+            logger.exception("Serializing search log %s failed", search_log.id)
             # Return a simplified response if serializer fails
             return Response({
                 'id': search_log.id,
@@ -506,9 +1148,8 @@ def run_ai_search(request):
             }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
-        print(f"Error running AI search: {e}")
+        logger.exception("Error running AI search")
         return Response(
             {"error": f"Failed to run AI search: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-
@@ -0,0 +1,90 @@
+"""
+Response compression.
+
+Like django.middleware.gzip.GZipMiddleware, but it prefers Brotli when the
+client accepts it and the ``brotli`` package is installed, and it leaves
+small bodies alone: below ``COMPRESSION_MIN_SIZE`` bytes the framing and CPU
+cost outweighs the bytes saved. Streaming responses (search log exports)
+are gzipped chunk by chunk; formats that are already compressed are skipped.
+"""
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_BROTLI_QUALITY = 5
+
+# Payloads that gain nothing from a second compression pass
+SKIP_CONTENT_TYPES = (
+    'application/vnd.apache.parquet',
+    'application/zip',
+    'application/gzip',
+    'image/',
+    'video/',
+    'audio/',
+)
+
+re_accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+re_accepts_br = _lazy_re_compile(r'\bbr\b')
+
+
+def _weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').startswith(SKIP_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if response.streaming:
+            # Brotli would need an incremental compressor per response; gzip
+            # streams with the helper Django already ships.
+            if not re_accepts_gzip.search(accept_encoding):
+                return response
+            if response.is_async:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+            encoding = 'gzip'
+        else:
+            if brotli is not None and re_accepts_br.search(accept_encoding):
+                compressed = brotli.compress(response.content, quality=self.brotli_quality)
+                encoding = 'br'
+            elif re_accepts_gzip.search(accept_encoding):
+                compressed = compress_string(response.content)
+                encoding = 'gzip'
+            else:
+                return response
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        _weaken_etag(response)
+        response.headers['Content-Encoding'] = encoding
+        return response
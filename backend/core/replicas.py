@@ -0,0 +1,140 @@
+"""
+Read-replica routing.
+
+When a ``replica`` database alias is configured, reads that can tolerate a few
+seconds of replication lag (analytics, list endpoints, exports, admin change
+lists) are sent to it; every write, and every read not explicitly marked, stays
+on ``default``. Views opt in with ``@replica_reads``, which routes the reads
+made while the view runs; code that reads after the view returns, such as a
+streaming export, uses ``.using(replica_alias(request.user))`` instead.
+
+Only the app's own models are offloaded. Django's tables (the database cache
+behind the read-through cache and the throttles, sessions, auth) and
+ResourceVersion, which ETags and cache keys are built from, always read the
+primary: a lagging copy of those would pair fresh writes with stale reads.
+``python manage.py check_replica_routing`` checks the routing against two
+databases.
+
+Read-your-writes: ``ReadYourWritesMiddleware`` marks a user as sticky for
+``REPLICA_STICKY_SECONDS`` after any successful unsafe request they make, and
+sticky users read from the primary, so they never see a replica that has not
+caught up with their own change. The mark lives in the ``default`` cache, which
+production shares between workers. That matters for the read-through cache too:
+the business's cache generation is bumped by the write, and a value loaded
+from a stale replica would otherwise be cached under the new generation.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+REPLICA_ALIAS = 'replica'
+PRIMARY_ALIAS = 'default'
+STICKY_CACHE_ALIAS = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Apps whose reads may go to the replica, and models of theirs that may not
+REPLICA_APP_LABELS = ('users',)
+PRIMARY_ONLY_MODELS = ('users.resourceversion',)
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _sticky_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+
+def mark_sticky(user):
+    """Send ``user``'s reads to the primary until the replica has caught up with their write"""
+    if replica_configured() and user is not None and user.is_authenticated:
+        caches[STICKY_CACHE_ALIAS].set(_sticky_key(user.pk), 1, getattr(settings, 'REPLICA_STICKY_SECONDS', 15))
+
+
+def clear_sticky(user):
+    """Let ``user``'s reads go back to the replica straight away"""
+    caches[STICKY_CACHE_ALIAS].delete(_sticky_key(user.pk))
+
+
+def is_sticky(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return caches[STICKY_CACHE_ALIAS].get(_sticky_key(user.pk)) is not None
+
+
+def replica_alias(user=None):
+    """The alias ``user``'s lag-tolerant reads should use"""
+    if not replica_configured() or is_sticky(user):
+        return PRIMARY_ALIAS
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def use_replica(alias=REPLICA_ALIAS):
+    """Route reads inside the block to ``alias`` (the primary when no replica is configured)"""
+    token = _read_alias.set(alias if alias in settings.DATABASES else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(view):
+    """Run safe-method requests of ``view`` with their reads on the replica, unless the user is sticky"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        with use_replica(replica_alias(request.user)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def reads_from_replica(model):
+    """Whether reads of ``model`` may be routed to the replica"""
+    return model._meta.app_label in REPLICA_APP_LABELS and model._meta.label_lower not in PRIMARY_ONLY_MODELS
+
+
+class ReplicaRouter:
+    """
+    Reads of the app's models go where ``use_replica`` says; writes, migrations
+    and everything else go to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or not reads_from_replica(model):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """Makes a user sticky to the primary after each successful write request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF copies the user it authenticated onto the Django request
+            mark_sticky(getattr(request, 'user', None))
+        return response
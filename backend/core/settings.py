@@ -10,11 +10,6 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-# Debug: Check if environment variables are loaded
-print(f"DEBUG: OPENAI_API_KEY loaded: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
-if os.getenv('OPENAI_API_KEY'):
-    print(f"DEBUG: API Key starts with: {os.getenv('OPENAI_API_KEY')[:10]}...")
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,12 +40,17 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'users.metrics.MetricsMiddleware',
+    'api.querylog.DuplicateQueryMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.replicas.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -81,6 +81,42 @@ DATABASES = {
     }
 }
 
+# Optional read replica for analytics, list and export reads (core.replicas).
+# SQLite has no replication, so this only exercises the routing against a second
+# database file, e.g. a copy of db.sqlite3.
+if os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_REPLICA_NAME'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Seconds a user reads from the primary after their own write
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '15'))
+
+# Caches. 'default' holds read-through cached responses (users.caching), 'throttle'
+# rate-limit counters and AI admission slots. The in-process cache is enough for
+# runserver; production shares both across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+# Seconds a read-through cache entry lives; writes invalidate entries before that
+READ_CACHE_TIMEOUT = int(os.getenv('READ_CACHE_TIMEOUT', '300'))
+
+# Search logs older than this many days are archived, unless the business has a
+# RetentionPolicy; ARCHIVE_FORMAT is jsonl.gz or jsonl.zst (needs zstandard)
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_FORMAT = os.getenv('ARCHIVE_FORMAT', 'jsonl.gz')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,22 +146,92 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# 'archive' holds archived search logs (users.archive)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'archive': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': os.getenv('ARCHIVE_ROOT', str(BASE_DIR / 'archive'))},
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom user model
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Opt-in: trust the signed claims embedded at login instead of loading the
+# user on every request; revocation is rechecked every JWT_REVOCATION_CACHE_TTL seconds
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', 'False').lower() == 'true'
+JWT_REVOCATION_CACHE_TTL = int(os.getenv('JWT_REVOCATION_CACHE_TTL', '30'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'api.authentication.ProfileJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Scopes used by api.throttling; counters live in the 'throttle' cache
+    'DEFAULT_THROTTLE_RATES': {
+        'ai_search_user': os.getenv('THROTTLE_AI_SEARCH_USER', '20/min'),
+        'ai_search_business': os.getenv('THROTTLE_AI_SEARCH_BUSINESS', '60/min'),
+        'ai_search_ip': os.getenv('THROTTLE_AI_SEARCH_IP', '60/min'),
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '20/min'),
+        'login_email': os.getenv('THROTTLE_LOGIN_EMAIL', '10/hour'),
+        'password_reset_ip': os.getenv('THROTTLE_PASSWORD_RESET_IP', '5/hour'),
+    },
 }
 
+# Global cap on AI calls in flight across all workers (api.throttling.ai_call_slot).
+# Leases must outlive the slowest AI call (query + analysis); 0 disables the cap.
+AI_ADMISSION_MAX_IN_FLIGHT = int(os.getenv('AI_ADMISSION_MAX_IN_FLIGHT', '8'))
+AI_ADMISSION_LEASE_SECONDS = int(os.getenv('AI_ADMISSION_LEASE_SECONDS', '180'))
+AI_ADMISSION_RETRY_AFTER = int(os.getenv('AI_ADMISSION_RETRY_AFTER', '10'))
+
+# Share of AI searches whose per-stage timing trace is logged (users.tracing);
+# slower ones and failures are always logged
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+TRACE_SLOW_MS = int(os.getenv('TRACE_SLOW_MS', '30000'))
+
+# Query patterns a request may repeat before api.querylog.DuplicateQueryMiddleware
+# (DEBUG only) logs it; CI sets DUPLICATE_QUERIES_RAISE to fail the request instead
+DUPLICATE_QUERIES_THRESHOLD = int(os.getenv('DUPLICATE_QUERIES_THRESHOLD', '3'))
+DUPLICATE_QUERIES_RAISE = os.getenv('DUPLICATE_QUERIES_RAISE', 'False').lower() == 'true'
+
+# Request profiling (users.profiling): staff requests sending PROFILING_HEADER and
+# a PROFILING_SAMPLE_RATE share of all requests are CPU and memory profiled
+PROFILING_HEADER = os.getenv('PROFILING_HEADER', 'X-Profile')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+PROFILING_TOP_ALLOCATIONS = int(os.getenv('PROFILING_TOP_ALLOCATIONS', '25'))
+PROFILING_MAX_STORED = int(os.getenv('PROFILING_MAX_STORED', '500'))
+
+# Bearer token Prometheus has to send to scrape /metrics (open when unset)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Response compression (core.middleware.CompressionMiddleware): bodies smaller
+# than this many bytes are sent as-is
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -160,3 +266,24 @@ else:
     CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOW_CREDENTIALS = True
+
+# App logs, including sampled AI search traces, go to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'users': {
+            'handlers': ['console'],
+            'level': os.getenv('APP_LOG_LEVEL', 'INFO'),
+        },
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('APP_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
@@ -37,13 +37,17 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'users.metrics.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.replicas.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -83,6 +87,75 @@ if os.environ.get('DATABASE_URL'):
     import dj_database_url
     DATABASES['default'] = dj_database_url.parse(os.environ.get('DATABASE_URL'))
 
+# Keep connections open between requests instead of paying the TCP, TLS and auth
+# handshake on every API call, and check them before reuse so a connection the
+# server dropped is replaced instead of failing the request. Each gunicorn worker
+# thread holds one connection, so workers x threads (per instance) has to stay
+# below the server's max_connections; DB_CONN_MAX_AGE=0 restores per-request
+# connections, e.g. behind PgBouncer in transaction mode.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
+DATABASES['default'].setdefault('OPTIONS', {}).setdefault(
+    'connect_timeout', int(os.environ.get('DB_CONNECT_TIMEOUT', '5'))
+)
+
+# Optional streaming replica for analytics, list, export and admin change list
+# reads (core.replicas); it gets the same connection settings as the primary.
+if os.environ.get('DATABASE_REPLICA_URL'):
+    import dj_database_url
+    DATABASES['replica'] = dj_database_url.parse(os.environ.get('DATABASE_REPLICA_URL'))
+    for name in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS'):
+        DATABASES['replica'][name] = DATABASES['default'][name]
+    DATABASES['replica'].setdefault('OPTIONS', {}).update(DATABASES['default']['OPTIONS'])
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Seconds a user reads from the primary after their own write; keep it above the
+# replica's usual lag
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '15'))
+
+# Caches. 'default' holds read-through cached responses (users.caching), 'throttle'
+# rate-limit counters and AI admission slots. Both must be shared by every gunicorn
+# worker, since invalidations and counters have to reach all of them: Redis when
+# REDIS_URL is set, otherwise the database cache (run `python manage.py
+# createcachetable` once). CACHE_DIR switches 'default' to a file cache, which is
+# only shared between workers on the same machine.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache_throttle',
+    },
+}
+if os.environ.get('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR'),
+    }
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+        'KEY_PREFIX': 'geoexplorer',
+    }
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+        'KEY_PREFIX': 'throttle',
+    }
+
+# Seconds a read-through cache entry lives; writes invalidate entries before that
+READ_CACHE_TIMEOUT = int(os.environ.get('READ_CACHE_TIMEOUT', '300'))
+
+# Search logs older than this many days are archived, unless the business has a
+# RetentionPolicy; ARCHIVE_FORMAT is jsonl.gz or jsonl.zst (needs zstandard)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_FORMAT = os.environ.get('ARCHIVE_FORMAT', 'jsonl.gz')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,8 +182,26 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Use WhiteNoise for static files
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Use WhiteNoise for static files. 'archive' holds archived search logs
+# (users.archive): the local disk under ARCHIVE_ROOT by default, or object
+# storage by pointing ARCHIVE_STORAGE_BACKEND at e.g. django-storages' S3Storage,
+# configured through its own settings.
+ARCHIVE_STORAGE_BACKEND = os.environ.get('ARCHIVE_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage')
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
+    },
+    'archive': {
+        'BACKEND': ARCHIVE_STORAGE_BACKEND,
+        'OPTIONS': (
+            {'location': os.environ.get('ARCHIVE_ROOT', str(BASE_DIR / 'archive'))}
+            if ARCHIVE_STORAGE_BACKEND == 'django.core.files.storage.FileSystemStorage' else {}
+        ),
+    },
+}
 
 # Add static files finders
 STATICFILES_FINDERS = [
@@ -127,16 +218,69 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Opt-in: trust the signed claims embedded at login instead of loading the
+# user on every request; revocation is rechecked every JWT_REVOCATION_CACHE_TTL seconds
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'False').lower() == 'true'
+JWT_REVOCATION_CACHE_TTL = int(os.environ.get('JWT_REVOCATION_CACHE_TTL', '30'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'api.authentication.ProfileJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Scopes used by api.throttling; counters live in the 'throttle' cache
+    'DEFAULT_THROTTLE_RATES': {
+        'ai_search_user': os.environ.get('THROTTLE_AI_SEARCH_USER', '20/min'),
+        'ai_search_business': os.environ.get('THROTTLE_AI_SEARCH_BUSINESS', '60/min'),
+        'ai_search_ip': os.environ.get('THROTTLE_AI_SEARCH_IP', '60/min'),
+        'login_ip': os.environ.get('THROTTLE_LOGIN_IP', '20/min'),
+        'login_email': os.environ.get('THROTTLE_LOGIN_EMAIL', '10/hour'),
+        'password_reset_ip': os.environ.get('THROTTLE_PASSWORD_RESET_IP', '5/hour'),
+    },
+    # Number of trusted proxies in front of the app, used to pick the client IP
+    # out of X-Forwarded-For for the per-IP throttles
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
 }
 
+# Global cap on AI calls in flight across all workers (api.throttling.ai_call_slot).
+# Leases must outlive the slowest AI call (query + analysis); 0 disables the cap.
+AI_ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('AI_ADMISSION_MAX_IN_FLIGHT', '32'))
+AI_ADMISSION_LEASE_SECONDS = int(os.environ.get('AI_ADMISSION_LEASE_SECONDS', '180'))
+AI_ADMISSION_RETRY_AFTER = int(os.environ.get('AI_ADMISSION_RETRY_AFTER', '10'))
+
+# Share of AI searches whose per-stage timing trace is logged (users.tracing);
+# slower ones and failures are always logged
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_SLOW_MS = int(os.environ.get('TRACE_SLOW_MS', '30000'))
+
+# Request profiling (users.profiling): staff requests sending PROFILING_HEADER and
+# a PROFILING_SAMPLE_RATE share of all requests are CPU and memory profiled
+PROFILING_HEADER = os.environ.get('PROFILING_HEADER', 'X-Profile')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', '5'))
+PROFILING_TOP_ALLOCATIONS = int(os.environ.get('PROFILING_TOP_ALLOCATIONS', '25'))
+PROFILING_MAX_STORED = int(os.environ.get('PROFILING_MAX_STORED', '500'))
+
+# Bearer token Prometheus has to send to scrape /metrics (open when unset)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Response compression (core.middleware.CompressionMiddleware): bodies smaller
+# than this many bytes are sent as-is
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -0,0 +1,99 @@
+"""
+Worker start-up, called from the gunicorn hooks in ``gunicorn.conf.py``.
+
+With ``preload_app`` the master imports Django, the URLconf (and through it
+the views and serializers) and the provider SDKs once, and every worker is
+forked from that copy. Nothing that holds a socket may cross the fork, so the
+master closes its database connections before forking and each worker then
+warms its own:
+
+- database connections, one per request thread for gthread workers, so the
+  first requests don't pay for the connection handshake (with
+  ``CONN_MAX_AGE`` they stay open afterwards);
+- the OpenAI and OpenRouter HTTP pools, so the first AI search doesn't pay for
+  the TLS handshake;
+- the active AI model cache read by ``run_ai_search``.
+
+Every step is best-effort: a failure is logged and the worker starts anyway.
+"""
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_TIMEOUT = 5
+
+
+def preload_application():
+    """Import everything a request would, in the master, before workers are forked"""
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    # The provider SDKs are imported on first use; import them once here so
+    # every worker shares them instead of importing them on its first AI search
+    import openai  # noqa: F401
+    import requests  # noqa: F401
+    connections.close_all()
+
+
+def _step(name, fn, *args):
+    started = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        logger.warning("Warm-up step %s failed: %s", name, e)
+        return
+    logger.info("Warmed %s in %.0f ms", name, (time.perf_counter() - started) * 1000)
+
+
+def warm_database_connection():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_thread_connections(executor, threads):
+    """Open a database connection on each of ``threads`` executor threads"""
+    # Each task holds its thread until all have started, so no thread runs two
+    barrier = threading.Barrier(threads, timeout=PROVIDER_TIMEOUT)
+
+    def task():
+        barrier.wait()
+        warm_database_connection()
+
+    for future in [executor.submit(task) for _ in range(threads)]:
+        future.result()
+
+
+def warm_providers():
+    from users.ai_service import ai_service
+    from users.analysis_service import analysis_service
+
+    ai_service.client.with_options(timeout=PROVIDER_TIMEOUT, max_retries=0).models.list()
+    # Any answer leaves an open connection in the pool
+    analysis_service.session.head(analysis_service.base_url, timeout=PROVIDER_TIMEOUT)
+
+
+def warm_model_cache():
+    from users.caching import active_ai_models
+
+    active_ai_models()
+
+
+def warm_worker(worker):
+    """Warm a freshly started gunicorn worker"""
+    # gthread workers serve requests on their thread pool and ASGI workers on a
+    # new thread per request, so for them this thread's connection only proves
+    # the database is reachable
+    executor = getattr(worker, 'tpool', None)
+    serves_on_this_thread = worker.cfg.worker_class_str == 'sync'
+    if executor is not None:
+        _step('database connections', warm_thread_connections, executor, worker.cfg.threads)
+    else:
+        _step('database connection', warm_database_connection)
+    _step('provider connections', warm_providers)
+    _step('AI model cache', warm_model_cache)
+    if not serves_on_this_thread:
+        connections.close_all()
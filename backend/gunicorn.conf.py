@@ -0,0 +1,92 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts in this directory.
+
+AI searches spend 10-40 s waiting on OpenAI and OpenRouter, so a worker that
+serves one request at a time (gunicorn's default sync worker) is idle almost
+all of the time. GUNICORN_PROFILE picks how requests are served:
+
+- ``gthread`` (default): WSGI with GUNICORN_THREADS threads per worker
+- ``uvicorn``: ASGI (core.asgi) on uvicorn workers (needs the uvicorn
+  package). Django runs every request's sync code on a new thread of its own,
+  so the number of sync views in flight is not bounded by any thread pool
+  (ASGI_THREADS doesn't apply to them), and a persistent connection opened on
+  that thread would never be reused. This profile therefore forces
+  DB_CONN_MAX_AGE=0: each request connects and closes its own connection.
+- ``sync``: one request at a time per worker, the old behaviour
+
+Each gthread request thread holds its own database connection, opened when the
+worker starts, so WEB_CONCURRENCY x GUNICORN_THREADS (per instance) has to fit
+under the database's max_connections. WEB_CONCURRENCY therefore defaults to the
+CPUs this process may run on, capped at MAX_DEFAULT_WORKERS (2 x CPUs + 1,
+capped at 2 x MAX_DEFAULT_WORKERS + 1, for sync); set it explicitly on bigger
+machines. Compare the profiles with ``python manage.py loadtest_profiles``.
+
+Workers share their Prometheus metrics (users.metrics) through files in
+PROMETHEUS_MULTIPROC_DIR, which is emptied here before the app is loaded.
+"""
+import os
+import shutil
+import tempfile
+
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile not in ('gthread', 'uvicorn', 'sync'):
+    raise ValueError(f"Unknown GUNICORN_PROFILE {profile!r}; use gthread, uvicorn or sync")
+
+# Keeps the default database connections per instance (workers x threads) small
+MAX_DEFAULT_WORKERS = 4
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+# The CPUs this process may run on, which a container's cpuset can make fewer than the host's
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+if profile == 'sync':
+    worker_class = 'sync'
+    workers = int(os.environ.get('WEB_CONCURRENCY', min(cpus, MAX_DEFAULT_WORKERS) * 2 + 1))
+    threads = 1
+elif profile == 'gthread':
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', min(cpus, MAX_DEFAULT_WORKERS)))
+else:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', min(cpus, MAX_DEFAULT_WORKERS)))
+    # Read by core.settings_production when the app is loaded, after this file
+    os.environ['DB_CONN_MAX_AGE'] = '0'
+
+wsgi_app = 'core.asgi:application' if profile == 'uvicorn' else 'core.wsgi:application'
+
+# Longer than the slowest AI search plus its analysis, or the worker is killed mid-request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+accesslog = '-'
+
+# Must be set before prometheus_client is imported, i.e. before the app is preloaded
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'geoexplorer-metrics'),
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    if preload_app:
+        from core.warmup import preload_application
+
+        preload_application()
+
+
+def post_worker_init(worker):
+    from core.warmup import warm_worker
+
+    warm_worker(worker)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the worker's in-flight gauges; its counters stay in the totals
+    multiprocess.mark_process_dead(worker.pid)
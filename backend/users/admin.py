@@ -1,6 +1,51 @@
+from collections import Counter
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import CustomUser, BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis, RetentionPolicy, SearchLogArchive, RequestProfile
+from core.replicas import replica_alias, use_replica
+
+from .search import has_full_text_index, matching_search_log_ids
+
+
+class FullTextSearchMixin:
+    """
+    Matches admin searches against the full-text index as well as ``search_fields``.
+
+    ``full_text_lookup`` is the path from the admin's model to the SearchLog id.
+    Without a full-text index (unsupported database) ``fallback_search_fields``
+    are searched with the regular ``icontains`` lookups instead.
+    """
+    full_text_lookup = 'id'
+    fallback_search_fields = ()
+
+    def get_search_fields(self, request):
+        search_fields = tuple(super().get_search_fields(request))
+        if not has_full_text_index():
+            search_fields += tuple(self.fallback_search_fields)
+        return search_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term.strip() and has_full_text_index():
+            matching_ids = matching_search_log_ids(search_term)
+            results |= queryset.filter(**{f'{self.full_text_lookup}__in': matching_ids})
+        return results, may_have_duplicates
+
+
+class ReplicaChangeListMixin:
+    """Reads the change list page from the read replica, when one is configured"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with use_replica(replica_alias(request.user)):
+            return super().changelist_view(request, extra_context)
 
 
 class CustomUserAdmin(UserAdmin):
@@ -72,10 +117,11 @@ class AIModelAdmin(admin.ModelAdmin):
 
 
 @admin.register(SearchLog)
-class SearchLogAdmin(admin.ModelAdmin):
+class SearchLogAdmin(ReplicaChangeListMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('search_term', 'ai_model', 'business_profile', 'search_timestamp', 'response_time_ms', 'tokens_used')
     list_filter = ('ai_model', 'search_timestamp', 'business_profile__business_name')
-    search_fields = ('search_term__term', 'query', 'response', 'business_profile__business_name')
+    search_fields = ('search_term__term', 'business_profile__business_name')
+    fallback_search_fields = ('query', 'response')
     readonly_fields = ('search_timestamp', 'response_time_ms', 'tokens_used')
     fieldsets = (
         ('Search Details', {
@@ -94,10 +140,12 @@ class SearchLogAdmin(admin.ModelAdmin):
 
 
 @admin.register(Analysis)
-class AnalysisAdmin(admin.ModelAdmin):
+class AnalysisAdmin(ReplicaChangeListMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('search_log', 'business_profile', 'business_mentioned', 'sentiment', 'confidence_score', 'analysis_timestamp')
     list_filter = ('business_mentioned', 'sentiment', 'analysis_model', 'analysis_timestamp', 'business_profile__business_name')
-    search_fields = ('search_log__search_term__term', 'business_profile__business_name', 'mention_context')
+    search_fields = ('search_log__search_term__term', 'business_profile__business_name')
+    fallback_search_fields = ('mention_context',)
+    full_text_lookup = 'search_log_id'
     readonly_fields = ('analysis_timestamp', 'analysis_duration_ms')
     fieldsets = (
         ('Analysis Details', {
@@ -113,3 +161,72 @@ class AnalysisAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('search_log__search_term', 'business_profile')
+
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ('business_profile', 'archive_after_days', 'is_active', 'updated_at')
+    list_filter = ('is_active',)
+    search_fields = ('business_profile__business_name',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(SearchLogArchive)
+class SearchLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('business_profile', 'month', 'format', 'row_count', 'size_bytes', 'created_at')
+    list_filter = ('format', 'month')
+    search_fields = ('business_profile__business_name', 'file')
+    readonly_fields = ('business_profile', 'month', 'file', 'format', 'row_count', 'size_bytes', 'created_at')
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'cpu_samples', 'trigger', 'user')
+    list_filter = ('trigger', 'method', 'status_code')
+    search_fields = ('request_id', 'path', 'user__email')
+    list_select_related = ('user',)
+    exclude = ('folded_stacks', 'top_allocations')
+    readonly_fields = (
+        'request_id', 'method', 'path', 'status_code', 'user', 'trigger', 'duration_ms', 'sample_interval_ms',
+        'cpu_samples', 'memory_peak_bytes', 'created_at', 'flame_graph', 'hottest_functions', 'allocations',
+    )
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/folded/', self.admin_site.admin_view(self.folded_view), name='users_requestprofile_folded'),
+        ] + super().get_urls()
+    
+    def folded_view(self, request, pk):
+        """The sampled stacks as a .folded file for flamegraph.pl, speedscope or inferno"""
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(profile.folded_stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{profile.request_id}.folded"'
+        return response
+    
+    @admin.display(description="Flame graph")
+    def flame_graph(self, obj):
+        return format_html(
+            '<a href="{}">Download {}.folded</a> (open it in speedscope.app or pipe it to flamegraph.pl)',
+            reverse('admin:users_requestprofile_folded', args=[obj.pk]), obj.request_id,
+        )
+    
+    @admin.display(description="Hottest functions (own samples)")
+    def hottest_functions(self, obj):
+        leaves = Counter()
+        for line in obj.folded_stacks.splitlines():
+            stack, _, count = line.rpartition(' ')
+            leaves[stack.rpartition(';')[2]] += int(count)
+        return format_html_join('\n', '<div>{} &times; {}</div>', leaves.most_common(15)) or '-'
+    
+    @admin.display(description="Top allocations")
+    def allocations(self, obj):
+        return format_html_join(
+            '\n', '<div>{} KiB in {} blocks: {}:{}</div>',
+            ((round(row['size_bytes'] / 1024, 1), row['count'], row['file'], row['line']) for row in obj.top_allocations),
+        ) or '-'
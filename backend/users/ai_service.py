@@ -1,28 +1,59 @@
+import json
+import logging
 import os
-import openai
+import threading
 from django.conf import settings
 from typing import Dict, Any, Optional
 import time
-from .analysis_service import analysis_service
+
+logger = logging.getLogger(__name__)
+
 
 class AIService:
     def __init__(self):
-        self.client = None
-        self._initialize_client()
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """The OpenAI client, created on first use so importing this module stays cheap"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._initialize_client()
+        return self._client
     
     def _initialize_client(self):
         """Initialize the OpenAI client with API key"""
         api_key = os.getenv('OPENAI_API_KEY')
-        print(f"DEBUG: Loading OpenAI API key: {api_key[:10]}..." if api_key else "DEBUG: No API key found")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.client = openai.OpenAI(api_key=api_key)
+        import openai
+        return openai.OpenAI(api_key=api_key)
     
     def query_model(self, model_name: str, query: str, business_context: Optional[str] = None, ai_model_obj=None) -> Dict[str, Any]:
         """
-        Query an AI model with a search term and optional business context
+        Query an AI model with a search term and optional business context,
+        recording its latency, tokens and estimated cost in ``users.metrics``
         """
+        from .metrics import ESTIMATED_COST, PROVIDER_ERRORS, PROVIDER_LATENCY, TOKENS_USED
+        from .rollups import estimated_cost_usd
+        
+        started = time.perf_counter()
+        try:
+            result = self._query_model(model_name, query, business_context, ai_model_obj)
+        except Exception:
+            PROVIDER_ERRORS.labels(model_name).inc()
+            raise
+        PROVIDER_LATENCY.labels(model_name).observe(time.perf_counter() - started)
+        TOKENS_USED.labels(model_name).inc(result['tokens_used'] or 0)
+        ESTIMATED_COST.labels(model_name).inc(float(estimated_cost_usd(
+            result['tokens_used'], result['current_cost_input_usd'], result['current_cost_output_usd']
+        )))
+        return result
+    
+    def _query_model(self, model_name: str, query: str, business_context: Optional[str] = None, ai_model_obj=None) -> Dict[str, Any]:
         if not self.client:
             raise ValueError("AI client not initialized")
 
@@ -44,24 +75,9 @@ class AIService:
                 end_time = time.time()
                 response_time_ms = int((end_time - start_time) * 1000)
 
-                # For GPT-5, the response structure is different
-                # Let's check what we get back
-                print(f"DEBUG: GPT-5 response structure: {type(response)}")
-                print(f"DEBUG: GPT-5 response attributes: {dir(response)}")
-                print(f"DEBUG: GPT-5 response content: {response}")
-                
-                # Print the entire response as JSON for debugging
-                import json
-                try:
+                if logger.isEnabledFor(logging.DEBUG):
                     response_dict = response.model_dump() if hasattr(response, 'model_dump') else response.__dict__
-                    print("=" * 80)
-                    print("FULL GPT-5 RESPONSE JSON:")
-                    print("=" * 80)
-                    print(json.dumps(response_dict, indent=2, default=str))
-                    print("=" * 80)
-                except Exception as e:
-                    print(f"Could not serialize response to JSON: {e}")
-                    print(f"Raw response: {response}")
+                    logger.debug("GPT-5 response: %s", json.dumps(response_dict, default=str))
 
                 # GPT-5 response has a different structure - extract the text content
                 # The response has an 'output' list with messages containing text
@@ -141,6 +157,3 @@ class AIService:
 
 # Global instance
 ai_service = AIService()
-
-# Global instance
-ai_service = AIService()
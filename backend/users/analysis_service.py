@@ -1,9 +1,15 @@
 import os
+import threading
 import time
 import json
+import logging
 from typing import Dict, Any, Optional
-import requests
+from django.db import transaction
+from .metrics import ANALYSES, ANALYSIS_LATENCY
 from .models import Analysis
+from .tracing import span
+
+logger = logging.getLogger(__name__)
 
 
 class AnalysisService:
@@ -14,8 +20,29 @@ class AnalysisService:
         if not self.openrouter_api_key:
             raise ValueError("OPENROUTER_API_KEY environment variable is required")
         
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = os.getenv('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1")
         self.model = "google/gemma-2-9b-it"
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """
+        HTTP session keeping TLS connections to OpenRouter open across calls, one
+        per concurrent request thread; requests is only imported on first use
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(os.getenv('OPENROUTER_POOL_SIZE', '32')))
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
 
     def analyze_response(self, response: str, business_context: str, business_profile, search_log) -> Analysis:
         """
@@ -36,69 +63,68 @@ class AnalysisService:
             # Extract business name from context - use business profile name directly
             business_name = business_profile.business_name if business_profile else ""
             
-            # Debug logging
-            print(f"DEBUG: Analysis - Business context: '{business_context}'")
-            print(f"DEBUG: Analysis - Extracted business name: '{business_name}'")
-            print(f"DEBUG: Analysis - Business profile name: '{business_profile.business_name}'")
-            print(f"DEBUG: Analysis - Response length: {len(response)} characters")
+            logger.debug(
+                "Analysing a %s character response for mentions of %r", len(response), business_name
+            )
 
             # Create the analysis prompt
             analysis_prompt = self._create_analysis_prompt(response, business_name)
-            
-            # Debug logging
-            print(f"DEBUG: Analysis - Prompt being sent to OpenRouter:")
-            print("=" * 80)
-            print(analysis_prompt)
-            print("=" * 80)
 
             # Call OpenRouter API
-            analysis_result = self._call_openrouter(analysis_prompt)
-            
-            # Debug logging
-            print(f"DEBUG: Analysis - OpenRouter response:")
-            print("=" * 80)
-            print(analysis_result)
-            print("=" * 80)
+            started = time.perf_counter()
+            with span('analysis'):
+                analysis_result = self._call_openrouter(analysis_prompt)
+            ANALYSIS_LATENCY.labels(self.model).observe(time.perf_counter() - started)
+            logger.debug("OpenRouter analysis: %s", analysis_result)
 
             # Parse the analysis result
             analysis_data = self._parse_analysis_result(analysis_result, business_name, response)
+            ANALYSES.labels(self.model, 'fallback' if analysis_data['analysis_model'] == 'fallback' else 'ok').inc()
             
             # Calculate analysis duration
             analysis_duration_ms = int((time.time() - start_time) * 1000)
             
-            # Create and save Analysis object
-            analysis = Analysis.objects.create(
-                business_profile=business_profile,
-                search_log=search_log,
-                business_mentioned=analysis_data['business_mentioned'],
-                mention_context=analysis_data['mention_context'],
-                sentiment=analysis_data['sentiment'],
-                confidence_score=analysis_data['confidence_score'],
-                analysis_model=self.model,
-                analysis_duration_ms=analysis_duration_ms,
-                raw_analysis_response=analysis_result
-            )
+            # Create and save Analysis object, together with its daily rollup update (post_save)
+            with span('db_write'), transaction.atomic():
+                analysis = Analysis.objects.create(
+                    business_profile=business_profile,
+                    search_log=search_log,
+                    business_mentioned=analysis_data['business_mentioned'],
+                    mention_context=analysis_data['mention_context'],
+                    sentiment=analysis_data['sentiment'],
+                    confidence_score=analysis_data['confidence_score'],
+                    analysis_model=self.model,
+                    analysis_duration_ms=analysis_duration_ms,
+                    raw_analysis_response=analysis_result
+                )
             
             return analysis
 
         except Exception as e:
-            print(f"Error in analysis service: {e}")
+            # The analysis (and its rollup update) either committed together or not at all
+            existing = Analysis.objects.filter(search_log_id=search_log.id).first()
+            if existing is not None:
+                logger.warning("Analysis of search log %s raised after it was saved: %s", search_log.id, e)
+                return existing
+            logger.warning("Analysis of search log %s failed, using the fallback: %s", search_log.id, e)
+            ANALYSES.labels(self.model, 'fallback').inc()
             # Fallback to basic analysis
             analysis_data = self._fallback_analysis(response, business_context)
             
             # Create Analysis object with fallback data
             analysis_duration_ms = int((time.time() - start_time) * 1000)
-            analysis = Analysis.objects.create(
-                business_profile=business_profile,
-                search_log=search_log,
-                business_mentioned=analysis_data['business_mentioned'],
-                mention_context=analysis_data['mention_context'],
-                sentiment=analysis_data['sentiment'],
-                confidence_score=analysis_data['confidence_score'],
-                analysis_model='fallback',
-                analysis_duration_ms=analysis_duration_ms,
-                raw_analysis_response=f"Fallback analysis due to error: {str(e)}"
-            )
+            with span('db_write'), transaction.atomic():
+                analysis = Analysis.objects.create(
+                    business_profile=business_profile,
+                    search_log=search_log,
+                    business_mentioned=analysis_data['business_mentioned'],
+                    mention_context=analysis_data['mention_context'],
+                    sentiment=analysis_data['sentiment'],
+                    confidence_score=analysis_data['confidence_score'],
+                    analysis_model='fallback',
+                    analysis_duration_ms=analysis_duration_ms,
+                    raw_analysis_response=f"Fallback analysis due to error: {str(e)}"
+                )
             
             return analysis
     
@@ -151,7 +177,7 @@ Rules:
             "max_tokens": 500
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/chat/completions",
             headers=headers,
             json=data,
@@ -187,8 +213,7 @@ Rules:
             }
             
         except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"Error parsing analysis result: {e}")
-            print(f"Raw analysis text: {analysis_text}")
+            logger.warning("Could not parse the analysis result (%s): %s", e, analysis_text)
             # Fallback to basic analysis
             return self._fallback_analysis(original_response, business_name)
     
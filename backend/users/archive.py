@@ -0,0 +1,220 @@
+"""
+Retention tiering: old search logs move from the database to archive files.
+
+Search logs older than a business's retention window (its RetentionPolicy, or
+``settings.ARCHIVE_AFTER_DAYS``) are written with their analysis to compressed
+JSON Lines files in the ``archive`` storage (see ``STORAGES``), one file per
+business, month and run::
+
+    search-logs/business=<id>/month=<YYYY-MM>/<run>-<first id>.jsonl.gz
+
+Each archived search log leaves an ArchivedSearchLog row with the numbers the
+daily rollup is built from, so ``rebuild_daily_stats`` still covers it. The
+SearchLog and Analysis rows are deleted with plain SQL, which skips the
+post_delete receivers that would otherwise subtract them from
+DailySearchStats; the search_logs version and read cache are bumped by hand
+instead.
+
+``rehydrate()`` reads one archived search log back from its file.
+"""
+import gzip
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import (
+    Analysis, ArchivedSearchLog, BusinessProfile, ResourceVersion, RetentionPolicy, SearchLog, SearchLogArchive,
+)
+
+ARCHIVE_STORAGE_ALIAS = 'archive'
+DELETE_BATCH_SIZE = 500
+
+SEARCH_LOG_FIELDS = [field.attname for field in SearchLog._meta.concrete_fields]
+ANALYSIS_FIELDS = [field.attname for field in Analysis._meta.concrete_fields]
+# Columns copied onto ArchivedSearchLog, from the search log and from its analysis
+THIN_SEARCH_LOG_FIELDS = (
+    'id', 'business_profile_id', 'search_term_id', 'ai_model_id', 'search_timestamp',
+    'response_time_ms', 'tokens_used', 'current_cost_input_usd', 'current_cost_output_usd',
+)
+THIN_ANALYSIS_FIELDS = ('business_mentioned', 'sentiment', 'analysis_duration_ms')
+
+
+class ArchiveFormatUnavailable(Exception):
+    """Raised when the configured archive format needs a package that is not installed"""
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ArchiveFormatUnavailable("jsonl.zst archives need the zstandard package")
+    return zstandard
+
+
+# format: (compress, decompress)
+ARCHIVE_FORMATS = {
+    'jsonl.gz': (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+    'jsonl.zst': (
+        lambda data: _zstandard().ZstdCompressor(level=10).compress(data),
+        lambda data: _zstandard().ZstdDecompressor().decompress(data),
+    ),
+}
+
+
+def archive_storage():
+    return storages[ARCHIVE_STORAGE_ALIAS]
+
+
+def archive_format():
+    name = getattr(settings, 'ARCHIVE_FORMAT', 'jsonl.gz')
+    if name not in ARCHIVE_FORMATS:
+        raise ArchiveFormatUnavailable(f"Unknown archive format {name!r}; use one of {sorted(ARCHIVE_FORMATS)}")
+    if name == 'jsonl.zst':
+        _zstandard()
+    return name
+
+
+def archive_cutoffs(business_profile_id=None, now=None):
+    """``{business_profile_id: cutoff}`` for every business whose old search logs should be archived"""
+    now = now or timezone.now()
+    default_days = getattr(settings, 'ARCHIVE_AFTER_DAYS', None)
+    policies = {
+        policy.business_profile_id: policy
+        for policy in RetentionPolicy.objects.filter(
+            **({'business_profile_id': business_profile_id} if business_profile_id else {})
+        )
+    }
+    business_profiles = BusinessProfile.objects.order_by('id')
+    if business_profile_id:
+        business_profiles = business_profiles.filter(id=business_profile_id)
+
+    cutoffs = {}
+    for business_profile_id_ in business_profiles.values_list('id', flat=True):
+        policy = policies.get(business_profile_id_)
+        if policy is not None:
+            if policy.is_active:
+                cutoffs[business_profile_id_] = now - timedelta(days=policy.archive_after_days)
+        elif default_days:
+            cutoffs[business_profile_id_] = now - timedelta(days=default_days)
+    return cutoffs
+
+
+def _month(value):
+    value = timezone.localtime(value)
+    return date(value.year, value.month, 1)
+
+
+def _encode(search_log, analysis):
+    record = dict(search_log)
+    record['analysis'] = analysis
+    return json.dumps(record, cls=DjangoJSONEncoder)
+
+
+def _delete(cursor, table, column, ids):
+    qn = connection.ops.quote_name
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        batch = ids[start:start + DELETE_BATCH_SIZE]
+        cursor.execute(
+            f"DELETE FROM {qn(table)} WHERE {qn(column)} IN ({', '.join(['%s'] * len(batch))})",
+            batch,
+        )
+
+
+def _write_archive(business_profile_id, month, rows, file_format, run):
+    """Store one month of ``(search_log, analysis)`` rows and swap them for thin rows; returns the archive"""
+    compress, _ = ARCHIVE_FORMATS[file_format]
+    payload = compress(('\n'.join(_encode(search_log, analysis) for search_log, analysis in rows) + '\n').encode())
+    storage = archive_storage()
+    name = storage.save(
+        f"search-logs/business={business_profile_id}/month={month:%Y-%m}/{run}-{rows[0][0]['id']}.{file_format}",
+        ContentFile(payload),
+    )
+
+    try:
+        with transaction.atomic():
+            archive = SearchLogArchive.objects.create(
+                business_profile_id=business_profile_id, month=month, file=name, format=file_format,
+                row_count=len(rows), size_bytes=len(payload),
+            )
+            ArchivedSearchLog.objects.bulk_create([
+                ArchivedSearchLog(
+                    archive=archive,
+                    **{field: search_log[field] for field in THIN_SEARCH_LOG_FIELDS},
+                    **({field: analysis[field] for field in THIN_ANALYSIS_FIELDS} if analysis else {}),
+                )
+                for search_log, analysis in rows
+            ])
+            ids = [search_log['id'] for search_log, _ in rows]
+            with connection.cursor() as cursor:
+                _delete(cursor, Analysis._meta.db_table, 'search_log_id', ids)
+                _delete(cursor, SearchLog._meta.db_table, 'id', ids)
+            # The raw deletes sent no signals. Bumped with each delete, so the
+            # archives written before a failed run are not served as live
+            ResourceVersion.bump('search_logs', business_profile_id)
+            invalidate('search_logs', business_profile_id)
+    except Exception:
+        storage.delete(name)
+        raise
+    return archive
+
+
+def archive_search_logs(business_profile_id, before, batch_size=5000, dry_run=False):
+    """
+    Archive the search logs of one business older than ``before``, oldest first.
+
+    Returns ``(search logs archived, archives written)``; with ``dry_run`` only
+    counts what would be archived.
+    """
+    search_logs = SearchLog.objects.filter(business_profile_id=business_profile_id, search_timestamp__lt=before)
+    if dry_run:
+        return search_logs.count(), 0
+
+    file_format = archive_format()
+    run = timezone.now().strftime('%Y%m%dT%H%M%S')
+    archived, archives = 0, 0
+    while True:
+        batch = list(search_logs.order_by('search_timestamp', 'id').values(*SEARCH_LOG_FIELDS)[:batch_size])
+        if not batch:
+            break
+        analyses = {
+            analysis['search_log_id']: analysis
+            for analysis in Analysis.objects.filter(
+                search_log_id__in=[search_log['id'] for search_log in batch],
+                # Lets PostgreSQL skip analysis partitions older than the batch
+                analysis_timestamp__gte=batch[0]['search_timestamp'],
+            ).values(*ANALYSIS_FIELDS)
+        }
+        by_month = defaultdict(list)
+        for search_log in batch:
+            by_month[_month(search_log['search_timestamp'])].append((search_log, analyses.get(search_log['id'])))
+        for month, rows in by_month.items():
+            _write_archive(business_profile_id, month, rows, file_format, run)
+            archives += 1
+        archived += len(batch)
+
+    return archived, archives
+
+
+def rehydrate(archived_search_log):
+    """The full search log and analysis of an ArchivedSearchLog, read back from its archive file"""
+    # Records start with their id, so only the matching line is parsed
+    prefix = f'{{"id": {archived_search_log.id},'.encode()
+    _, decompress = ARCHIVE_FORMATS[archived_search_log.archive.format]
+    with archive_storage().open(archived_search_log.archive.file, 'rb') as f:
+        data = decompress(f.read())
+    for line in data.splitlines():
+        if line.startswith(prefix):
+            record = json.loads(line)
+            return record, record.pop('analysis')
+    raise SearchLogArchive.DoesNotExist(
+        f"Search log {archived_search_log.id} is missing from {archived_search_log.archive.file}"
+    )
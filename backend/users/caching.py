@@ -0,0 +1,172 @@
+"""
+Read-through caching for reference data and read endpoints.
+
+Cached values are keyed by a per-resource *generation* stored in the cache
+itself. The ``post_save``/``post_delete`` receivers in ``users.signals`` call
+``invalidate()``, which bumps the generation once the transaction commits, so
+every key built from the old generation is orphaned at once (and left to
+expire) without having to know which query strings were cached.
+
+Resources use the same names as ``ResourceVersion``: ``ai_models`` is global,
+the others are per business profile. Code that writes with ``bulk_create``,
+``bulk_update`` or ``QuerySet.update`` sends no signals and must call
+``invalidate()`` itself.
+
+The cache must be shared by all workers (see ``CACHES`` in the production
+settings), otherwise an invalidation only reaches the worker that made it.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'default'
+GLOBAL_RESOURCES = frozenset({'ai_models'})
+
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(resource, business_profile_id):
+    owner = None if resource in GLOBAL_RESOURCES else business_profile_id
+    return f'gen:{resource}:{owner}'
+
+
+def _generations(resources, business_profile_id):
+    """Current generation of each resource, starting unseen ones from the clock"""
+    cache = _cache()
+    keys = [_generation_key(resource, business_profile_id) for resource in resources]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # A clock-based start can't collide with a generation that was evicted
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def invalidate(resource, business_profile_id=None):
+    """Orphan every cached read of ``resource``, after the current transaction commits"""
+    transaction.on_commit(partial(_bump_generation, _generation_key(resource, business_profile_id)))
+
+
+def _bump_generation(key):
+    try:
+        _cache().incr(key)
+    except ValueError:
+        # Never read, or evicted: the next read starts a fresh generation
+        pass
+
+
+def _record(name, outcome):
+    from .metrics import READ_CACHE_LOOKUPS
+
+    with _stats_lock:
+        _stats[name][outcome] += 1
+    READ_CACHE_LOOKUPS.labels(name, 'hit' if outcome == 'hits' else 'miss').inc()
+
+
+def cache_stats():
+    """Hit and miss counts per cached read in this process"""
+    with _stats_lock:
+        stats = {name: dict(counts) for name, counts in _stats.items()}
+    for counts in stats.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+    return {'pid': os.getpid(), 'reads': stats}
+
+
+def read_through(name, loader, resources, business_profile_id=None, params=(), time_bucket=None, timeout=None):
+    """
+    Return the cached value of ``loader()`` for the current generation of ``resources``.
+
+    ``params`` distinguishes variants of the same read (query parameters);
+    ``time_bucket`` (seconds) is for values that also change as time passes,
+    such as "last N days" analytics, and rolls the key over every bucket.
+    A ``None`` result is not cached.
+    """
+    parts = [name, str(business_profile_id)]
+    parts += [str(generation) for generation in _generations(resources, business_profile_id)]
+    parts += [f'{key}={value}' for key, value in params]
+    if time_bucket:
+        parts.append(f't{int(time.time() // time_bucket)}')
+    key = 'read:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    cache = _cache()
+    value = cache.get(key)
+    if value is not None:
+        _record(name, 'hits')
+        return value
+
+    _record(name, 'misses')
+    value = loader()
+    if timeout is None:
+        timeout = getattr(settings, 'READ_CACHE_TIMEOUT', 300)
+    if value is not None:
+        cache.set(key, value, timeout)
+    return value
+
+
+def cached_view(name, *resources, time_bucket=None, timeout=None):
+    """
+    Serve successful GET responses of a DRF function view through ``read_through``.
+
+    Goes below ``@api_view`` (and ``@versioned``) so it sees the authenticated
+    request. The key covers the user's business profile and query string.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            business_profile_id = None
+            if not set(resources) <= GLOBAL_RESOURCES:
+                try:
+                    business_profile_id = request.user.business_profile.id
+                except ObjectDoesNotExist:
+                    return view(request, *args, **kwargs)
+
+            uncached = []
+
+            def load():
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    # Errors are not cached; hand the response back as is
+                    uncached.append(response)
+                    return None
+                return response.data
+
+            params = sorted(request.query_params.lists()) + sorted(kwargs.items())
+            data = read_through(
+                name, load, resources, business_profile_id,
+                params=params, time_bucket=time_bucket, timeout=timeout,
+            )
+            return uncached[0] if uncached else Response(data)
+
+        return wrapper
+
+    return decorator
+
+
+def active_ai_models():
+    """Active AI models by id, cached until any AI model changes"""
+    from .models import AIModel
+
+    return read_through(
+        'active_ai_models',
+        lambda: {ai_model.id: ai_model for ai_model in AIModel.objects.filter(is_active=True)},
+        ['ai_models'],
+    )
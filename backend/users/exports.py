@@ -0,0 +1,236 @@
+"""
+Streaming exports of search logs joined to their analysis.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and encoded chunk by chunk, so memory use does not
+depend on the number of rows exported. Parquet and Arrow output need the
+optional ``pyarrow`` package.
+
+Archived search logs are exported from their ArchivedSearchLog rows, merged
+into the live ones by time. The text columns only exist in the archive files,
+so they are empty for those rows.
+"""
+import csv
+import heapq
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ArchivedSearchLog, SearchLog
+
+# (column name, SearchLog lookup)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('search_timestamp', 'search_timestamp'),
+    ('search_term', 'search_term__term'),
+    ('ai_model', 'ai_model__name'),
+    ('provider', 'ai_model__provider'),
+    ('query', 'query'),
+    ('response', 'response'),
+    ('response_time_ms', 'response_time_ms'),
+    ('tokens_used', 'tokens_used'),
+    ('current_cost_input_usd', 'current_cost_input_usd'),
+    ('current_cost_output_usd', 'current_cost_output_usd'),
+    ('business_mentioned', 'analysis__business_mentioned'),
+    ('mention_context', 'analysis__mention_context'),
+    ('sentiment', 'analysis__sentiment'),
+    ('confidence_score', 'analysis__confidence_score'),
+    ('analysis_model', 'analysis__analysis_model'),
+    ('analysis_duration_ms', 'analysis__analysis_duration_ms'),
+]
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+# (column name, ArchivedSearchLog lookup) of the columns an archived search log still has
+ARCHIVED_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('search_timestamp', 'search_timestamp'),
+    ('search_term', 'search_term__term'),
+    ('ai_model', 'ai_model__name'),
+    ('provider', 'ai_model__provider'),
+    ('response_time_ms', 'response_time_ms'),
+    ('tokens_used', 'tokens_used'),
+    ('current_cost_input_usd', 'current_cost_input_usd'),
+    ('current_cost_output_usd', 'current_cost_output_usd'),
+    ('business_mentioned', 'business_mentioned'),
+    ('sentiment', 'sentiment'),
+    ('analysis_duration_ms', 'analysis_duration_ms'),
+]
+
+
+class ExportFormatUnavailable(Exception):
+    """Raised when an export format needs a package that is not installed"""
+
+
+def _filtered(queryset, business_profile_id, search_term_id, ai_model_id, since, until):
+    queryset = queryset.filter(business_profile_id=business_profile_id)
+    if search_term_id:
+        queryset = queryset.filter(search_term_id=search_term_id)
+    if ai_model_id:
+        queryset = queryset.filter(ai_model_id=ai_model_id)
+    if since:
+        queryset = queryset.filter(search_timestamp__gte=since)
+    if until:
+        queryset = queryset.filter(search_timestamp__lt=until)
+    return queryset.order_by('search_timestamp', 'id')
+
+
+def export_queryset(business_profile_id, search_term_id=None, ai_model_id=None, since=None, until=None):
+    """Live search logs of one business as tuples in EXPORT_COLUMNS order, oldest first"""
+    search_logs = _filtered(SearchLog.objects, business_profile_id, search_term_id, ai_model_id, since, until)
+    return search_logs.values_list(*[lookup for _, lookup in EXPORT_COLUMNS])
+
+
+def archived_export_queryset(business_profile_id, search_term_id=None, ai_model_id=None, since=None, until=None):
+    """Archived search logs of one business as tuples in ARCHIVED_EXPORT_COLUMNS order, oldest first"""
+    archived = _filtered(ArchivedSearchLog.objects, business_profile_id, search_term_id, ai_model_id, since, until)
+    return archived.values_list(*[lookup for _, lookup in ARCHIVED_EXPORT_COLUMNS])
+
+
+def export_rows(business_profile_id, search_term_id=None, ai_model_id=None, since=None, until=None,
+                using=None, chunk_size=2000):
+    """
+    Every search log of one business, archived ones included, as tuples in
+    EXPORT_COLUMNS order, oldest first. Both sources are streamed from ``using``.
+    """
+    filters = (business_profile_id, search_term_id, ai_model_id, since, until)
+    live = export_queryset(*filters).using(using).iterator(chunk_size=chunk_size)
+    positions = {name: index for index, (name, _) in enumerate(ARCHIVED_EXPORT_COLUMNS)}
+    archived = (
+        tuple(row[positions[name]] if name in positions else None for name in COLUMN_NAMES)
+        for row in archived_export_queryset(*filters).using(using).iterator(chunk_size=chunk_size)
+    )
+    # Both are ordered by (search_timestamp, id)
+    return heapq.merge(archived, live, key=lambda row: (row[1], row[0]))
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_chunks(rows, batch_size=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMN_NAMES)
+    for batch in _batches(rows, batch_size):
+        writer.writerows(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in row] for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, batch_size=500):
+    encoder = DjangoJSONEncoder()
+    for batch in _batches(rows, batch_size):
+        yield ''.join(encoder.encode(dict(zip(COLUMN_NAMES, row))) + '\n' for row in batch)
+
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ('id', pa.int64()),
+        ('search_timestamp', pa.timestamp('us', tz='UTC')),
+        ('search_term', pa.string()),
+        ('ai_model', pa.string()),
+        ('provider', pa.string()),
+        ('query', pa.string()),
+        ('response', pa.string()),
+        ('response_time_ms', pa.int64()),
+        ('tokens_used', pa.int64()),
+        ('current_cost_input_usd', pa.decimal128(10, 6)),
+        ('current_cost_output_usd', pa.decimal128(10, 6)),
+        ('business_mentioned', pa.bool_()),
+        ('mention_context', pa.string()),
+        ('sentiment', pa.string()),
+        ('confidence_score', pa.decimal128(3, 2)),
+        ('analysis_model', pa.string()),
+        ('analysis_duration_ms', pa.int64()),
+    ])
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportFormatUnavailable("Parquet and Arrow exports require the pyarrow package")
+    return pyarrow
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every batch"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _columnar_chunks(rows, batch_size, open_writer):
+    pa = _import_pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    writer = open_writer(pa, sink, schema)
+    for batch in _batches(rows, batch_size):
+        columns = list(zip(*batch))
+        writer.write_batch(pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def parquet_chunks(rows, batch_size=10000):
+    """Parquet with one row group per batch"""
+    return _columnar_chunks(
+        rows, batch_size,
+        lambda pa, sink, schema: pa.parquet.ParquetWriter(sink, schema, compression='zstd'),
+    )
+
+
+def arrow_chunks(rows, batch_size=10000):
+    """Arrow IPC stream format"""
+    return _columnar_chunks(
+        rows, batch_size,
+        lambda pa, sink, schema: pa.ipc.new_stream(sink, schema),
+    )
+
+
+# format: (content type, file extension, chunk generator)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv', csv_chunks),
+    'ndjson': ('application/x-ndjson', 'ndjson', ndjson_chunks),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', parquet_chunks),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', arrow_chunks),
+}
+
+
+def check_format_available(export_format):
+    """Raise ExportFormatUnavailable before streaming starts if a dependency is missing"""
+    if export_format in ('parquet', 'arrow'):
+        _import_pyarrow()
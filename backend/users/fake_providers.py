@@ -0,0 +1,120 @@
+"""
+A local stand-in for the OpenAI and OpenRouter APIs, for load tests and benchmarks.
+
+Both providers speak the OpenAI chat completions protocol, so one server covers
+``ai_service`` (point ``OPENAI_BASE_URL`` at it) and ``analysis_service``
+(``OPENROUTER_BASE_URL``). Each completion waits ``delay`` seconds
+(``analysis_delay`` for the analysis model) before answering, standing in for
+model latency, so the server measures how the app copes with slow upstream
+calls rather than how fast the model is. Requests to the analysis model get a
+well-formed analysis JSON back; ``error_rate`` of all completions fail with a
+500 instead, which the OpenAI client retries and the analysis service answers
+with its fallback.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANALYSIS_MODEL = 'google/gemma-2-9b-it'
+RESPONSE_TEXT = (
+    "Here are some of the most popular options, with their strengths and typical pricing. "
+    "Acme is often recommended for small teams thanks to its simple setup. "
+) * 8
+ANALYSIS_TEXT = json.dumps({
+    'business_mentioned': True,
+    'mention_context': "Acme is often recommended for small teams thanks to its simple setup.",
+    'sentiment': 'positive',
+    'confidence_score': 0.9,
+    'reasoning': "Recommended by name.",
+})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._send(200)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send(200, {'object': 'list', 'data': []})
+        else:
+            self._send(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send(404, {'error': {'message': 'Not found'}})
+            return
+
+        model = request.get('model', '')
+        failed = self.server.record_request()
+        time.sleep(self.server.analysis_delay if model == ANALYSIS_MODEL else self.server.delay)
+        if failed:
+            self._send(500, {'error': {'message': 'Fake provider error', 'type': 'server_error'}})
+            return
+        content = ANALYSIS_TEXT if model == ANALYSIS_MODEL else RESPONSE_TEXT
+        self._send(200, {
+            'id': f'chatcmpl-fake-{time.time_ns()}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 40, 'completion_tokens': 260, 'total_tokens': 300},
+        })
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    """Serves fake chat completions on 127.0.0.1 from a background thread"""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, delay=0.5, port=0, analysis_delay=None, error_rate=0.0, seed=None):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.delay = delay
+        self.analysis_delay = delay if analysis_delay is None else analysis_delay
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def record_request(self):
+        """Count a completion request; True when it should fail"""
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from users.archive import archive_cutoffs, archive_search_logs
+
+
+class Command(BaseCommand):
+    help = "Move search logs older than each business's retention window to compressed archive files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-profile', type=int, help="Only archive this business profile's search logs")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Search logs read and deleted per batch")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the search logs that would be archived")
+
+    def handle(self, *args, **options):
+        total = 0
+        for business_profile_id, before in archive_cutoffs(options['business_profile']).items():
+            archived, archives = archive_search_logs(
+                business_profile_id, before, batch_size=options['batch_size'], dry_run=options['dry_run'],
+            )
+            if archived:
+                verb = "Would archive" if options['dry_run'] else "Archived"
+                self.stdout.write(
+                    f"{verb} {archived} search logs of business {business_profile_id} "
+                    f"from before {before:%Y-%m-%d}" + ("" if options['dry_run'] else f" into {archives} files")
+                )
+            total += archived
+        self.stdout.write(self.style.SUCCESS(f"{'Would archive' if options['dry_run'] else 'Archived'} {total} search logs"))
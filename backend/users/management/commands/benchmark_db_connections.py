@@ -0,0 +1,89 @@
+import statistics
+import time
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.authentication import tokens_for_user
+from api.connections import connection_stats, reset_connection_stats
+
+
+def _percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure request latency with a new database connection per request against "
+        "persistent connections (CONN_MAX_AGE), through Django's WSGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/search-terms/', help="Authenticated GET endpoint to request")
+        parser.add_argument('--email', help="User to authenticate as; defaults to the first user with a business profile")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode")
+        parser.add_argument('--max-age', type=int, default=600, help="CONN_MAX_AGE of the persistent mode")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.filter(business_profile__isnull=False).order_by('id')
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.first()
+        if user is None:
+            raise CommandError("No user with a business profile to authenticate as; run seed_scale or pass --email")
+        token = str(tokens_for_user(user).access_token)
+
+        handler = WSGIHandler()
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': options['path'], 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': f'Bearer {token}', 'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(), 'wsgi.errors': BytesIO(),
+        }
+        statuses = []
+
+        def request():
+            response = handler(dict(environ), lambda status, headers: statuses.append(status))
+            b''.join(response)
+            response.close()
+
+        connection = connections[options['database']]
+        original = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write(
+            f"{options['requests']} requests to {options['path']} on {connection.vendor} "
+            f"({connection.settings_dict.get('HOST') or connection.settings_dict['NAME']})\n"
+        )
+        self.stdout.write(f"{'CONN_MAX_AGE':<14}{'median ms':>11}{'p95 ms':>9}{'req/s':>9}{'connections':>13}{'reuse':>8}")
+        try:
+            for max_age in (0, options['max_age']):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                request()
+                reset_connection_stats()
+                statuses.clear()
+
+                timings = []
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    request_started = time.perf_counter()
+                    request()
+                    timings.append((time.perf_counter() - request_started) * 1000)
+                elapsed = time.perf_counter() - started
+
+                if any(not status.startswith('200') for status in statuses):
+                    raise CommandError(f"{options['path']} answered {sorted(set(statuses))}")
+                stats = connection_stats()['databases'].get(connection.alias, {})
+                self.stdout.write(
+                    f"{max_age:<14}{statistics.median(timings):>11.2f}{_percentile(timings, 0.95):>9.2f}"
+                    f"{len(timings) / elapsed:>9.0f}{stats.get('connections_opened', 0):>13}"
+                    f"{stats.get('reuse_rate') or 0:>8.0%}"
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = original
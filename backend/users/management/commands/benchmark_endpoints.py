@@ -0,0 +1,250 @@
+import json
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.authentication import tokens_for_user
+from users.caching import active_ai_models
+from users.fake_providers import FakeProviderServer
+from users.models import AIModel, BusinessProfile, SearchTerm
+from users.seeding import seed_search_data
+
+ENDPOINTS = ('run_ai_search', 'search_logs', 'search_analytics')
+AI_SEARCH_SCOPES = ('ai_search_user', 'ai_search_business', 'ai_search_ip')
+# Options that change the workload; a baseline only compares against the same ones
+WORKLOAD_OPTIONS = (
+    'businesses', 'logs', 'terms', 'searches', 'reads', 'concurrency',
+    'provider_delay', 'analysis_delay', 'error_rate',
+)
+
+
+def _percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _QueryCounter:
+    """``execute_wrapper`` counting the queries run on one connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed businesses and search terms, then drive run_ai_search, search_logs and search_analytics "
+        "concurrently through Django's WSGI handler with OpenAI and OpenRouter replaced by a local fake. "
+        "Reports throughput, p50/p95/p99 latency and queries per request for each endpoint, and compares "
+        "them with a saved baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=4, help="Businesses to seed")
+        parser.add_argument('--logs', type=int, default=500, help="Analysed search logs to seed per business")
+        parser.add_argument('--terms', type=int, default=10, help="Search terms to seed per business")
+        parser.add_argument('--searches', type=int, default=100, help="run_ai_search requests")
+        parser.add_argument('--reads', type=int, default=300, help="Requests to each read endpoint")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once")
+        parser.add_argument('--provider-delay', type=float, default=0.2, help="Seconds each fake AI model completion takes")
+        parser.add_argument('--analysis-delay', type=float, help="Seconds each fake analysis takes (default: --provider-delay)")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of fake completions that fail with a 500")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for the data, the request mix and provider errors")
+        parser.add_argument('--baseline', help="Baseline file (default: benchmarks/endpoints-<database vendor>.json)")
+        parser.add_argument('--save-baseline', action='store_true', help="Write this run's results as the new baseline")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed p95 latency increase and throughput drop against the baseline")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded businesses and the search logs created")
+
+    def handle(self, *args, **options):
+        if options['analysis_delay'] is None:
+            options['analysis_delay'] = options['provider_delay']
+        baseline_path = Path(options['baseline'] or settings.BASE_DIR / 'benchmarks' / f'endpoints-{connection.vendor}.json')
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                "SQLite serialises writes across threads; run against PostgreSQL for meaningful numbers"
+            ))
+
+        existing_models = set(AIModel.objects.values_list('id', flat=True))
+        started = time.perf_counter()
+        business_ids = seed_search_data(
+            businesses=options['businesses'], logs_per_business=options['logs'],
+            terms_per_business=options['terms'], seed=options['seed'],
+        )
+        self.stdout.write(f"Seeded {len(business_ids)} businesses x {options['logs']} search logs "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+        providers = FakeProviderServer(
+            delay=options['provider_delay'], analysis_delay=options['analysis_delay'],
+            error_rate=options['error_rate'], seed=options['seed'],
+        ).start()
+        try:
+            results, elapsed = self._run(business_ids, providers, options)
+        finally:
+            providers.stop()
+            if not options['keep']:
+                get_user_model().objects.filter(business_profile__id__in=business_ids).delete()
+                AIModel.objects.filter(name__startswith='seed-').exclude(id__in=existing_models).delete()
+
+        summary = self._summarise(results, elapsed)
+        self.stdout.write(
+            f"\n{options['searches']} AI searches and {options['reads']} requests per read endpoint, "
+            f"{options['concurrency']} concurrent, fake completions take {options['provider_delay']} s "
+            f"(analysis {options['analysis_delay']} s) and fail {options['error_rate']:.0%} of the time, "
+            f"{providers.requests} completions served in {elapsed:.1f}s\n"
+        )
+        self.stdout.write(f"{'endpoint':<18}{'ok':>6}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+                          f"{'p99 ms':>9}{'queries':>9}{'max':>5}")
+        for name, row in summary.items():
+            self.stdout.write(
+                f"{name:<18}{row['ok']:>6}{row['errors']:>8}{row['throughput']:>8.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['queries_mean']:>9.1f}{row['queries_max']:>5}"
+            )
+
+        workload = {name: options[name] for name in WORKLOAD_OPTIONS}
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(
+                {'vendor': connection.vendor, 'workload': workload, 'endpoints': summary}, indent=2,
+            ) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"\nSaved the baseline to {baseline_path}"))
+        elif baseline_path.exists():
+            self._compare(json.loads(baseline_path.read_text()), baseline_path, workload, summary, options['tolerance'])
+        else:
+            self.stdout.write(f"\nNo baseline at {baseline_path}; pass --save-baseline to record one")
+
+    def _run(self, business_ids, providers, options):
+        os.environ.update(OPENAI_API_KEY='sk-benchmark', OPENAI_BASE_URL=providers.base_url,
+                          OPENROUTER_API_KEY='benchmark', OPENROUTER_BASE_URL=providers.base_url)
+        from users.ai_service import ai_service
+        from users.analysis_service import analysis_service
+
+        ai_service._client = None
+        analysis_service.base_url = providers.base_url
+
+        rng = random.Random(options['seed'])
+        ai_model_ids = sorted(active_ai_models())
+        if not ai_model_ids:
+            raise CommandError("No active AI models to search with")
+        businesses = []
+        for profile in BusinessProfile.objects.filter(id__in=business_ids).select_related('user'):
+            businesses.append((
+                str(tokens_for_user(profile.user).access_token),
+                list(SearchTerm.objects.filter(business_profile=profile).values_list('id', flat=True)),
+            ))
+
+        jobs = [name for name, count in (('run_ai_search', options['searches']), ('search_logs', options['reads']),
+                                         ('search_analytics', options['reads'])) for _ in range(count)]
+        rng.shuffle(jobs)
+        jobs = [(name, rng.choice(businesses), rng.choice(ai_model_ids), rng.random()) for name in jobs]
+
+        handler = WSGIHandler()
+
+        def request(job):
+            name, (token, term_ids), ai_model_id, pick = job
+            body = b''
+            if name == 'run_ai_search':
+                body = json.dumps({
+                    'search_term_id': term_ids[int(pick * len(term_ids))], 'ai_model_id': ai_model_id,
+                }).encode()
+            environ = {
+                'REQUEST_METHOD': 'POST' if body else 'GET',
+                'PATH_INFO': {'run_ai_search': '/api/run-ai-search/', 'search_logs': '/api/search-logs/',
+                              'search_analytics': '/api/search-analytics/'}[name],
+                'QUERY_STRING': '', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {token}', 'REMOTE_ADDR': '127.0.0.1', 'wsgi.url_scheme': 'http',
+                'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': BytesIO(body), 'wsgi.errors': BytesIO(),
+            }
+            statuses = []
+            counters = [_QueryCounter() for _ in connections]
+            with ExitStack() as stack:
+                for alias, counter in zip(connections, counters):
+                    stack.enter_context(connections[alias].execute_wrapper(counter))
+                started = time.perf_counter()
+                response = handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+                b''.join(response)
+                response.close()
+                latency = time.perf_counter() - started
+            return name, statuses[0], latency, sum(counter.count for counter in counters)
+
+        # AI searches are benchmarked without the per-user throttles and admission cap
+        rates = dict.fromkeys(AI_SEARCH_SCOPES)
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, rates), \
+                override_settings(AI_ADMISSION_MAX_IN_FLIGHT=0, TRACE_SAMPLE_RATE=0.0):
+            # One untimed request per endpoint imports the views and opens the provider clients
+            for name in ENDPOINTS:
+                request(next(job for job in jobs if job[0] == name))
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(request, jobs))
+            elapsed = time.perf_counter() - started
+        connections.close_all()
+        return results, elapsed
+
+    def _summarise(self, results, elapsed):
+        by_endpoint = defaultdict(list)
+        for name, status, latency, queries in results:
+            by_endpoint[name].append((status, latency, queries))
+        summary = {}
+        for name in ENDPOINTS:
+            rows = by_endpoint[name]
+            ok = [(latency, queries) for status, latency, queries in rows if status < 400]
+            timings = [latency * 1000 for latency, _ in ok] or [0.0]
+            queries = [queries for _, queries in ok] or [0]
+            summary[name] = {
+                'ok': len(ok),
+                'errors': len(rows) - len(ok),
+                'throughput': round(len(ok) / elapsed, 2),
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(_percentile(timings, 0.95), 2),
+                'p99_ms': round(_percentile(timings, 0.99), 2),
+                'queries_mean': round(statistics.mean(queries), 2),
+                'queries_max': max(queries),
+            }
+        return summary
+
+    def _compare(self, baseline, path, workload, summary, tolerance):
+        if baseline.get('vendor') != connection.vendor or baseline.get('workload') != workload:
+            raise CommandError(
+                f"{path} was recorded on {baseline.get('vendor')} with {baseline.get('workload')}; rerun with "
+                f"the same options or record a new baseline with --save-baseline"
+            )
+        self.stdout.write(f"\nAgainst {path} (tolerance {tolerance:.0%}):")
+        regressions = []
+        for name, row in summary.items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            self.stdout.write(
+                f"{name:<18}p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms, "
+                f"{before['throughput']:.1f} -> {row['throughput']:.1f} req/s, "
+                f"max queries {before['queries_max']} -> {row['queries_max']}"
+            )
+            if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name} p95 latency {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+            if row['throughput'] < before['throughput'] * (1 - tolerance):
+                regressions.append(f"{name} throughput {before['throughput']:.1f} -> {row['throughput']:.1f} req/s")
+            if row['queries_max'] > before['queries_max']:
+                regressions.append(f"{name} queries per request {before['queries_max']} -> {row['queries_max']}")
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions"))
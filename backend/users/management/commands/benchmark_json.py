@@ -0,0 +1,112 @@
+import gzip
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+from users.models import AIModel, Analysis, BusinessProfile, SearchLog, SearchTerm
+from users.serializers import SearchLogSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WORDS = (
+    "crm pipeline sales team contact automation integration pricing support "
+    "dashboard reporting forecast email workflow customer enterprise startup"
+).split()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def build_payload(count, seed=0):
+    """Serialized search logs shaped like the search-logs list response, built without the database"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    profile = BusinessProfile(id=1, user_id=1, business_name='Acme', industry='tech')
+    terms = [SearchTerm(id=i, business_profile=profile, term=_text(rng, 3), created_at=now, updated_at=now) for i in range(1, 21)]
+    models = [
+        AIModel(id=i, name=name, provider='OpenAI', created_at=now,
+                cost_per_million_input_usd=Decimal('2.500000'), cost_per_million_output_usd=Decimal('10.000000'))
+        for i, name in enumerate(('gpt-4o', 'gpt-4o-mini', 'claude-sonnet', 'gemini-pro'), start=1)
+    ]
+
+    logs = []
+    for i in range(1, count + 1):
+        timestamp = now - timedelta(minutes=i)
+        log = SearchLog(
+            id=i, business_profile=profile, search_term=rng.choice(terms), ai_model=rng.choice(models),
+            query=_text(rng, 12), response=_text(rng, rng.randint(150, 400)),
+            search_timestamp=timestamp, response_time_ms=rng.randint(400, 9000), tokens_used=rng.randint(200, 2000),
+            current_cost_input_usd=Decimal('0.000250'), current_cost_output_usd=Decimal('0.001000'),
+        )
+        mentioned = rng.random() < 0.4
+        log.analysis = Analysis(
+            id=i, business_profile=profile, search_log=log, business_mentioned=mentioned,
+            mention_context=_text(rng, 20) if mentioned else '',
+            sentiment=rng.choice(('positive', 'neutral', 'negative', 'mixed')) if mentioned else 'neutral',
+            confidence_score=Decimal('0.85'), analysis_model='google/gemma-2-9b-it',
+            analysis_timestamp=timestamp, analysis_duration_ms=rng.randint(200, 2000),
+        )
+        logs.append(log)
+
+    return {'count': count, 'results': SearchLogSerializer(logs, many=True, exclude=('business_profile',)).data}
+
+
+def _timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare JSON rendering and response compression for a synthetic search-logs payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logs', type=int, default=1000, help="Search logs in the payload")
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement; the median is reported")
+        parser.add_argument('--brotli-quality', type=int, default=5)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        payload = build_payload(options['logs'])
+
+        renderers = [('stdlib json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer falls back to stdlib json"))
+
+        self.stdout.write(f"Payload: {options['logs']} search logs, median of {repeat} runs\n")
+        self.stdout.write(f"{'renderer':<14}{'render ms':>12}{'bytes':>12}")
+        body = None
+        for label, renderer in renderers:
+            body, elapsed = _timed(lambda: renderer.render(payload), repeat)
+            self.stdout.write(f"{label:<14}{elapsed:>12.2f}{len(body):>12,}")
+
+        parsed, elapsed = _timed(lambda: orjson.loads(body) if orjson else None, repeat)
+        if orjson is not None:
+            self.stdout.write(f"{'orjson parse':<14}{elapsed:>12.2f}")
+
+        self.stdout.write(f"\n{'encoding':<14}{'compress ms':>12}{'bytes':>12}{'ratio':>8}")
+        encoders = [('identity', lambda: body), ('gzip-6', lambda: gzip.compress(body, compresslevel=6))]
+        if brotli is not None:
+            quality = options['brotli_quality']
+            encoders.append((f'br-{quality}', lambda: brotli.compress(body, quality=quality)))
+        else:
+            self.stdout.write(self.style.WARNING("brotli is not installed; only gzip is measured"))
+        for label, encode in encoders:
+            compressed, elapsed = _timed(encode, repeat)
+            self.stdout.write(f"{label:<14}{elapsed:>12.2f}{len(compressed):>12,}{len(body) / len(compressed):>8.1f}x")
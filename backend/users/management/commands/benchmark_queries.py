@@ -0,0 +1,140 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from users.models import Analysis, BusinessProfile, DailySearchStats, SearchLog
+from users.seeding import seed_search_data
+
+INDEXED_MODELS = (SearchLog, Analysis, DailySearchStats)
+
+
+def hot_queries(business_profile_id):
+    """The querysets behind the search-log, analyses, analytics, time-series and admin reads"""
+    sample = SearchLog.objects.filter(business_profile_id=business_profile_id).values(
+        'search_term_id', 'ai_model_id'
+    ).first()
+    if sample is None:
+        raise CommandError(f"Business profile {business_profile_id} has no search logs")
+    now = timezone.now()
+    search_logs = SearchLog.objects.filter(business_profile_id=business_profile_id)
+    analyses = Analysis.objects.filter(business_profile_id=business_profile_id)
+
+    return [
+        ('search logs, latest 100', search_logs.order_by('-search_timestamp')[:100]),
+        ('search logs by term and model', search_logs.filter(
+            search_term_id=sample['search_term_id'], ai_model_id=sample['ai_model_id'],
+        ).order_by('-search_timestamp')),
+        ('search logs by model, latest 100', search_logs.filter(
+            ai_model_id=sample['ai_model_id'],
+        ).order_by('-search_timestamp')[:100]),
+        ('search logs with negative mentions', search_logs.filter(
+            analysis__business_mentioned=True, analysis__sentiment='negative',
+        ).order_by('-search_timestamp')[:100]),
+        ('export, last 7 days', search_logs.filter(
+            search_timestamp__gte=now - timedelta(days=7), search_timestamp__lt=now,
+        ).order_by('search_timestamp')),
+        ('time series, 30 days by day', search_logs.filter(
+            search_timestamp__gte=now - timedelta(days=30), analysis__isnull=False,
+        ).annotate(bucket=TruncDay('search_timestamp')).values('bucket').annotate(
+            searches=Count('id'), mentions=Count('id', filter=Q(analysis__business_mentioned=True)),
+        ).order_by('bucket')),
+        ('analyses, latest 100', analyses.order_by('-analysis_timestamp')[:100]),
+        ('mention sentiment counts', analyses.filter(business_mentioned=True).values('sentiment').annotate(
+            count=Count('id'),
+        ).order_by()),
+        ('analytics rollup, 30 days', DailySearchStats.objects.filter(
+            business_profile_id=business_profile_id, day__gte=timezone.localdate() - timedelta(days=30),
+        ).values('search_term_id', 'ai_model_id').annotate(searches=Sum('searches')).order_by()),
+        ('admin changelist, latest 100', SearchLog.objects.order_by('-search_timestamp')[:100]),
+    ]
+
+
+def _analyze():
+    tables = [model._meta.db_table for model in INDEXED_MODELS]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('ANALYZE ' + ', '.join(connection.ops.quote_name(table) for table in tables))
+        else:
+            cursor.execute('ANALYZE')
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans and timings for the tenant-scoped hot queries, optionally on seeded data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-profile', type=int, help="Business to query (default: the one with most search logs)")
+        parser.add_argument('--seed', type=int, default=0, metavar='LOGS',
+                            help="Seed this many search logs per business first")
+        parser.add_argument('--businesses', type=int, default=5, help="Businesses to seed")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query; the median is reported")
+        parser.add_argument('--compare', action='store_true',
+                            help="Also run every query with the model indexes dropped")
+        parser.add_argument('--keep', action='store_true', help="Commit the seeded data instead of rolling it back")
+        parser.add_argument('--no-plans', action='store_true', help="Only print the timing tables")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                started = time.perf_counter()
+                seeded = seed_search_data(
+                    businesses=options['businesses'], logs_per_business=options['seed'],
+                    log=lambda message: self.stderr.write(message),
+                )
+                self.stdout.write(f"Seeded {len(seeded)} businesses x {options['seed']} search logs "
+                                  f"in {time.perf_counter() - started:.1f}s")
+            _analyze()
+
+            business_profile_id = options['business_profile'] or self._busiest_business()
+            self.stdout.write(f"{connection.vendor}, business profile {business_profile_id}, "
+                              f"{SearchLog.objects.count():,} search logs in total\n")
+
+            with_indexes = self._run(business_profile_id, options, 'with indexes')
+            if options['compare']:
+                self._drop_indexes()
+                _analyze()
+                without_indexes = self._run(business_profile_id, options, 'without indexes')
+                self.stdout.write(f"\n{'query':<40}{'indexed ms':>12}{'unindexed ms':>14}{'speed-up':>10}")
+                for (label, indexed, _), (_, unindexed, _) in zip(with_indexes, without_indexes):
+                    self.stdout.write(f"{label:<40}{indexed:>12.2f}{unindexed:>14.2f}{unindexed / max(indexed, 1e-6):>9.1f}x")
+
+            if not options['keep']:
+                # Roll back the seed data and the dropped indexes alike
+                transaction.set_rollback(True)
+
+    def _busiest_business(self):
+        busiest = BusinessProfile.objects.annotate(logs=Count('search_logs')).order_by('-logs').first()
+        if busiest is None:
+            raise CommandError("No business profiles; pass --seed to create some")
+        return busiest.id
+
+    def _run(self, business_profile_id, options, title):
+        explain_options = {'analyze': True, 'buffers': True} if connection.vendor == 'postgresql' else {}
+        results = []
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        for label, queryset in hot_queries(business_profile_id):
+            rows, timings = 0, []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                rows = len(list(queryset.all()))
+                timings.append((time.perf_counter() - started) * 1000)
+            elapsed = statistics.median(timings)
+            plan = queryset.explain(**explain_options)
+            results.append((label, elapsed, rows))
+
+            self.stdout.write(f"{label:<40}{elapsed:>10.2f} ms{rows:>8} rows")
+            if not options['no_plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+        return results
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
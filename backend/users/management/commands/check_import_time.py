@@ -0,0 +1,81 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker or management command imports before it can do anything
+STARTUP_SCRIPT = (
+    "import django; django.setup(); "
+    "from django.conf import settings; from importlib import import_module; "
+    "import_module(settings.ROOT_URLCONF)"
+)
+# Modules that are only needed by some requests and must be imported on first use
+# (requests can't be one: rest_framework.compat imports it)
+LAZY_MODULES = ('openai', 'httpx', 'numpy', 'pyarrow', 'zstandard')
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure_startup():
+    """``(total ms, {module: cumulative ms})`` for one cold start, from ``python -X importtime``"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+        cwd=settings.BASE_DIR, env=dict(os.environ), capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(f"Startup failed:\n{result.stderr[-3000:]}")
+
+    total, modules = 0, {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, module = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        modules[module] = cumulative
+        if depth == 1:
+            total += cumulative
+    return total, modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the imports of Django start-up plus the URLconf with python -X importtime and fail when "
+        "they exceed a budget or pull in modules that should be imported lazily"
+    )
+
+    def add_arguments(self, parser):
+        # The median measures 430-600 ms on a development machine and varies by
+        # about 100 ms between runs; the budget leaves room for that noise
+        parser.add_argument('--budget-ms', type=float, default=800, help="Maximum median import time in ms")
+        parser.add_argument('--repeat', type=int, default=5, help="Cold starts measured; the median is compared")
+        parser.add_argument('--top', type=int, default=10, help="Slowest top-level packages to list")
+
+    def handle(self, *args, **options):
+        runs = [measure_startup() for _ in range(options['repeat'])]
+        totals = [total for total, _ in runs]
+        total = statistics.median(totals)
+        modules = runs[totals.index(total)][1] if total in totals else runs[0][1]
+
+        packages = {}
+        for module, cumulative in modules.items():
+            package = module.split('.')[0]
+            packages[package] = max(packages.get(package, 0), cumulative)
+        self.stdout.write(f"{'package':<32}{'cumulative ms':>14}")
+        for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"{package:<32}{cumulative:>14.1f}")
+
+        problems = []
+        eager = [module for module in LAZY_MODULES if module in modules]
+        if eager:
+            problems.append(f"imported at start-up instead of on first use: {', '.join(eager)}")
+        if total > options['budget_ms']:
+            problems.append(f"start-up imports took {total:.0f} ms, over the {options['budget_ms']:.0f} ms budget")
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f"Start-up imports took {total:.0f} ms (median of {len(totals)}), within the {options['budget_ms']:.0f} ms budget"
+        ))
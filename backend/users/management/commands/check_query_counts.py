@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from api.authentication import tokens_for_user
+from api.querylog import record_queries
+from users.models import BusinessProfile, SearchLog, SearchTerm
+from users.seeding import seed_search_data
+
+# Read endpoints and the query string they are requested with; the detail
+# endpoints get a search term or search log of the business (DETAIL_ARGS)
+ENDPOINTS = (
+    ('user_info', ''),
+    ('bootstrap', ''),
+    ('business_profile', ''),
+    ('onboarding_status', ''),
+    ('search_terms', ''),
+    ('search_term_detail', ''),
+    ('search_logs', ''),
+    ('search_logs', 'body=false'),
+    ('search_logs_export', 'file_format=csv'),
+    ('search_log_search', 'q=pricing'),
+    ('archived_search_logs', ''),
+    ('search_log_detail', ''),
+    ('analyses', ''),
+    ('search_analytics', ''),
+    ('search_timeseries', ''),
+    ('ai_models', ''),
+)
+DETAIL_ARGS = {'search_term_detail': 'term', 'search_log_detail': 'log'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every read endpoint for a small and a large seeded business and fail when the "
+        "number of queries grows with the number of rows (an N+1 query). The seed data is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=5, help="Search logs of the small business")
+        parser.add_argument('--large', type=int, default=50, help="Search logs of the large business")
+        parser.add_argument('--show-duplicates', action='store_true',
+                            help="Print the repeated query patterns of every endpoint, not only the failing ones")
+
+    def handle(self, *args, **options):
+        if options['large'] <= options['small']:
+            raise CommandError("--large has to be bigger than --small")
+
+        failures = []
+        with transaction.atomic():
+            small = self._seed(options['small'])
+            large = self._seed(options['large'])
+            client = Client()
+            self.stdout.write(f"{'endpoint':<44}{options['small']:>8} logs{options['large']:>8} logs")
+            for name, query_string in ENDPOINTS:
+                label = f"{name}?{query_string}" if query_string else name
+                small_log = self._request(client, small, name, query_string)
+                large_log = self._request(client, large, name, query_string)
+                scales = large_log.count > small_log.count
+                self.stdout.write(
+                    f"{label:<44}{small_log.count:>13}{large_log.count:>13}"
+                    + (self.style.ERROR('  grows with rows') if scales else '')
+                )
+                if scales:
+                    failures.append(f"{label}: {small_log.count} -> {large_log.count} queries")
+                if scales or options['show_duplicates']:
+                    for count, alias, sql in large_log.duplicates():
+                        self.stdout.write(f"    {count} x [{alias}] {sql}")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Query counts grow with the number of rows:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("No endpoint's query count grows with the number of rows"))
+
+    def _seed(self, logs):
+        business_id, = seed_search_data(businesses=1, logs_per_business=logs, terms_per_business=max(2, logs // 5),
+                                        ai_models=2, seed=logs)
+        profile = BusinessProfile.objects.select_related('user').get(id=business_id)
+        return {
+            'token': str(tokens_for_user(profile.user).access_token),
+            'term': SearchTerm.objects.filter(business_profile=profile).values_list('id', flat=True).first(),
+            'log': SearchLog.objects.filter(business_profile=profile).values_list('id', flat=True).first(),
+        }
+
+    def _request(self, client, business, name, query_string):
+        detail = DETAIL_ARGS.get(name)
+        url = reverse(name, args=[business[detail]] if detail else [])
+        with record_queries() as query_log:
+            response = client.get(f"{url}?{query_string}", HTTP_AUTHORIZATION=f"Bearer {business['token']}")
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f"{name} answered {response.status_code}: {response.content[:500]!r}")
+        return query_log
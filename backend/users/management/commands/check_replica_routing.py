@@ -0,0 +1,117 @@
+import re
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.test import Client
+from django.urls import reverse
+
+from api.authentication import tokens_for_user
+from api.querylog import record_queries
+from core.replicas import (
+    PRIMARY_ALIAS, REPLICA_ALIAS, clear_sticky, mark_sticky, replica_configured, use_replica,
+)
+from users.caching import invalidate
+from users.models import Analysis, BusinessProfile, ResourceVersion, SearchLog
+
+# Views wrapped in @replica_reads
+ENDPOINTS = ('search_logs', 'archived_search_logs', 'analyses', 'search_analytics', 'search_timeseries')
+PRIMARY_ONLY_TABLES = {ResourceVersion._meta.db_table}
+
+_TABLE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the read-replica routing against two databases: the replica-read endpoints read the app's "
+        "tables from the replica and ResourceVersion and the database cache from the primary, and a user "
+        "who has just written reads from the primary. Needs a replica alias, e.g. DB_REPLICA_NAME pointing "
+        "at a copy of db.sqlite3"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help="User to request as (default: the first with a business profile)")
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError(
+                f"No {REPLICA_ALIAS!r} database; set DB_REPLICA_NAME (development) or DATABASE_REPLICA_URL"
+            )
+
+        failures = self._check_router()
+
+        profiles = BusinessProfile.objects.select_related('user')
+        if options['email']:
+            profiles = profiles.filter(user__email=options['email'])
+        profile = profiles.first()
+        if profile is None:
+            raise CommandError("No user with a business profile to request as; run seed_scale or pass --email")
+        user = profile.user
+        client = Client()
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {tokens_for_user(user).access_token}"}
+
+        self.stdout.write(f"{'endpoint':<28}{PRIMARY_ALIAS:>10}{REPLICA_ALIAS:>10}")
+        clear_sticky(user)
+        try:
+            for name in ENDPOINTS:
+                failures += self._check_endpoint(client, headers, profile, name, expect_replica=True)
+            # Right after a write of their own the user has to read the primary
+            mark_sticky(user)
+            failures += self._check_endpoint(client, headers, profile, 'search_logs', expect_replica=False,
+                                             label='search_logs (sticky)')
+        finally:
+            clear_sticky(user)
+
+        if failures:
+            raise CommandError("Replica routing is wrong:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Reads are routed as intended"))
+
+    def _check_router(self):
+        failures = []
+        cache_model = DatabaseCache('django_cache', {}).cache_model_class
+        expected = [
+            ('SearchLog read outside @replica_reads', router.db_for_read(SearchLog), PRIMARY_ALIAS),
+        ]
+        with use_replica():
+            expected += [
+                ('SearchLog read', router.db_for_read(SearchLog), REPLICA_ALIAS),
+                ('Analysis read', router.db_for_read(Analysis), REPLICA_ALIAS),
+                ('ResourceVersion read', router.db_for_read(ResourceVersion), PRIMARY_ALIAS),
+                ('database cache read', router.db_for_read(cache_model), PRIMARY_ALIAS),
+                ('SearchLog write', router.db_for_write(SearchLog), PRIMARY_ALIAS),
+            ]
+        for label, alias, wanted in expected:
+            self.stdout.write(f"{label:<40}{alias:>10}")
+            if alias != wanted:
+                failures.append(f"{label} goes to {alias}, not {wanted}")
+        return failures
+
+    def _check_endpoint(self, client, headers, profile, name, expect_replica, label=None):
+        label = label or name
+        # Skip the read-through cache, so the view runs its queries
+        invalidate('search_logs', profile.id)
+        with record_queries() as query_log:
+            response = client.get(reverse(name), **headers)
+        if response.status_code != 200:
+            return [f"{label} answered {response.status_code}: {response.content[:300]!r}"]
+
+        queries = {PRIMARY_ALIAS: 0, REPLICA_ALIAS: 0}
+        replica_tables = set()
+        for (alias, sql), count in query_log.patterns.items():
+            queries[alias] = queries.get(alias, 0) + count
+            if alias == REPLICA_ALIAS:
+                replica_tables.update(_TABLE.findall(sql))
+        self.stdout.write(f"{label:<28}{queries[PRIMARY_ALIAS]:>10}{queries[REPLICA_ALIAS]:>10}")
+
+        failures = []
+        if expect_replica and not queries[REPLICA_ALIAS]:
+            failures.append(f"{label} ran no query on the replica")
+        if not expect_replica and queries[REPLICA_ALIAS]:
+            failures.append(f"{label} read the replica for a sticky user")
+        misrouted = {
+            table for table in replica_tables
+            if table in PRIMARY_ONLY_TABLES or not table.startswith('users_')
+        }
+        if misrouted:
+            failures.append(f"{label} read {', '.join(sorted(misrouted))} from the replica")
+        return failures
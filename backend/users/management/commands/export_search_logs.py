@@ -0,0 +1,63 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from users.exports import EXPORT_FORMATS, ExportFormatUnavailable, check_format_available, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a business's search logs and analysis results to a CSV, NDJSON, Parquet or Arrow file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('business_profile', type=int, help="Business profile id")
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="Output path, '-' for stdout")
+        parser.add_argument('--search-term', type=int)
+        parser.add_argument('--ai-model', type=int)
+        parser.add_argument('--since', help="ISO 8601 datetime, inclusive")
+        parser.add_argument('--until', help="ISO 8601 datetime, exclusive")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        export_format = options['export_format']
+        try:
+            check_format_available(export_format)
+        except ExportFormatUnavailable as e:
+            raise CommandError(str(e))
+
+        rows = export_rows(
+            options['business_profile'],
+            search_term_id=options['search_term'],
+            ai_model_id=options['ai_model'],
+            since=self._datetime(options, 'since'),
+            until=self._datetime(options, 'until'),
+            chunk_size=options['chunk_size'],
+        )
+        chunks = EXPORT_FORMATS[export_format][2](rows)
+
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+            self._write(output, chunks)
+            output.flush()
+        else:
+            with open(options['output'], 'wb') as output:
+                self._write(output, chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported search logs to {options['output']}"))
+
+    def _datetime(self, options, name):
+        if not options[name]:
+            return None
+        # parse_datetime returns None for text that isn't a datetime at all and
+        # raises ValueError for a well-formed but impossible one
+        try:
+            value = parse_datetime(options[name])
+        except ValueError:
+            value = None
+        if value is None:
+            raise CommandError(f"--{name} has to be an ISO 8601 datetime like 2025-01-31T00:00:00Z")
+        return value
+
+    def _write(self, output, chunks):
+        for chunk in chunks:
+            output.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
@@ -0,0 +1,156 @@
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+
+from api.authentication import tokens_for_user
+from users.fake_providers import FakeProviderServer
+from users.models import AIModel, SearchLog, SearchTerm
+
+PROFILES = ('sync', 'gthread', 'uvicorn')
+
+
+def _percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with each GUNICORN_PROFILE from gunicorn.conf.py and fire concurrent AI "
+        "searches at it, with OpenAI and OpenRouter replaced by a local fake that answers after --provider-delay"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(PROFILES), help="Comma separated profiles to compare")
+        parser.add_argument('--requests', type=int, default=200, help="AI searches per profile")
+        parser.add_argument('--concurrency', type=int, default=32, help="Searches in flight at once")
+        parser.add_argument('--provider-delay', type=float, default=0.5, help="Seconds each fake completion takes")
+        parser.add_argument('--workers', type=int, default=2, help="WEB_CONCURRENCY for every profile")
+        parser.add_argument('--threads', type=int, default=16, help="GUNICORN_THREADS for the gthread profile")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--keep', action='store_true', help="Keep the search logs the load test created")
+
+    def handle(self, *args, **options):
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = set(profiles) - set(PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profiles {sorted(unknown)}; choose from {', '.join(PROFILES)}")
+
+        search_term = SearchTerm.objects.select_related('business_profile__user').filter(is_active=True).first()
+        ai_model = AIModel.objects.filter(is_active=True).first()
+        if search_term is None or ai_model is None:
+            raise CommandError("Needs an active search term and AI model; run seed_scale first")
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                "SQLite serialises writes across workers; run against PostgreSQL for meaningful numbers"
+            ))
+
+        token = str(tokens_for_user(search_term.business_profile.user).access_token)
+        body = json.dumps({'search_term_id': search_term.id, 'ai_model_id': ai_model.id}).encode()
+        last_id = SearchLog.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+        providers = FakeProviderServer(delay=options['provider_delay']).start()
+        self.stdout.write(
+            f"{options['requests']} AI searches per profile, {options['concurrency']} concurrent, "
+            f"{options['provider_delay']} s per fake completion (2 per search), {options['workers']} workers\n"
+        )
+        self.stdout.write(f"{'profile':<10}{'threads':>8}{'ok':>6}{'errors':>8}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}")
+        try:
+            for profile in profiles:
+                self._run_profile(profile, options, providers, token, body)
+        finally:
+            providers.stop()
+            if not options['keep']:
+                SearchLog.objects.filter(business_profile=search_term.business_profile, id__gt=last_id).delete()
+
+    def _run_profile(self, profile, options, providers, token, body):
+        port = options['port']
+        env = dict(
+            os.environ,
+            GUNICORN_PROFILE=profile,
+            PORT=str(port),
+            WEB_CONCURRENCY=str(options['workers']),
+            GUNICORN_THREADS=str(options['threads']),
+            OPENAI_API_KEY='sk-loadtest',
+            OPENAI_BASE_URL=providers.base_url,
+            OPENROUTER_API_KEY='loadtest',
+            OPENROUTER_BASE_URL=providers.base_url,
+            THROTTLE_AI_SEARCH_USER='1000000/min',
+            THROTTLE_AI_SEARCH_BUSINESS='1000000/min',
+            THROTTLE_AI_SEARCH_IP='1000000/min',
+            AI_ADMISSION_MAX_IN_FLIGHT='100000',
+        )
+        log = tempfile.TemporaryFile()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            self._wait_until_ready(server, port, log)
+
+            def search(_):
+                request = urllib.request.Request(
+                    f'http://127.0.0.1:{port}/api/run-ai-search/', data=body, method='POST',
+                    headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'},
+                )
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=300) as response:
+                        response.read()
+                        status = response.status
+                except urllib.error.HTTPError as e:
+                    status = e.code
+                except OSError:
+                    status = None
+                return status, time.perf_counter() - started
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(search, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            log.close()
+
+        timings = [latency for status, latency in results if status == 201]
+        # uvicorn runs each request's sync code on a thread of its own
+        threads = {'gthread': options['threads'], 'sync': 1}.get(profile, '-')
+        if not timings:
+            self.stdout.write(f"{profile:<10}{threads:>8}{0:>6}{len(results):>8}   statuses {sorted({s for s, _ in results}, key=str)}")
+            return
+        self.stdout.write(
+            f"{profile:<10}{threads:>8}{len(timings):>6}{len(results) - len(timings):>8}"
+            f"{len(timings) / elapsed:>8.1f}{statistics.median(timings):>8.2f}{_percentile(timings, 0.95):>8.2f}"
+        )
+
+    def _wait_until_ready(self, server, port, log, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"gunicorn exited with {server.returncode}:\n{log.read().decode()[-3000:]}")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/', timeout=2):
+                    return
+            except urllib.error.HTTPError:
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer on port {port} within {timeout} s")
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from users.partitions import (
+    PARTITIONED_TABLES, add_months, default_partition_name, detach_partitions, ensure_partitions,
+    is_partitioned, list_partitions, month_start, supports_partitioning,
+)
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly search log partitions and detach old ones (PostgreSQL only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help="Create partitions up to this many months from now (default 3)")
+        parser.add_argument('--detach-older-than', type=int, metavar='MONTHS',
+                            help="Detach partitions that ended more than MONTHS whole months ago")
+        parser.add_argument('--drop', action='store_true', help="Drop detached partitions instead of keeping them as tables")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be detached")
+        parser.add_argument('--list', action='store_true', help="List the partitions and their sizes")
+
+    def handle(self, *args, **options):
+        if not supports_partitioning(connection):
+            self.stdout.write(f"{connection.vendor} does not partition search logs; nothing to do.")
+            return
+        missing = [table for table in PARTITIONED_TABLES if not is_partitioned(connection, table)]
+        if missing:
+            raise CommandError(f"Not partitioned: {', '.join(missing)}. Run migrate first.")
+
+        if not options['dry_run']:
+            try:
+                with transaction.atomic():
+                    created = ensure_partitions(connection, months_ahead=options['months_ahead'])
+            except DatabaseError as e:
+                raise CommandError(
+                    f"Could not create partitions ({e}). Rows for a new month may already be in a DEFAULT partition."
+                )
+            for name in created:
+                self.stdout.write(f"Created {name}")
+            self._check_default_partitions()
+
+        if options['detach_older_than'] is not None:
+            cutoff = add_months(month_start(timezone.now()), -options['detach_older_than'])
+            with transaction.atomic():
+                detached = detach_partitions(connection, cutoff, drop=options['drop'], dry_run=options['dry_run'])
+            verb = 'Would detach' if options['dry_run'] else ('Dropped' if options['drop'] else 'Detached')
+            for name in detached:
+                self.stdout.write(f"{verb} {name}")
+            if not detached:
+                self.stdout.write(f"No partitions end before {cutoff:%Y-%m-%d}")
+
+        if options['list']:
+            self._list()
+
+    def _check_default_partitions(self):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                cursor.execute(f"SELECT count(*) FROM {qn(default_partition_name(table))}")
+                rows = cursor.fetchone()[0]
+                if rows:
+                    self.stdout.write(self.style.WARNING(
+                        f"{default_partition_name(table)} holds {rows} rows outside every monthly partition"
+                    ))
+
+    def _list(self):
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                self.stdout.write(self.style.MIGRATE_HEADING(table))
+                for name, start, end in list_partitions(connection, table):
+                    cursor.execute(
+                        "SELECT reltuples::bigint, pg_size_pretty(pg_total_relation_size(oid)) FROM pg_class WHERE oid = to_regclass(%s)",
+                        [name],
+                    )
+                    estimated_rows, size = cursor.fetchone()
+                    span = f"{start:%Y-%m-%d} .. {end:%Y-%m-%d}" if start else "DEFAULT"
+                    self.stdout.write(f"  {name:<36}{span:<26}{max(estimated_rows, 0):>12,} rows{size:>12}")
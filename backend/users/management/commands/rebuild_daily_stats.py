@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.rollups import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailySearchStats rollup from search logs and their analyses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-profile', type=int, help="Only rebuild rows for this business profile id")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_stats(
+            business_profile_id=options['business_profile'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} daily stats rows"))
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from users.models import Analysis
+from users.seeding import parse_weights, seed_scale
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate realistic users, businesses, search terms, AI models, search logs and analyses at "
+        "production scale, reproducibly from --seed; loads with COPY on PostgreSQL and bulk_create elsewhere"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=100)
+        parser.add_argument('--logs', type=int, default=1_000_000, help="Search logs in total, each with an analysis")
+        parser.add_argument('--terms', type=int, default=25, help="Search terms per business")
+        parser.add_argument('--ai-models', type=int, default=8)
+        parser.add_argument('--days', type=int, default=365, help="How far back the search logs go")
+        parser.add_argument('--end', help="Date (YYYY-MM-DD) of the newest search logs; default now")
+        parser.add_argument('--tenant-skew', type=float, default=1.0,
+                            help="Zipf exponent of search logs per business; 0 gives every business the same")
+        parser.add_argument('--model-skew', type=float, default=0.8, help="Zipf exponent of AI model popularity")
+        parser.add_argument('--recency', type=float, default=1.5,
+                            help="Above 1 crowds the search logs into recent days; 1 spreads them evenly")
+        parser.add_argument('--mention-rate', type=float, default=0.35, help="Share of responses naming the business")
+        parser.add_argument('--sentiments', default='positive=50,neutral=30,negative=15,mixed=5',
+                            help="Relative weights of the sentiments of mentions")
+        parser.add_argument('--response-words', type=int, default=180, help="Mean response length in words")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', help="Prefix of the generated user and AI model names (default: scale<seed>)")
+        parser.add_argument('--method', choices=('auto', 'copy', 'bulk'), default='auto',
+                            help="COPY (PostgreSQL only) or bulk_create; auto uses COPY where available")
+
+    def handle(self, *args, **options):
+        try:
+            sentiments = parse_weights(options['sentiments'], [choice for choice, _ in Analysis.SENTIMENT_CHOICES])
+        except ValueError as e:
+            raise CommandError(f"--sentiments: {e}")
+        end = None
+        if options['end']:
+            try:
+                end = datetime.combine(datetime.strptime(options['end'], '%Y-%m-%d').date(), dt_time.max,
+                                       tzinfo=dt_timezone.utc).replace(microsecond=0)
+            except ValueError:
+                raise CommandError("--end has to be a date like 2025-12-31")
+        if options['businesses'] < 1 or options['logs'] < 0:
+            raise CommandError("Needs at least one business and a non-negative number of search logs")
+
+        started = time.perf_counter()
+        try:
+            business_ids = seed_scale(
+                businesses=options['businesses'], logs=options['logs'], terms_per_business=options['terms'],
+                ai_models=options['ai_models'], days=options['days'], tenant_skew=options['tenant_skew'],
+                model_skew=options['model_skew'], recency=options['recency'], mention_rate=options['mention_rate'],
+                sentiments=sentiments, response_words=options['response_words'], batch_size=options['batch_size'],
+                seed=options['seed'], prefix=options['prefix'], end=end, method=options['method'],
+                log=lambda message: self.stderr.write(message),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(business_ids)} businesses and {options['logs']:,} search logs in {elapsed:.1f}s "
+            f"({options['logs'] / max(elapsed, 1e-6):,.0f} search logs/s) on {connection.vendor}"
+        ))
@@ -0,0 +1,78 @@
+"""
+Prometheus metrics for the AI search pipeline, exported at ``/metrics``.
+
+The metrics live in prometheus_client's default registry. Under gunicorn every
+worker has its own copy, so ``gunicorn.conf.py`` points
+``PROMETHEUS_MULTIPROC_DIR`` at a shared directory before anything imports
+prometheus_client; each worker then writes its values to memory-mapped files
+there and ``render_metrics()`` adds up the files of all workers, whichever
+worker serves the scrape. Without the variable (runserver, management
+commands) the in-process registry is exported directly.
+
+Latency histograms are per AI model name and per analysis model, which keeps
+label cardinality at the number of configured models. Set METRICS_TOKEN to
+require ``Authorization: Bearer <token>`` on scrapes.
+"""
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+
+# AI answers take seconds to a minute; analysis calls are shorter
+PROVIDER_BUCKETS = (0.5, 1, 2.5, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120)
+ANALYSIS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 20, 30)
+
+PROVIDER_LATENCY = Histogram(
+    'ai_provider_request_seconds', "Time taken by AI model calls", ['model'], buckets=PROVIDER_BUCKETS,
+)
+PROVIDER_ERRORS = Counter('ai_provider_errors_total', "AI model calls that raised", ['model'])
+TOKENS_USED = Counter('ai_tokens_total', "Tokens reported by AI model calls", ['model'])
+ESTIMATED_COST = Counter(
+    'ai_estimated_cost_usd_total', "Estimated cost of AI model calls in USD, from the model's prices", ['model'],
+)
+ANALYSIS_LATENCY = Histogram(
+    'ai_analysis_request_seconds', "Time taken by analysis model calls", ['model'], buckets=ANALYSIS_BUCKETS,
+)
+ANALYSES = Counter(
+    'ai_analyses_total', "Analyses of AI responses by outcome (model or fallback)", ['model', 'outcome'],
+)
+AI_SEARCHES_IN_FLIGHT = Gauge(
+    'ai_searches_in_flight', "AI searches holding an admission slot", multiprocess_mode='livesum',
+)
+AI_SEARCHES_REJECTED = Counter(
+    'ai_searches_rejected_total', "AI searches turned away with a 503 because no admission slot was free",
+)
+READ_CACHE_LOOKUPS = Counter(
+    'read_cache_lookups_total', "Read-through cache lookups by cached read and outcome", ['read', 'outcome'],
+)
+CLAIMS_USER_FALLBACKS = Counter(
+    'jwt_claims_user_fallbacks_total',
+    "Attributes of a stateless-JWT request user that were not in the token and were read from the user table",
+    ['attribute'],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', "Requests being served", multiprocess_mode='livesum',
+)
+
+
+def render_metrics():
+    """``(body, content type)`` of the text exposition of every worker's metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Count the requests being served in ``http_requests_in_flight``"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with HTTP_REQUESTS_IN_FLIGHT.track_inprogress():
+            return self.get_response(request)
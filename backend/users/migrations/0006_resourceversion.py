@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_remove_searchlog_business_mentioned_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('business_profile', 'Business profile'), ('search_terms', 'Search terms'), ('ai_models', 'AI models'), ('search_logs', 'Search logs')], max_length=50)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business_profile', models.ForeignKey(blank=True, help_text='Owning business, empty for global resources such as AI models', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resource_versions', to='users.businessprofile')),
+            ],
+            options={
+                'unique_together': {('business_profile', 'resource')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_resourceversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySearchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('searches', models.PositiveIntegerField(default=0)),
+                ('mentions', models.PositiveIntegerField(default=0, help_text='Searches where the business was mentioned')),
+                ('positive_mentions', models.PositiveIntegerField(default=0)),
+                ('neutral_mentions', models.PositiveIntegerField(default=0)),
+                ('negative_mentions', models.PositiveIntegerField(default=0)),
+                ('mixed_mentions', models.PositiveIntegerField(default=0)),
+                ('tokens_used', models.BigIntegerField(default=0)),
+                ('estimated_cost_usd', models.DecimalField(decimal_places=6, default=0, help_text='Tokens used priced at the average of the logged input and output prices', max_digits=14)),
+                ('response_time_ms_sum', models.BigIntegerField(default=0)),
+                ('analysis_duration_ms_sum', models.BigIntegerField(default=0)),
+                ('ai_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='users.aimodel')),
+                ('business_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='users.businessprofile')),
+                ('search_term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='users.searchterm')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily search stats',
+                'ordering': ['-day'],
+                'unique_together': {('business_profile', 'search_term', 'ai_model', 'day')},
+            },
+        ),
+    ]
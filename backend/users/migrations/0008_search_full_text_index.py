@@ -0,0 +1,94 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE users_searchlog ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(response, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(query, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX users_searchlog_search_vector_gin ON users_searchlog USING GIN (search_vector)",
+    """
+    ALTER TABLE users_analysis ADD COLUMN mention_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(mention_context, ''))) STORED
+    """,
+    "CREATE INDEX users_analysis_mention_vector_gin ON users_analysis USING GIN (mention_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "ALTER TABLE users_analysis DROP COLUMN IF EXISTS mention_vector",
+    "ALTER TABLE users_searchlog DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE users_searchlog_fts USING fts5(query, response, mention_context)",
+    """
+    CREATE TRIGGER users_searchlog_fts_insert AFTER INSERT ON users_searchlog BEGIN
+        INSERT INTO users_searchlog_fts (rowid, query, response, mention_context)
+        VALUES (new.id, new.query, new.response, '');
+    END
+    """,
+    """
+    CREATE TRIGGER users_searchlog_fts_update AFTER UPDATE OF query, response ON users_searchlog BEGIN
+        UPDATE users_searchlog_fts SET query = new.query, response = new.response WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER users_searchlog_fts_delete AFTER DELETE ON users_searchlog BEGIN
+        DELETE FROM users_searchlog_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER users_analysis_fts_insert AFTER INSERT ON users_analysis BEGIN
+        UPDATE users_searchlog_fts SET mention_context = new.mention_context WHERE rowid = new.search_log_id;
+    END
+    """,
+    """
+    CREATE TRIGGER users_analysis_fts_update AFTER UPDATE OF mention_context ON users_analysis BEGIN
+        UPDATE users_searchlog_fts SET mention_context = new.mention_context WHERE rowid = new.search_log_id;
+    END
+    """,
+    """
+    CREATE TRIGGER users_analysis_fts_delete AFTER DELETE ON users_analysis BEGIN
+        UPDATE users_searchlog_fts SET mention_context = '' WHERE rowid = old.search_log_id;
+    END
+    """,
+    """
+    INSERT INTO users_searchlog_fts (rowid, query, response, mention_context)
+    SELECT sl.id, sl.query, sl.response, coalesce(a.mention_context, '')
+    FROM users_searchlog sl LEFT JOIN users_analysis a ON a.search_log_id = sl.id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS users_analysis_fts_delete",
+    "DROP TRIGGER IF EXISTS users_analysis_fts_update",
+    "DROP TRIGGER IF EXISTS users_analysis_fts_insert",
+    "DROP TRIGGER IF EXISTS users_searchlog_fts_delete",
+    "DROP TRIGGER IF EXISTS users_searchlog_fts_update",
+    "DROP TRIGGER IF EXISTS users_searchlog_fts_insert",
+    "DROP TABLE IF EXISTS users_searchlog_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_dailysearchstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
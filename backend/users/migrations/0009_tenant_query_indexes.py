@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_search_full_text_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['business_profile', '-analysis_timestamp'], name='analysis_bp_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['business_profile', 'business_mentioned', 'sentiment'], name='analysis_bp_mention_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(condition=models.Q(('business_mentioned', True)), fields=['business_profile', 'sentiment'], name='analysis_bp_mentioned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['-analysis_timestamp'], name='analysis_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['business_profile', '-search_timestamp'], name='searchlog_bp_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['business_profile', 'search_term', 'ai_model', '-search_timestamp'], name='searchlog_bp_term_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['business_profile', 'ai_model', '-search_timestamp'], name='searchlog_bp_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['-search_timestamp'], name='searchlog_time_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+from users.partitions import PARTITIONED_TABLES, drop_foreign_keys_to, rebuild_table, supports_partitioning
+
+# Recreated when partitioning is undone
+ANALYSIS_SEARCH_LOG_FK = """
+    ALTER TABLE users_analysis ADD CONSTRAINT users_analysis_search_log_id_fk_users_searchlog_id
+    FOREIGN KEY (search_log_id) REFERENCES users_searchlog (id) DEFERRABLE INITIALLY DEFERRED
+"""
+
+
+def partition_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if not supports_partitioning(connection):
+        return
+    for table in PARTITIONED_TABLES:
+        drop_foreign_keys_to(connection, table)
+    for table in PARTITIONED_TABLES:
+        rebuild_table(connection, table, partitioned=True)
+
+
+def unpartition_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if not supports_partitioning(connection):
+        return
+    for table in PARTITIONED_TABLES:
+        rebuild_table(connection, table, partitioned=False)
+    schema_editor.execute(ANALYSIS_SEARCH_LOG_FK)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_tenant_query_indexes'),
+    ]
+
+    operations = [
+        # The constraint itself is dropped by partition_tables on PostgreSQL only;
+        # altering the column on SQLite would rebuild the table and lose the FTS triggers.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='analysis',
+                    name='search_log',
+                    field=models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='analysis',
+                        to='users.searchlog',
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_partition_search_logs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the search logs are from')),
+                ('file', models.CharField(help_text='Name of the file in the archive storage', max_length=500)),
+                ('format', models.CharField(help_text='File format, e.g. jsonl.gz or jsonl.zst', max_length=20)),
+                ('row_count', models.PositiveIntegerField()),
+                ('size_bytes', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_log_archives', to='users.businessprofile')),
+            ],
+            options={
+                'ordering': ['-month', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archive_after_days', models.PositiveIntegerField(default=90, help_text='Search logs older than this many days are moved to archive files')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether old search logs are archived at all')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business_profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to='users.businessprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Retention policies',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSearchLog',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id of the original search log', primary_key=True, serialize=False)),
+                ('search_timestamp', models.DateTimeField()),
+                ('response_time_ms', models.IntegerField(blank=True, null=True)),
+                ('tokens_used', models.IntegerField(blank=True, null=True)),
+                ('current_cost_input_usd', models.DecimalField(blank=True, decimal_places=6, max_digits=10, null=True)),
+                ('current_cost_output_usd', models.DecimalField(blank=True, decimal_places=6, max_digits=10, null=True)),
+                ('business_mentioned', models.BooleanField(blank=True, null=True)),
+                ('sentiment', models.CharField(blank=True, max_length=20)),
+                ('analysis_duration_ms', models.IntegerField(blank=True, null=True)),
+                ('ai_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_search_logs', to='users.aimodel')),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_logs', to='users.searchlogarchive')),
+                ('business_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_search_logs', to='users.businessprofile')),
+                ('search_term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_search_logs', to='users.searchterm')),
+            ],
+            options={
+                'ordering': ['-search_timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchlogarchive',
+            index=models.Index(fields=['business_profile', '-month'], name='archive_bp_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsearchlog',
+            index=models.Index(fields=['business_profile', '-search_timestamp'], name='archivedlog_bp_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_search_log_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchlog',
+            name='timings',
+            field=models.JSONField(blank=True, help_text='Milliseconds spent in each stage of the request that created it (auth, lookup, provider, ...)', null=True),
+        ),
+    ]
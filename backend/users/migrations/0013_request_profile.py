@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_search_log_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.CharField(max_length=32, unique=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('trigger', models.CharField(choices=[('header', 'Header'), ('sample', 'Sampled')], max_length=10)),
+                ('duration_ms', models.IntegerField()),
+                ('sample_interval_ms', models.FloatField(help_text='Milliseconds between CPU stack samples')),
+                ('cpu_samples', models.PositiveIntegerField()),
+                ('folded_stacks', models.TextField(blank=True, help_text="Sampled stacks in the collapsed format of flamegraph.pl, speedscope and inferno, one 'frame;frame count' per line")),
+                ('top_allocations', models.JSONField(default=list, help_text='Source lines that allocated the most memory still held at the end of the request')),
+                ('memory_peak_bytes', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
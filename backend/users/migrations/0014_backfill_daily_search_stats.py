@@ -0,0 +1,82 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+SENTIMENT_COUNTERS = {
+    'positive': 'positive_mentions',
+    'neutral': 'neutral_mentions',
+    'negative': 'negative_mentions',
+    'mixed': 'mixed_mentions',
+}
+
+
+def _estimated_cost_usd(tokens_used, cost_input_usd, cost_output_usd):
+    # Same pricing as users.rollups.estimated_cost_usd
+    prices = [price for price in (cost_input_usd, cost_output_usd) if price is not None]
+    if not tokens_used or not prices:
+        return Decimal('0')
+    price = sum(prices, Decimal('0')) / len(prices)
+    return (Decimal(tokens_used) * price / Decimal(1_000_000)).quantize(Decimal('0.000001'))
+
+
+def backfill_daily_search_stats(apps, schema_editor):
+    """
+    Build the rollup for the search history that predates it, so the search
+    analytics (which only read DailySearchStats) keep showing it. Same result
+    as ``manage.py rebuild_daily_stats``.
+    """
+    SearchLog = apps.get_model('users', 'SearchLog')
+    ArchivedSearchLog = apps.get_model('users', 'ArchivedSearchLog')
+    DailySearchStats = apps.get_model('users', 'DailySearchStats')
+    db_alias = schema_editor.connection.alias
+
+    totals = defaultdict(lambda: defaultdict(int))
+
+    def add(row, business_mentioned, sentiment, analysis_duration_ms):
+        key = (row['business_profile_id'], row['search_term_id'], row['ai_model_id'],
+               timezone.localdate(row['search_timestamp']))
+        counters = totals[key]
+        counters['searches'] += 1
+        counters['tokens_used'] += row['tokens_used'] or 0
+        counters['estimated_cost_usd'] += _estimated_cost_usd(
+            row['tokens_used'], row['current_cost_input_usd'], row['current_cost_output_usd']
+        )
+        counters['response_time_ms_sum'] += row['response_time_ms'] or 0
+        counters['analysis_duration_ms_sum'] += analysis_duration_ms or 0
+        if business_mentioned:
+            counters['mentions'] += 1
+            if sentiment in SENTIMENT_COUNTERS:
+                counters[SENTIMENT_COUNTERS[sentiment]] += 1
+
+    columns = ('business_profile_id', 'search_term_id', 'ai_model_id', 'search_timestamp', 'tokens_used',
+               'response_time_ms', 'current_cost_input_usd', 'current_cost_output_usd')
+    search_logs = SearchLog.objects.using(db_alias).filter(analysis__isnull=False).values(
+        *columns, 'analysis__business_mentioned', 'analysis__sentiment', 'analysis__analysis_duration_ms',
+    ).order_by()
+    for row in search_logs.iterator(chunk_size=2000):
+        add(row, row['analysis__business_mentioned'], row['analysis__sentiment'], row['analysis__analysis_duration_ms'])
+    archived_search_logs = ArchivedSearchLog.objects.using(db_alias).filter(business_mentioned__isnull=False).values(
+        *columns, 'business_mentioned', 'sentiment', 'analysis_duration_ms',
+    ).order_by()
+    for row in archived_search_logs.iterator(chunk_size=2000):
+        add(row, row['business_mentioned'], row['sentiment'], row['analysis_duration_ms'])
+
+    DailySearchStats.objects.using(db_alias).all().delete()
+    DailySearchStats.objects.using(db_alias).bulk_create([
+        DailySearchStats(business_profile_id=business_profile_id, search_term_id=search_term_id,
+                         ai_model_id=ai_model_id, day=day, **counters)
+        for (business_profile_id, search_term_id, ai_model_id, day), counters in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_request_profile'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_search_stats, migrations.RunPython.noop),
+    ]
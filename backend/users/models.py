@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class CustomUser(AbstractUser):
@@ -162,9 +163,25 @@ class SearchLog(models.Model):
     # Additional context
     user_agent = models.CharField(max_length=500, blank=True, help_text="User agent of the request")
     ip_address = models.GenericIPAddressField(null=True, blank=True, help_text="IP address of the request")
+    timings = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Milliseconds spent in each stage of the request that created it (auth, lookup, provider, ...)"
+    )
     
     class Meta:
         ordering = ['-search_timestamp']
+        # Every API read is scoped to one business and ordered or bounded by time
+        indexes = [
+            models.Index(fields=['business_profile', '-search_timestamp'], name='searchlog_bp_time_idx'),
+            models.Index(
+                fields=['business_profile', 'search_term', 'ai_model', '-search_timestamp'],
+                name='searchlog_bp_term_model_idx',
+            ),
+            models.Index(fields=['business_profile', 'ai_model', '-search_timestamp'], name='searchlog_bp_model_idx'),
+            # Admin changelist, across businesses
+            models.Index(fields=['-search_timestamp'], name='searchlog_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.search_term.term} - {self.ai_model.name} - {self.search_timestamp.strftime('%Y-%m-%d %H:%M')}"
@@ -180,7 +197,8 @@ class Analysis(models.Model):
     ]
     
     business_profile = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='analyses')
-    search_log = models.OneToOneField(SearchLog, on_delete=models.CASCADE, related_name='analysis')
+    # No database constraint: on PostgreSQL users_searchlog is partitioned (see users.partitions)
+    search_log = models.OneToOneField(SearchLog, on_delete=models.CASCADE, related_name='analysis', db_constraint=False)
     
     # Analysis results
     business_mentioned = models.BooleanField(default=False, help_text="Whether the business was mentioned in the response")
@@ -199,6 +217,17 @@ class Analysis(models.Model):
     class Meta:
         ordering = ['-analysis_timestamp']
         verbose_name_plural = "Analyses"
+        indexes = [
+            models.Index(fields=['business_profile', '-analysis_timestamp'], name='analysis_bp_time_idx'),
+            models.Index(fields=['business_profile', 'business_mentioned', 'sentiment'], name='analysis_bp_mention_idx'),
+            # Mentions are the minority of rows and the only ones with a meaningful sentiment
+            models.Index(
+                fields=['business_profile', 'sentiment'],
+                condition=models.Q(business_mentioned=True),
+                name='analysis_bp_mentioned_idx',
+            ),
+            models.Index(fields=['-analysis_timestamp'], name='analysis_time_idx'),
+        ]
     
     def __str__(self):
         return f"Analysis for {self.search_log.search_term.term} - {self.analysis_timestamp.strftime('%Y-%m-%d %H:%M')}"
@@ -214,3 +243,178 @@ class Analysis(models.Model):
         }
         return colors.get(self.sentiment, 'text-gray-600')
 
+
+class ResourceVersion(models.Model):
+    """Version counter per business (or global) resource, used to build cheap ETags"""
+    RESOURCE_CHOICES = [
+        ('business_profile', 'Business profile'),
+        ('search_terms', 'Search terms'),
+        ('ai_models', 'AI models'),
+        ('search_logs', 'Search logs'),
+    ]
+    
+    business_profile = models.ForeignKey(
+        BusinessProfile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resource_versions',
+        help_text="Owning business, empty for global resources such as AI models"
+    )
+    resource = models.CharField(max_length=50, choices=RESOURCE_CHOICES)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['business_profile', 'resource']
+    
+    def __str__(self):
+        owner = self.business_profile_id or 'global'
+        return f"{self.resource} ({owner}) v{self.version}"
+    
+    @classmethod
+    def bump(cls, resource, business_profile_id=None):
+        """Increment the version of a resource, creating the counter on first use"""
+        counters = cls.objects.filter(business_profile_id=business_profile_id, resource=resource)
+        if not counters.update(version=models.F('version') + 1, updated_at=timezone.now()):
+            _, created = cls.objects.get_or_create(
+                business_profile_id=business_profile_id, resource=resource, defaults={'version': 1}
+            )
+            if not created:
+                # Lost a race with another writer creating the counter
+                counters.update(version=models.F('version') + 1, updated_at=timezone.now())
+
+
+class DailySearchStats(models.Model):
+    """Daily rollup of search and analysis results, maintained as each Analysis is written"""
+    business_profile = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='daily_stats')
+    search_term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='daily_stats')
+    ai_model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    
+    # Counts
+    searches = models.PositiveIntegerField(default=0)
+    mentions = models.PositiveIntegerField(default=0, help_text="Searches where the business was mentioned")
+    positive_mentions = models.PositiveIntegerField(default=0)
+    neutral_mentions = models.PositiveIntegerField(default=0)
+    negative_mentions = models.PositiveIntegerField(default=0)
+    mixed_mentions = models.PositiveIntegerField(default=0)
+    
+    # Sums, divide by searches for averages
+    tokens_used = models.BigIntegerField(default=0)
+    estimated_cost_usd = models.DecimalField(
+        max_digits=14,
+        decimal_places=6,
+        default=0,
+        help_text="Tokens used priced at the average of the logged input and output prices"
+    )
+    response_time_ms_sum = models.BigIntegerField(default=0)
+    analysis_duration_ms_sum = models.BigIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['business_profile', 'search_term', 'ai_model', 'day']
+        ordering = ['-day']
+        verbose_name_plural = "Daily search stats"
+    
+    def __str__(self):
+        return f"{self.business_profile_id} - {self.search_term_id} - {self.ai_model_id} - {self.day}"
+
+
+class RetentionPolicy(models.Model):
+    """How long a business keeps full search log detail in the database before it is archived"""
+    business_profile = models.OneToOneField(BusinessProfile, on_delete=models.CASCADE, related_name='retention_policy')
+    archive_after_days = models.PositiveIntegerField(
+        default=90,
+        help_text="Search logs older than this many days are moved to archive files"
+    )
+    is_active = models.BooleanField(default=True, help_text="Whether old search logs are archived at all")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Retention policies"
+    
+    def __str__(self):
+        return f"{self.business_profile.business_name} - {self.archive_after_days} days"
+
+
+class SearchLogArchive(models.Model):
+    """A compressed file of archived search logs and their analyses, for one business and month"""
+    business_profile = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='search_log_archives')
+    month = models.DateField(help_text="First day of the month the search logs are from")
+    file = models.CharField(max_length=500, help_text="Name of the file in the archive storage")
+    format = models.CharField(max_length=20, help_text="File format, e.g. jsonl.gz or jsonl.zst")
+    row_count = models.PositiveIntegerField()
+    size_bytes = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-month', '-created_at']
+        indexes = [
+            models.Index(fields=['business_profile', '-month'], name='archive_bp_month_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.business_profile_id} - {self.month:%Y-%m} - {self.row_count} search logs"
+
+
+class ArchivedSearchLog(models.Model):
+    """
+    What stays in the database for an archived SearchLog: enough to list it,
+    rebuild the daily rollup and find its detail in the archive file, but no text.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text="Id of the original search log")
+    archive = models.ForeignKey(SearchLogArchive, on_delete=models.CASCADE, related_name='search_logs')
+    business_profile = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name='archived_search_logs')
+    search_term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='archived_search_logs')
+    ai_model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='archived_search_logs')
+    search_timestamp = models.DateTimeField()
+    response_time_ms = models.IntegerField(null=True, blank=True)
+    tokens_used = models.IntegerField(null=True, blank=True)
+    current_cost_input_usd = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+    current_cost_output_usd = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+    
+    # From the analysis; business_mentioned is empty when the search log had none
+    business_mentioned = models.BooleanField(null=True, blank=True)
+    sentiment = models.CharField(max_length=20, blank=True)
+    analysis_duration_ms = models.IntegerField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-search_timestamp']
+        indexes = [
+            models.Index(fields=['business_profile', '-search_timestamp'], name='archivedlog_bp_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived search log {self.id} - {self.search_timestamp:%Y-%m-%d %H:%M}"
+
+
+class RequestProfile(models.Model):
+    """CPU and memory profile of one request, recorded by users.profiling.ProfilingMiddleware"""
+    TRIGGER_CHOICES = [
+        ('header', 'Header'),
+        ('sample', 'Sampled'),
+    ]
+    
+    request_id = models.CharField(max_length=32, unique=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles')
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    duration_ms = models.IntegerField()
+    sample_interval_ms = models.FloatField(help_text="Milliseconds between CPU stack samples")
+    cpu_samples = models.PositiveIntegerField()
+    folded_stacks = models.TextField(
+        blank=True,
+        help_text="Sampled stacks in the collapsed format of flamegraph.pl, speedscope and inferno, one 'frame;frame count' per line"
+    )
+    top_allocations = models.JSONField(default=list, help_text="Source lines that allocated the most memory still held at the end of the request")
+    memory_peak_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} - {self.duration_ms} ms - {self.request_id}"
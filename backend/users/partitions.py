@@ -0,0 +1,269 @@
+"""
+Monthly range partitioning of the search log tables on PostgreSQL.
+
+``users_searchlog`` is partitioned by ``search_timestamp`` and
+``users_analysis`` by ``analysis_timestamp``, one partition per calendar month
+(UTC) plus a DEFAULT partition that catches rows outside every month created so
+far. Queries bounded by time only touch the matching months, and old months can
+be detached (and archived or dropped) without a bulk DELETE.
+
+PostgreSQL requires the partition key in every unique index, so the primary
+keys become ``(id, <timestamp>)``, the one-to-one ``Analysis.search_log`` is
+unique per ``(search_log_id, analysis_timestamp)``, and nothing can hold a
+foreign key to a partitioned table (``Analysis.search_log`` has
+``db_constraint=False``). ids still come from one sequence per table, so they
+stay unique.
+
+Everything here is a no-op on other databases; SQLite keeps plain tables.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils.dateparse import parse_datetime
+
+PARTITIONED_TABLES = {
+    'users_searchlog': 'search_timestamp',
+    'users_analysis': 'analysis_timestamp',
+}
+# Scratch schema the plain tables are moved into while they are rebuilt
+STAGING_SCHEMA = 'users_partitioning'
+
+_RANGE_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def supports_partitioning(connection):
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cursor.fetchone() is not None
+
+
+def month_start(value):
+    """First instant of the UTC month containing ``value``"""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def list_partitions(connection, table):
+    """Attached partitions of ``table`` as ``(name, start, end)``, oldest first; the DEFAULT one has no bounds"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _RANGE_BOUND.search(bound)
+        if match:
+            partitions.append((name, parse_datetime(match.group(1)), parse_datetime(match.group(2))))
+        else:
+            partitions.append((name, None, None))
+    return sorted(partitions, key=lambda partition: partition[1] or datetime.max.replace(tzinfo=dt_timezone.utc))
+
+
+def create_month_partition(connection, table, month):
+    """Create the partition of ``table`` for ``month`` unless it exists; returns whether it was created"""
+    name = partition_name(table, month)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        # Fails if the DEFAULT partition already holds rows for this month
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)],
+        )
+    return True
+
+
+def ensure_partitions(connection, months_ahead=3, since=None, now=None):
+    """
+    Create the monthly partitions from ``since`` (default: this month) up to
+    ``months_ahead`` months from now, for every partitioned table.
+
+    Returns the names of the partitions created.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    first = month_start(since or now)
+    last = add_months(month_start(now), months_ahead)
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        month = first
+        while month <= last:
+            if create_month_partition(connection, table, month):
+                created.append(partition_name(table, month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(connection, before, drop=False, dry_run=False):
+    """
+    Detach every monthly partition that ends on or before ``before``.
+
+    Detached partitions become ordinary tables with the same name, ready to be
+    archived; ``drop`` removes them instead. DETACH ... CONCURRENTLY is not an
+    option while the DEFAULT partition exists, so each detach briefly locks the
+    parent table.
+
+    Returns the names of the partitions detached.
+    """
+    qn = connection.ops.quote_name
+    detached = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        for name, start, end in list_partitions(connection, table):
+            if end is None or end > before:
+                continue
+            detached.append(name)
+            if dry_run:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+    return detached
+
+
+def _table_layout(cursor, table):
+    """Columns, indexes and outgoing foreign keys of ``table``, enough to rebuild it"""
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+        """,
+        [table],
+    )
+    columns = [row[0] for row in cursor.fetchall()]
+
+    # Partitioned parents report their indexes like plain tables do
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid), x.indisprimary, x.indisunique,
+               ARRAY(SELECT a.attname FROM unnest(x.indkey) WITH ORDINALITY k(attnum, n)
+                     JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+                     ORDER BY k.n)
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(%s)
+        """,
+        [table],
+    )
+    indexes = cursor.fetchall()
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    return columns, indexes, foreign_keys
+
+
+def rebuild_table(connection, table, partitioned, months_ahead=3):
+    """
+    Copy ``table`` into a new partitioned (or, to undo, plain) table of the same name.
+
+    The old table is moved to a scratch schema so index and sequence names are
+    free, then dropped once its rows are copied. Foreign keys *to* the table
+    must be dropped beforehand (see ``drop_foreign_keys_to``). This rewrites the
+    whole table under an exclusive lock, so run it in a maintenance window.
+    """
+    column = PARTITIONED_TABLES[table]
+    qn = connection.ops.quote_name
+    staged = f'{qn(STAGING_SCHEMA)}.{qn(table)}'
+
+    with connection.cursor() as cursor:
+        columns, indexes, foreign_keys = _table_layout(cursor, table)
+
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {qn(STAGING_SCHEMA)}")
+        cursor.execute(f"ALTER TABLE {qn(table)} SET SCHEMA {qn(STAGING_SCHEMA)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {staged} INCLUDING DEFAULTS INCLUDING GENERATED "
+            f"INCLUDING IDENTITY INCLUDING STORAGE INCLUDING COMMENTS)"
+            + (f" PARTITION BY RANGE ({qn(column)})" if partitioned else "")
+        )
+
+        for name, definition, primary, unique, index_columns in indexes:
+            if unique:
+                # Add the partition key to unique indexes, or take it back out
+                if partitioned and column not in index_columns:
+                    index_columns = index_columns + [column]
+                elif not partitioned and len(index_columns) > 1 and index_columns[-1] == column:
+                    index_columns = index_columns[:-1]
+                column_list = ', '.join(qn(name_) for name_ in index_columns)
+                if primary:
+                    cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} PRIMARY KEY ({column_list})")
+                else:
+                    cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} UNIQUE ({column_list})")
+            else:
+                # Indexes read off a partitioned parent say "ON ONLY"
+                cursor.execute(definition.replace(' ON ONLY ', ' ON ', 1))
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+
+        if partitioned:
+            cursor.execute(f"SELECT min({qn(column)}) FROM {staged}")
+            oldest = cursor.fetchone()[0]
+            cursor.execute(
+                f"CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT"
+            )
+
+        column_list = ', '.join(qn(name) for name in columns)
+        if partitioned:
+            # Partitions must exist before the rows are routed into them
+            now = datetime.now(dt_timezone.utc)
+            month = month_start(oldest or now)
+            while month <= add_months(month_start(now), months_ahead):
+                create_month_partition(connection, table, month)
+                month = add_months(month, 1)
+        cursor.execute(f"INSERT INTO {qn(table)} ({column_list}) SELECT {column_list} FROM {staged}")
+        # Fire the deferred foreign key checks now; pending ones would block later ALTER TABLEs
+        connection.check_constraints()
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM {qn(table)}",
+            [table],
+        )
+        cursor.execute(f"DROP TABLE {staged}")
+        cursor.execute(f"DROP SCHEMA {qn(STAGING_SCHEMA)}")
+
+
+def drop_foreign_keys_to(connection, table):
+    """Drop the foreign key constraints that reference ``table``; returns ``(table, name)`` pairs"""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT conrelid::regclass::text, conname FROM pg_constraint
+            WHERE confrelid = to_regclass(%s) AND contype = 'f'
+            """,
+            [table],
+        )
+        constraints = cursor.fetchall()
+        for referencing_table, name in constraints:
+            cursor.execute(f"ALTER TABLE {qn(referencing_table)} DROP CONSTRAINT {qn(name)}")
+    return constraints
@@ -0,0 +1,185 @@
+"""
+On-demand CPU and memory profiles of single requests.
+
+``ProfilingMiddleware`` profiles a request when a staff user sends the
+``PROFILING_HEADER`` header (``X-Profile: 1``), or for a
+``PROFILING_SAMPLE_RATE`` share of all requests, so that a slow tenant
+dashboard can be caught in production. Anyone else's header is ignored.
+While it is off, a request costs one header lookup and, with a sample rate
+set, one ``random()`` call.
+
+A profiled request runs with:
+
+- a sampling CPU profiler: a background thread that records the request
+  thread's stack every ``PROFILING_INTERVAL_MS`` through
+  ``sys._current_frames()``. It never traces calls, so the cost does not grow
+  with the number of function calls. The stacks are stored in the collapsed
+  format that flamegraph.pl, speedscope and inferno read.
+- tracemalloc, for the ``PROFILING_TOP_ALLOCATIONS`` source lines holding the
+  most memory when the view returns, and for the peak traced memory.
+
+tracemalloc is process-wide and slows down every thread while it runs, so a
+worker profiles one request at a time and skips the others. The profile is
+saved as a RequestProfile keyed by a request id, which comes back in the
+``X-Profile-Id`` response header. The admin lists the profiles and serves the
+stacks as a ``.folded`` file. Only the newest ``PROFILING_MAX_STORED`` are kept.
+"""
+import logging
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# One profiled request per process: tracemalloc is global
+_profiling_lock = threading.Lock()
+
+
+def _frame_label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stack of ``thread_id`` every ``interval`` seconds from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        """The samples as ``root;...;leaf count`` lines"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def top_allocations(snapshot, limit):
+    """``[{file, line, size_bytes, count}]`` of the source lines holding the most memory in ``snapshot``"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    return [
+        {
+            'file': stat.traceback[0].filename,
+            'line': stat.traceback[0].lineno,
+            'size_bytes': stat.size,
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def _staff_user(request):
+    """The staff user making the request, by session or by JWT, else None"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_staff else None
+
+
+def _save_profile(**fields):
+    from .models import RequestProfile
+
+    profile = RequestProfile.objects.create(**fields)
+    keep = getattr(settings, 'PROFILING_MAX_STORED', 500)
+    stale = RequestProfile.objects.order_by('-created_at', '-id').values_list('id', flat=True)[keep:keep + 1000]
+    if stale:
+        RequestProfile.objects.filter(id__in=list(stale)).delete()
+    return profile
+
+
+class ProfilingMiddleware:
+    """Profile staff requests that ask for it and a sampled share of all requests"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        if request.headers.get(self.header):
+            trigger = 'header'
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = 'sample'
+        else:
+            return self.get_response(request)
+
+        user = _staff_user(request)
+        if trigger == 'header' and user is None:
+            return self.get_response(request)
+        if not _profiling_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request, trigger, user)
+        finally:
+            _profiling_lock.release()
+
+    def _profile(self, request, trigger, user):
+        interval = getattr(settings, 'PROFILING_INTERVAL_MS', 5) / 1000
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = SamplingProfiler(threading.get_ident(), interval).start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            profiler.stop()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+        request_id = uuid.uuid4().hex
+        try:
+            _save_profile(
+                request_id=request_id, method=request.method, path=request.path[:500],
+                status_code=response.status_code, user=user, trigger=trigger, duration_ms=duration_ms,
+                sample_interval_ms=interval * 1000, cpu_samples=profiler.samples, folded_stacks=profiler.folded(),
+                top_allocations=top_allocations(snapshot, getattr(settings, 'PROFILING_TOP_ALLOCATIONS', 25)),
+                memory_peak_bytes=peak,
+            )
+        except Exception:
+            logger.exception("Could not save the profile of %s %s", request.method, request.path)
+            return response
+        response['X-Profile-Id'] = request_id
+        return response
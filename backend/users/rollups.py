@@ -0,0 +1,138 @@
+"""
+Maintenance of the DailySearchStats rollup behind the search analytics endpoint.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import BusinessProfile, SearchLog, ArchivedSearchLog, DailySearchStats, ResourceVersion
+
+SENTIMENT_COUNTERS = {
+    'positive': 'positive_mentions',
+    'neutral': 'neutral_mentions',
+    'negative': 'negative_mentions',
+    'mixed': 'mixed_mentions',
+}
+
+
+def estimated_cost_usd(tokens_used, cost_input_usd, cost_output_usd):
+    """
+    Price ``tokens_used`` from the per-million prices copied onto a SearchLog.
+
+    Token usage is not split into input and output, so the average of the two
+    prices is used (or whichever one is set).
+    """
+    prices = [price for price in (cost_input_usd, cost_output_usd) if price is not None]
+    if not tokens_used or not prices:
+        return Decimal('0')
+    price = sum(prices, Decimal('0')) / len(prices)
+    return (Decimal(tokens_used) * price / Decimal(1_000_000)).quantize(Decimal('0.000001'))
+
+
+def _increments(search_log, analysis):
+    """Counter increments contributed by one analysed search"""
+    increments = {
+        'searches': 1,
+        'tokens_used': search_log.tokens_used or 0,
+        'estimated_cost_usd': estimated_cost_usd(
+            search_log.tokens_used, search_log.current_cost_input_usd, search_log.current_cost_output_usd
+        ),
+        'response_time_ms_sum': search_log.response_time_ms or 0,
+        'analysis_duration_ms_sum': analysis.analysis_duration_ms or 0,
+    }
+    if analysis.business_mentioned:
+        increments['mentions'] = 1
+        if analysis.sentiment in SENTIMENT_COUNTERS:
+            increments[SENTIMENT_COUNTERS[analysis.sentiment]] = 1
+    return increments
+
+
+def record_analysis(analysis, sign=1):
+    """Add (or with ``sign=-1`` remove) one analysed search to its daily rollup row"""
+    search_log = analysis.search_log
+    keys = {
+        'business_profile_id': search_log.business_profile_id,
+        'search_term_id': search_log.search_term_id,
+        'ai_model_id': search_log.ai_model_id,
+        'day': timezone.localdate(search_log.search_timestamp),
+    }
+    updates = {name: F(name) + sign * value for name, value in _increments(search_log, analysis).items()}
+
+    with transaction.atomic():
+        if sign < 0:
+            DailySearchStats.objects.filter(**keys).update(**updates)
+            return
+        stats, _ = DailySearchStats.objects.get_or_create(**keys)
+        DailySearchStats.objects.filter(pk=stats.pk).update(**updates)
+
+
+def rebuild_daily_stats(business_profile_id=None, batch_size=1000):
+    """
+    Recompute the rollup from SearchLog and Analysis rows, plus the
+    ArchivedSearchLog rows left behind by archiving (see users/archive.py).
+
+    Returns the number of rollup rows written.
+    """
+    search_logs = SearchLog.objects.filter(analysis__isnull=False).select_related('analysis')
+    if business_profile_id is not None:
+        search_logs = search_logs.filter(business_profile_id=business_profile_id)
+    search_logs = search_logs.only(
+        'business_profile_id', 'search_term_id', 'ai_model_id', 'search_timestamp',
+        'tokens_used', 'response_time_ms', 'current_cost_input_usd', 'current_cost_output_usd',
+        'analysis__business_mentioned', 'analysis__sentiment', 'analysis__analysis_duration_ms',
+    ).order_by()
+    # Archived search logs carry their analysis columns themselves
+    archived_search_logs = ArchivedSearchLog.objects.filter(business_mentioned__isnull=False)
+    if business_profile_id is not None:
+        archived_search_logs = archived_search_logs.filter(business_profile_id=business_profile_id)
+    archived_search_logs = archived_search_logs.order_by()
+
+    totals = defaultdict(lambda: defaultdict(int))
+
+    def add(search_log, analysis):
+        key = (
+            search_log.business_profile_id,
+            search_log.search_term_id,
+            search_log.ai_model_id,
+            timezone.localdate(search_log.search_timestamp),
+        )
+        for name, value in _increments(search_log, analysis).items():
+            totals[key][name] += value
+
+    for search_log in search_logs.iterator(chunk_size=batch_size):
+        add(search_log, search_log.analysis)
+    for archived_search_log in archived_search_logs.iterator(chunk_size=batch_size):
+        add(archived_search_log, archived_search_log)
+
+    rows = [
+        DailySearchStats(
+            business_profile_id=business_profile_id_,
+            search_term_id=search_term_id,
+            ai_model_id=ai_model_id,
+            day=day,
+            **counters
+        )
+        for (business_profile_id_, search_term_id, ai_model_id, day), counters in totals.items()
+    ]
+
+    with transaction.atomic():
+        existing = DailySearchStats.objects.all()
+        if business_profile_id is not None:
+            existing = existing.filter(business_profile_id=business_profile_id)
+        existing.delete()
+        DailySearchStats.objects.bulk_create(rows, batch_size=batch_size)
+
+        # The analytics read the rollup; bulk writes send no signals
+        if business_profile_id is not None:
+            business_profile_ids = [business_profile_id]
+        else:
+            business_profile_ids = BusinessProfile.objects.values_list('id', flat=True)
+        for business_profile_id_ in business_profile_ids:
+            ResourceVersion.bump('search_logs', business_profile_id_)
+            invalidate('search_logs', business_profile_id_)
+
+    return len(rows)
@@ -0,0 +1,140 @@
+"""
+Full-text search over AI responses and mention contexts.
+
+The indexes are created by migration 0008 outside the ORM:
+
+* PostgreSQL: generated ``tsvector`` columns on ``users_searchlog``
+  (query + response) and ``users_analysis`` (mention_context), each with a
+  GIN index.
+* SQLite: an FTS5 shadow table ``users_searchlog_fts`` kept in sync by
+  triggers, keyed by search log id.
+
+Other database backends fall back to ``icontains`` scans.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+POSTGRES_MATCH_SQL = """
+    SELECT id FROM users_searchlog
+    WHERE search_vector @@ websearch_to_tsquery('english', %s)
+    UNION
+    SELECT search_log_id FROM users_analysis
+    WHERE mention_vector @@ websearch_to_tsquery('english', %s)
+"""
+
+POSTGRES_SEARCH_SQL = f"""
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', %(text)s) AS q
+    ), ranked AS (
+        SELECT sl.id,
+               sl.response,
+               a.mention_context,
+               ts_rank_cd(sl.search_vector, query.q)
+                   + coalesce(ts_rank_cd(a.mention_vector, query.q), 0) AS rank
+        FROM users_searchlog sl
+        CROSS JOIN query
+        LEFT JOIN users_analysis a ON a.search_log_id = sl.id
+        WHERE sl.business_profile_id = %(business_profile_id)s
+          AND sl.id IN ({POSTGRES_MATCH_SQL.replace('%s', '%(text)s')})
+        ORDER BY rank DESC, sl.id DESC
+        LIMIT %(limit)s OFFSET %(offset)s
+    )
+    SELECT ranked.id,
+           ranked.rank,
+           ts_headline('english', ranked.response, query.q,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MaxWords=25, MinWords=8'),
+           CASE WHEN ranked.mention_context <> '' THEN
+               ts_headline('english', ranked.mention_context, query.q,
+                           'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, HighlightAll=true')
+           ELSE '' END
+    FROM ranked CROSS JOIN query
+    ORDER BY ranked.rank DESC, ranked.id DESC
+"""
+
+SQLITE_SEARCH_SQL = f"""
+    SELECT fts.rowid,
+           -bm25(users_searchlog_fts, 1.0, 2.0, 2.0) AS rank,
+           snippet(users_searchlog_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 24),
+           snippet(users_searchlog_fts, 2, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 24)
+    FROM users_searchlog_fts AS fts
+    JOIN users_searchlog sl ON sl.id = fts.rowid
+    WHERE users_searchlog_fts MATCH %s
+      AND sl.business_profile_id = %s
+    ORDER BY rank DESC, fts.rowid DESC
+    LIMIT %s OFFSET %s
+"""
+
+
+def fts5_query(text):
+    """Quote every word so user input cannot break FTS5 query syntax (words are ANDed)"""
+    return ' '.join('"%s"' % word.replace('"', '""') for word in text.split())
+
+
+def has_full_text_index():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def matching_search_log_ids(text):
+    """
+    Expression for ``id__in`` lookups selecting search logs whose query, response
+    or mention context match ``text``. Returns None without a full-text index.
+    """
+    if connection.vendor == 'postgresql':
+        return RawSQL(POSTGRES_MATCH_SQL, [text, text])
+    if connection.vendor == 'sqlite':
+        return RawSQL(
+            'SELECT rowid FROM users_searchlog_fts WHERE users_searchlog_fts MATCH %s',
+            [fts5_query(text)]
+        )
+    return None
+
+
+def search_search_logs(business_profile_id, text, limit=20, offset=0):
+    """
+    Rank a business's search logs against ``text``.
+
+    Returns dicts with ``id``, ``rank``, ``response_snippet`` and
+    ``mention_context_snippet``; snippets are raw text with matches wrapped in
+    ``<mark>`` tags and must be escaped before being rendered as HTML.
+    """
+    if not text.split():
+        return []
+
+    if connection.vendor == 'postgresql':
+        sql = POSTGRES_SEARCH_SQL
+        params = {'text': text, 'business_profile_id': business_profile_id, 'limit': limit, 'offset': offset}
+    elif connection.vendor == 'sqlite':
+        sql = SQLITE_SEARCH_SQL
+        params = [fts5_query(text), business_profile_id, limit, offset]
+    else:
+        return _search_without_index(business_profile_id, text, limit, offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'id': search_log_id,
+            'rank': float(rank),
+            'response_snippet': response_snippet,
+            'mention_context_snippet': mention_snippet or '',
+        }
+        for search_log_id, rank, response_snippet, mention_snippet in rows
+    ]
+
+
+def _search_without_index(business_profile_id, text, limit, offset):
+    from .models import SearchLog
+
+    matches = SearchLog.objects.filter(business_profile_id=business_profile_id).filter(
+        Q(query__icontains=text) | Q(response__icontains=text) | Q(analysis__mention_context__icontains=text)
+    ).values_list('id', flat=True)[offset:offset + limit]
+    return [
+        {'id': search_log_id, 'rank': 0.0, 'response_snippet': '', 'mention_context_snippet': ''}
+        for search_log_id in matches
+    ]
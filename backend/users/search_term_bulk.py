@@ -0,0 +1,162 @@
+"""
+Bulk create/update/delete of search terms for one business in a single transaction.
+
+Existing ``(business_profile, term)`` pairs are looked up in one query and
+writes go through ``bulk_create``/``bulk_update``, so the number of queries
+does not grow with the number of terms.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import SearchTerm, ResourceVersion
+from .serializers import SearchTermSerializer
+
+MAX_BULK_ITEMS = 5000
+UPDATABLE_FIELDS = ('term', 'description', 'is_active')
+
+
+def _validate(item, partial=False):
+    """Validate one item with SearchTermSerializer, returning (data, errors)"""
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': ['Expected an object']}
+    serializer = SearchTermSerializer(data=item, partial=partial)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    data = dict(serializer.validated_data)
+    if 'term' in data:
+        data['term'] = data['term'].strip()
+        if not data['term']:
+            return None, {'term': ['This field may not be blank.']}
+    return data, None
+
+
+def apply_search_term_bulk(business_profile, create=(), update=(), delete=(), on_conflict='skip'):
+    """
+    Apply bulk changes to ``business_profile``'s search terms.
+
+    ``create`` items are ``{term, description?, is_active?}``; terms that already
+    exist are skipped, or updated when ``on_conflict='update'``. ``update`` items
+    carry an ``id`` plus the fields to change and ``delete`` is a list of ids.
+
+    Returns one result dict per item, in request order within each operation.
+    """
+    results = []
+    to_create = {}
+    to_update = {}
+    delete_ids = []
+
+    validated_creates = []
+    for index, item in enumerate(create):
+        data, errors = _validate(item)
+        if errors:
+            results.append({'operation': 'create', 'index': index, 'status': 'error', 'errors': errors})
+        else:
+            validated_creates.append((index, data))
+
+    validated_updates = []
+    for index, item in enumerate(update):
+        search_term_id = item.get('id') if isinstance(item, dict) else None
+        data, errors = _validate(item, partial=True)
+        if not isinstance(search_term_id, int):
+            errors = {**(errors or {}), 'id': ['A valid integer is required.']}
+        if errors:
+            results.append({'operation': 'update', 'index': index, 'status': 'error', 'errors': errors})
+        else:
+            validated_updates.append((index, search_term_id, data))
+
+    for index, search_term_id in enumerate(delete):
+        if isinstance(search_term_id, int):
+            delete_ids.append((index, search_term_id))
+        else:
+            results.append({
+                'operation': 'delete', 'index': index, 'status': 'error',
+                'errors': {'id': ['A valid integer is required.']}
+            })
+
+    with transaction.atomic():
+        # One query for every existing row the request refers to
+        terms = {data['term'] for _, data in validated_creates}
+        terms |= {data['term'] for _, _, data in validated_updates if 'term' in data}
+        ids = {search_term_id for _, search_term_id, _ in validated_updates}
+        existing = list(
+            SearchTerm.objects.select_for_update().filter(business_profile=business_profile).filter(
+                Q(term__in=terms) | Q(id__in=ids)
+            )
+        )
+        by_term = {search_term.term: search_term for search_term in existing}
+        by_id = {search_term.id: search_term for search_term in existing}
+
+        pending_results = []
+        for index, data in validated_creates:
+            result = {'operation': 'create', 'index': index, 'term': data['term']}
+            current = by_term.get(data['term'])
+            if data['term'] in to_create:
+                result.update(status='skipped', reason='Duplicate term in request')
+            elif current is None:
+                to_create[data['term']] = SearchTerm(business_profile=business_profile, **data)
+                result['status'] = 'created'
+            elif on_conflict == 'update':
+                for name, value in data.items():
+                    setattr(current, name, value)
+                to_update[current.id] = current
+                result.update(status='updated', id=current.id)
+            else:
+                result.update(status='skipped', reason='Term already exists', id=current.id)
+            pending_results.append(result)
+
+        for index, search_term_id, data in validated_updates:
+            result = {'operation': 'update', 'index': index, 'id': search_term_id}
+            current = by_id.get(search_term_id)
+            clash = by_term.get(data.get('term'))
+            if current is None:
+                result.update(status='error', errors={'id': ['Search term not found.']})
+            elif (clash is not None and clash.id != current.id) or data.get('term') in to_create:
+                result.update(status='error', errors={'term': ['A search term with this name already exists.']})
+            else:
+                if 'term' in data and data['term'] != current.term:
+                    by_term.pop(current.term, None)
+                    by_term[data['term']] = current
+                for name, value in data.items():
+                    setattr(current, name, value)
+                to_update[current.id] = current
+                result.update(status='updated', term=current.term)
+            pending_results.append(result)
+
+        if to_create:
+            SearchTerm.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+            created_ids = dict(
+                SearchTerm.objects.filter(business_profile=business_profile, term__in=to_create).values_list('term', 'id')
+            )
+            for result in pending_results:
+                if result['status'] == 'created':
+                    result['id'] = created_ids.get(result['term'])
+
+        if to_update:
+            # auto_now is not applied by bulk_update
+            now = timezone.now()
+            for search_term in to_update.values():
+                search_term.updated_at = now
+            SearchTerm.objects.bulk_update(to_update.values(), UPDATABLE_FIELDS + ('updated_at',))
+
+        if delete_ids:
+            found = set(
+                SearchTerm.objects.filter(
+                    business_profile=business_profile, id__in=[search_term_id for _, search_term_id in delete_ids]
+                ).values_list('id', flat=True)
+            )
+            SearchTerm.objects.filter(id__in=found).delete()
+            for index, search_term_id in delete_ids:
+                status = 'deleted' if search_term_id in found else 'not_found'
+                pending_results.append({'operation': 'delete', 'index': index, 'id': search_term_id, 'status': status})
+
+        # bulk_create/bulk_update do not send the signals that bump the version
+        if to_create or to_update:
+            ResourceVersion.bump('search_terms', business_profile.id)
+            invalidate('search_terms', business_profile.id)
+
+    results.extend(pending_results)
+    order = {'create': 0, 'update': 1, 'delete': 2}
+    results.sort(key=lambda result: (order[result['operation']], result['index']))
+    return results
@@ -0,0 +1,368 @@
+"""
+Synthetic businesses, search terms, search logs and analyses for benchmarks.
+
+``seed_scale`` generates them at production size (``manage.py seed_scale``);
+``seed_search_data`` is its evenly spread variant for the benchmark commands.
+The responses are written from a template corpus and name the business in
+the analysed mention. Tenant size, AI model popularity, recency, mention rate
+and sentiment follow configurable distributions, and a seed makes the data
+reproducible. On PostgreSQL the search logs and analyses are loaded with COPY
+into ids reserved from the table sequences.
+
+Rows are written with ``bulk_create`` or COPY, so no signals fire: the rollup is
+rebuilt per seeded business at the end, and the ResourceVersion counters and
+read cache are left to ``rebuild_daily_stats``.
+"""
+import io
+import json
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, connection, transaction
+from django.db.models import JSONField
+from django.utils import timezone
+
+from .models import AIModel, Analysis, BusinessProfile, CustomUser, SearchLog, SearchTerm
+from .partitions import ensure_partitions
+from .rollups import rebuild_daily_stats
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let ``bulk_create`` keep the given ``auto_now_add`` values instead of stamping now()"""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in saved:
+            field.auto_now_add = auto_now_add
+
+
+def seed_search_data(businesses=10, logs_per_business=10000, terms_per_business=25, ai_models=5,
+                     days=365, mention_rate=0.35, response_words=200, batch_size=5000, seed=0, log=None):
+    """
+    Create ``businesses`` businesses with their own terms and ``logs_per_business``
+    analysed search logs each, spread evenly over the last ``days`` days and the
+    AI models: ``seed_scale`` without the skews, under a fresh name prefix so it
+    can be called repeatedly.
+
+    Returns the ids of the new business profiles.
+    """
+    # bulk_create, not COPY: the callers seed inside a transaction they roll back,
+    # which a failed partition DDL would abort
+    return seed_scale(
+        businesses=businesses, logs=businesses * logs_per_business, terms_per_business=terms_per_business,
+        ai_models=ai_models, days=days, tenant_skew=0, model_skew=0, recency=1, mention_rate=mention_rate,
+        response_words=response_words, batch_size=batch_size, seed=seed,
+        prefix=f'seed-{uuid.uuid4().hex[:8]}', method='bulk', log=log,
+    )
+
+
+# Template corpus for seed_scale
+NAME_PARTS = (
+    ("Acme", "Blue", "Bright", "Cedar", "Clear", "Crest", "Delta", "Ever", "Frontier", "Granite", "Harbor",
+     "Iron", "Juniper", "Keystone", "Lumen", "Maple", "Nimbus", "North", "Orbit", "Pioneer", "Quartz",
+     "River", "Summit", "Tidal", "True", "Vertex", "Willow", "Zenith"),
+    ("Labs", "Works", "Systems", "Partners", "Group", "Digital", "Cloud", "Health", "Finance", "Logic",
+     "Supply", "Studio", "Foods", "Motors", "Travel", "Learning", "Analytics", "Commerce"),
+)
+CATEGORIES = (
+    "crm software", "payroll service", "project management tool", "accounting software", "email marketing platform",
+    "help desk software", "online course platform", "employer of record", "expense management app",
+    "inventory management system", "electronic health record", "meal kit delivery", "car leasing service",
+    "travel booking platform", "video editing software", "coworking space", "web hosting provider",
+)
+TERM_TEMPLATES = (
+    "best {category}", "top {category} for {audience}", "{category} alternatives", "affordable {category}",
+    "{category} comparison", "{category} with {feature}", "is {competitor} worth it", "cheapest {category} {year}",
+)
+QUERY_TEMPLATES = (
+    "What is the {term}?", "Which {category} would you recommend for {audience}?",
+    "Can you compare the options for {term}?", "I need {term}. What should I choose?",
+)
+AUDIENCES = ("small businesses", "startups", "enterprises", "freelancers", "remote teams", "agencies", "nonprofits")
+FEATURES = (
+    "automation", "integrations", "mobile apps", "reporting", "multi-currency support", "single sign-on",
+    "an open API", "24/7 support", "compliance tooling", "a free tier",
+)
+INTRO_SENTENCES = (
+    "There are several strong options for {term}, and the right one depends on your budget and team size.",
+    "Choosing a {category} usually comes down to pricing, {feature} and how much support you need.",
+    "Here is an overview of the {category} providers that come up most often for {audience}.",
+)
+ITEM_SENTENCES = (
+    "{name} is known for {feature} and is popular with {audience}.",
+    "{name} offers a straightforward setup, although some reviewers find its pricing hard to follow.",
+    "{name} is a solid choice if {feature} matters most, with plans starting around ${price} per month.",
+    "{name} focuses on {audience} and bundles {feature} into every plan.",
+    "{name} has a large ecosystem of partners and a steep but rewarding learning curve.",
+)
+MENTION_SENTENCES = {
+    'positive': (
+        "{name} stands out for its {feature} and is frequently recommended by {audience}.",
+        "{name} is one of the best options here, praised for reliable {feature} and responsive support.",
+    ),
+    'neutral': (
+        "{name} is another provider in this space that offers {feature}.",
+        "{name} is also available, with plans starting around ${price} per month.",
+    ),
+    'negative': (
+        "{name} is sometimes mentioned, but users report slow support and limited {feature}.",
+        "{name} tends to be more expensive than alternatives and lacks mature {feature}.",
+    ),
+    'mixed': (
+        "{name} has excellent {feature}, although some {audience} find it pricey.",
+        "{name} is easy to start with, but its {feature} can feel limited as you grow.",
+    ),
+}
+CLOSING_SENTENCES = (
+    "Most providers offer a free trial, so it is worth testing two or three before committing.",
+    "Check recent reviews and ask for a demo to confirm the fit for your team.",
+    "Pricing changes frequently, so confirm the current plans on each provider's website.",
+)
+SEED_ANALYSIS_MODEL = 'google/gemma-2-9b-it'
+
+
+def parse_weights(value, choices):
+    """``'positive=50,neutral=30'`` as a ``{choice: weight}`` dict over ``choices``"""
+    weights = {}
+    for part in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in choices:
+            raise ValueError(f"Unknown choice {name!r}; expected one of {', '.join(choices)}")
+        weights[name] = float(weight)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"{value!r} gives no positive weights")
+    return weights
+
+
+def zipf_counts(total, buckets, skew):
+    """Split ``total`` over ``buckets`` in proportion to ``1 / rank ** skew`` (0 splits evenly)"""
+    weights = [1 / (rank ** skew) for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for i in range(total - sum(counts)):
+        counts[i % buckets] += 1
+    return counts
+
+
+def _fill(rng, template, **values):
+    return template.format(
+        audience=rng.choice(AUDIENCES), feature=rng.choice(FEATURES), price=rng.choice((9, 19, 29, 49, 99, 199)),
+        year=rng.choice((2024, 2025, 2026)), **values,
+    )
+
+
+def _company(rng):
+    return f"{rng.choice(NAME_PARTS[0])}{rng.choice(NAME_PARTS[1])}"
+
+
+def _response(rng, term, category, competitors, words, mention=None):
+    """
+    An AI answer of about ``words`` words listing competitors. With ``mention``
+    (``(business name, sentiment)``), one item names the business; returns the
+    text and that sentence.
+    """
+    intro = _fill(rng, rng.choice(INTRO_SENTENCES), term=term, category=category)
+    closing = rng.choice(CLOSING_SENTENCES)
+    items, length = [], len(intro.split()) + len(closing.split())
+    while length < words or not items:
+        item = _fill(rng, rng.choice(ITEM_SENTENCES), name=rng.choice(competitors))
+        items.append(item)
+        length += len(item.split())
+    context = ''
+    if mention:
+        context = _fill(rng, rng.choice(MENTION_SENTENCES[mention[1]]), name=mention[0])
+        items[rng.randrange(len(items))] = context
+    return ' '.join([intro, *items, closing]), context
+
+
+def _reserve_ids(model, count):
+    """``count`` ids taken from ``model``'s PostgreSQL sequence"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [model._meta.db_table, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_value(value):
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_instances(model, instances):
+    """Insert ``instances`` (with their ids set) with PostgreSQL COPY"""
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    for instance in instances:
+        values = []
+        for field in fields:
+            value = getattr(instance, field.attname)
+            if value is not None:
+                value = json.dumps(value) if isinstance(field, JSONField) else field.get_db_prep_save(value, connection)
+            values.append(_copy_value(value))
+        buffer.write('\t'.join(values))
+        buffer.write('\n')
+    buffer.seek(0)
+    qn = connection.ops.quote_name
+    sql = f"COPY {qn(model._meta.db_table)} ({', '.join(qn(field.column) for field in fields)}) FROM STDIN"
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def seed_scale(businesses=100, logs=1_000_000, terms_per_business=25, ai_models=8, days=365, tenant_skew=1.0,
+               model_skew=0.8, recency=1.5, mention_rate=0.35, sentiments=None, response_words=180,
+               batch_size=5000, seed=0, prefix=None, end=None, method='auto', log=None):
+    """
+    Generate ``businesses`` businesses with ``logs`` analysed search logs between them.
+
+    - ``tenant_skew`` / ``model_skew``: Zipf exponents for how the search logs
+      are spread over businesses and AI models (0 is even).
+    - ``recency``: search times are ``end - days * u ** recency`` for uniform
+      ``u``, so values above 1 crowd the recent days.
+    - ``mention_rate`` and ``sentiments`` (``{sentiment: weight}``): how often
+      the business is mentioned, and how.
+    - ``response_words``: mean response length; lengths vary by about a third.
+    - ``method``: ``copy`` (PostgreSQL only), ``bulk`` (``bulk_create``) or
+      ``auto`` (COPY where available).
+
+    Returns the ids of the new business profiles.
+    """
+    rng = random.Random(seed)
+    prefix = prefix or f'scale{seed}'
+    end = end or timezone.now().replace(minute=0, second=0, microsecond=0)
+    sentiments = sentiments or {'positive': 50, 'neutral': 30, 'negative': 15, 'mixed': 5}
+    log = log or (lambda message: None)
+    if method == 'auto':
+        method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+    if method == 'copy' and connection.vendor != 'postgresql':
+        raise ValueError("COPY needs PostgreSQL; use method='bulk'")
+    if CustomUser.objects.filter(username__startswith=f'{prefix}-').exists():
+        raise ValueError(f"Data with the prefix {prefix!r} already exists; pick another prefix or seed")
+
+    models = AIModel.objects.bulk_create([
+        AIModel(name=f'{prefix}-{name}', provider=provider, version=version,
+                cost_per_million_input_usd=Decimal(input_price), cost_per_million_output_usd=Decimal(output_price))
+        for name, provider, version, input_price, output_price in [
+            (f'model-{i}', rng.choice(('OpenAI', 'Anthropic', 'Google', 'Meta', 'Mistral')), f'{rng.randint(1, 5)}.0',
+             f'{rng.choice((0.15, 0.5, 1, 2.5, 3, 5))}', f'{rng.choice((0.6, 2, 4, 10, 15))}')
+            for i in range(ai_models)
+        ]
+    ])
+    model_weights = [1 / (rank ** model_skew) for rank in range(1, ai_models + 1)]
+
+    profiles = []
+    for start in range(0, businesses, batch_size):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=make_password(None),
+                       first_name=rng.choice(("Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey")))
+            for i in range(start, min(businesses, start + batch_size))
+        ])
+        profiles += BusinessProfile.objects.bulk_create([
+            BusinessProfile(
+                user=user, business_name=_company(rng), industry=rng.choice(BusinessProfile.INDUSTRY_CHOICES)[0],
+                business_size=rng.choice(BusinessProfile.BUSINESS_SIZE_CHOICES)[0],
+                business_description=_fill(rng, "We help {audience} with {feature}."),
+                target_market=rng.choice(AUDIENCES), onboarding_completed=True,
+            )
+            for user in users
+        ])
+
+    if method == 'copy':
+        try:
+            ensure_partitions(connection, since=end - timedelta(days=days))
+        except DatabaseError as e:
+            # The DEFAULT partition already holds rows of a month; new rows for it land there too
+            log(f"Could not create every monthly partition: {e}")
+    timestamp_fields = (SearchLog._meta.get_field('search_timestamp'), Analysis._meta.get_field('analysis_timestamp'))
+    span = timedelta(days=days).total_seconds()
+    sentiment_names, sentiment_weights = zip(*sentiments.items())
+    written, started = 0, time.perf_counter()
+
+    for profile, count in zip(profiles, zipf_counts(logs, businesses, tenant_skew)):
+        category = rng.choice(CATEGORIES)
+        competitors = [_company(rng) for _ in range(8)]
+        term_texts = set()
+        for attempt in range(terms_per_business * 20):
+            if len(term_texts) == terms_per_business:
+                break
+            term_texts.add(_fill(rng, rng.choice(TERM_TEMPLATES), category=category, competitor=rng.choice(competitors)))
+        # Terms are unique per business; number the rest once the templates run out
+        term_texts = sorted(term_texts) + [f'{category} {i}' for i in range(terms_per_business - len(term_texts))]
+        terms = SearchTerm.objects.bulk_create([
+            SearchTerm(business_profile=profile, term=term[:200]) for term in term_texts
+        ])
+        for batch_start in range(0, count, batch_size):
+            size = min(batch_size, count - batch_start)
+            search_logs, analyses = [], []
+            for _ in range(size):
+                term = rng.choice(terms)
+                ai_model = rng.choices(models, model_weights)[0]
+                mentioned = rng.random() < mention_rate
+                sentiment = rng.choices(sentiment_names, sentiment_weights)[0] if mentioned else 'neutral'
+                words = max(40, int(rng.gauss(response_words, response_words / 3)))
+                response, context = _response(
+                    rng, term.term, category, competitors, words,
+                    mention=(profile.business_name, sentiment) if mentioned else None,
+                )
+                searched_at = end - timedelta(seconds=span * rng.random() ** recency)
+                tokens = int(len(response) / 4) + rng.randint(20, 60)
+                search_log = SearchLog(
+                    business_profile=profile, search_term=term, ai_model=ai_model,
+                    query=_fill(rng, rng.choice(QUERY_TEMPLATES), term=term.term, category=category),
+                    response=response, search_timestamp=searched_at,
+                    response_time_ms=int(rng.lognormvariate(math.log(4000), 0.5)), tokens_used=tokens,
+                    current_cost_input_usd=ai_model.cost_per_million_input_usd,
+                    current_cost_output_usd=ai_model.cost_per_million_output_usd,
+                )
+                confidence = Decimal(rng.randint(60, 99)) / 100 if mentioned else None
+                analysis = Analysis(
+                    business_profile=profile, search_log=search_log, business_mentioned=mentioned,
+                    mention_context=context, sentiment=sentiment, confidence_score=confidence,
+                    analysis_model=SEED_ANALYSIS_MODEL,
+                    analysis_timestamp=searched_at + timedelta(milliseconds=rng.randint(800, 6000)),
+                    analysis_duration_ms=int(rng.lognormvariate(math.log(1500), 0.4)),
+                )
+                analysis.raw_analysis_response = json.dumps({
+                    'business_mentioned': mentioned, 'mention_context': context, 'sentiment': sentiment,
+                    'confidence_score': float(confidence) if confidence is not None else None,
+                })
+                search_logs.append(search_log)
+                analyses.append(analysis)
+
+            with transaction.atomic(), explicit_timestamps(*timestamp_fields):
+                if method == 'copy':
+                    for search_log, id in zip(search_logs, _reserve_ids(SearchLog, size)):
+                        search_log.id = id
+                    for analysis, id in zip(analyses, _reserve_ids(Analysis, size)):
+                        analysis.id = id
+                        analysis.search_log_id = analysis.search_log.id
+                    copy_instances(SearchLog, search_logs)
+                    copy_instances(Analysis, analyses)
+                else:
+                    SearchLog.objects.bulk_create(search_logs)
+                    for analysis in analyses:
+                        analysis.search_log_id = analysis.search_log.id
+                    Analysis.objects.bulk_create(analyses)
+            written += size
+            log(f'{written:,}/{logs:,} search logs ({written / (time.perf_counter() - started):,.0f}/s)')
+        rebuild_daily_stats(profile.id)
+
+    return [profile.id for profile in profiles]
@@ -1,9 +1,71 @@
+import logging
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from .models import CustomUser, BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis
+from .models import CustomUser, BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis, ArchivedSearchLog
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class DynamicFieldsMixin:
+    """
+    Lets callers restrict serialized output with ``fields``/``exclude`` kwargs.
+
+    Dotted names such as ``analysis.sentiment`` are passed on to nested
+    serializers that use this mixin, or select keys of nested data that the
+    serializer builds itself; see ``wants_nested``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+
+        self.requested_fields = None
+        self.excluded_fields = set()
+        self.nested_fields = {}
+        self.nested_exclude = {}
+
+        if fields:
+            self.requested_fields = set()
+            for name in fields:
+                head, _, rest = name.partition('.')
+                self.requested_fields.add(head)
+                if rest:
+                    self.nested_fields.setdefault(head, set()).add(rest)
+            for name in set(self.fields) - self.requested_fields:
+                self.fields.pop(name)
+
+        for name in exclude or ():
+            head, _, rest = name.partition('.')
+            if rest:
+                self.nested_exclude.setdefault(head, set()).add(rest)
+            else:
+                self.excluded_fields.add(head)
+                self.fields.pop(head, None)
+
+        for head in set(self.nested_fields) | set(self.nested_exclude):
+            field = self.fields.get(head)
+            if isinstance(field, DynamicFieldsMixin):
+                self.fields[head] = field.__class__(
+                    read_only=True,
+                    fields=self.nested_fields.get(head),
+                    exclude=sorted(field.excluded_fields | self.nested_exclude.get(head, set())),
+                )
+
+    def wants(self, name):
+        """Whether a top-level key (declared or added by hand) should be output"""
+        if name in self.excluded_fields:
+            return False
+        return self.requested_fields is None or name in self.requested_fields
+
+    def wants_nested(self, head, name):
+        """Whether key ``name`` of the nested object ``head`` should be output"""
+        if name in self.nested_exclude.get(head, ()):
+            return False
+        return head not in self.nested_fields or name in self.nested_fields[head]
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -46,7 +108,7 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # If user is already in validated_data (passed from view), use it
         # Otherwise, try to get it from context
-        if 'user' not in validated_data:
+        if 'user' not in validated_data and 'user_id' not in validated_data:
             if 'request' in self.context:
                 validated_data['user'] = self.context['request'].user
             else:
@@ -87,7 +149,21 @@ class AIModelSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at',)
 
 
-class SearchLogSerializer(serializers.ModelSerializer):
+# Keys of the ``analysis`` object embedded in each serialized search log
+ANALYSIS_SUMMARY_FIELDS = (
+    'id',
+    'business_mentioned',
+    'mention_context',
+    'sentiment',
+    'confidence_score',
+    'analysis_timestamp',
+    'analysis_model',
+    'analysis_duration_ms',
+    'raw_analysis_response',
+)
+
+
+class SearchLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     search_term = SearchTermSerializer(read_only=True)
     ai_model = AIModelSerializer(read_only=True)
     business_profile = BusinessProfileSerializer(read_only=True)
@@ -101,25 +177,26 @@ class SearchLogSerializer(serializers.ModelSerializer):
         """Custom representation to include analysis data"""
         data = super().to_representation(instance)
         
+        if not self.wants('analysis'):
+            return data
+
         # Add analysis data if it exists
         try:
             if hasattr(instance, 'analysis') and instance.analysis:
-                analysis_data = {
-                    'id': instance.analysis.id,
-                    'business_mentioned': instance.analysis.business_mentioned,
-                    'mention_context': instance.analysis.mention_context,
-                    'sentiment': instance.analysis.sentiment,
-                    'confidence_score': instance.analysis.confidence_score,
-                    'analysis_timestamp': instance.analysis.analysis_timestamp.isoformat(),
-                    'analysis_model': instance.analysis.analysis_model,
-                    'analysis_duration_ms': instance.analysis.analysis_duration_ms,
-                    'raw_analysis_response': instance.analysis.raw_analysis_response
-                }
+                analysis = instance.analysis
+                analysis_data = {}
+                for name in ANALYSIS_SUMMARY_FIELDS:
+                    if not self.wants_nested('analysis', name):
+                        continue
+                    value = getattr(analysis, name)
+                    if name == 'analysis_timestamp':
+                        value = value.isoformat()
+                    analysis_data[name] = value
                 data['analysis'] = analysis_data
             else:
                 data['analysis'] = None
-        except Exception as e:
-            print(f"DEBUG: Error including analysis in serializer: {e}")
+        except Exception:
+            logger.exception("Could not include the analysis of search log %s", instance.pk)
             data['analysis'] = None
             
         return data
@@ -135,8 +212,8 @@ class SearchLogSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class AnalysisSerializer(serializers.ModelSerializer):
-    search_log = SearchLogSerializer(read_only=True)
+class AnalysisSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    search_log = SearchLogSerializer(read_only=True, exclude=('business_profile', 'analysis'))
     business_profile = BusinessProfileSerializer(read_only=True)
     
     class Meta:
@@ -144,3 +221,15 @@ class AnalysisSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('analysis_timestamp',)
 
+
+class ArchivedSearchLogSerializer(serializers.ModelSerializer):
+    search_term = SearchTermSerializer(read_only=True)
+    ai_model = AIModelSerializer(read_only=True)
+    archived = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ArchivedSearchLog
+        exclude = ('business_profile',)
+    
+    def get_archived(self, instance):
+        return True
@@ -0,0 +1,83 @@
+import weakref
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import (
+    CustomUser, BusinessProfile, SearchTerm, AIModel, SearchLog, Analysis, ResourceVersion, SearchLogArchive,
+)
+from .archive import archive_storage
+from .caching import invalidate
+from .rollups import record_analysis
+
+# Versions already bumped by the delete() call (its origin) that is running
+_bumped_by_delete = weakref.WeakKeyDictionary()
+
+
+def _deleted_with(kwargs, *models):
+    """Whether a post_delete is part of deleting one of ``models`` (a cascade)"""
+    origin = kwargs.get('origin')
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in models
+
+
+def _deleted_with_business(kwargs):
+    """Whether a post_delete is part of deleting the whole business (or its user)"""
+    return _deleted_with(kwargs, BusinessProfile, CustomUser)
+
+
+def _changed(resource, business_profile_id=None, origin=None):
+    """
+    Bump the conditional-GET version and orphan cached reads of ``resource``;
+    once per delete() call when its ``origin`` is given, however many rows cascade
+    """
+    if origin is not None:
+        bumped = _bumped_by_delete.setdefault(origin, set())
+        if (resource, business_profile_id) in bumped:
+            return
+        bumped.add((resource, business_profile_id))
+    ResourceVersion.bump(resource, business_profile_id)
+    invalidate(resource, business_profile_id)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def bump_business_profile_version(sender, instance, **kwargs):
+    _changed('business_profile', instance.id)
+
+
+@receiver([post_save, post_delete], sender=SearchTerm)
+def bump_search_terms_version(sender, instance, **kwargs):
+    if not _deleted_with_business(kwargs):
+        _changed('search_terms', instance.business_profile_id, kwargs.get('origin'))
+
+
+@receiver([post_save, post_delete], sender=AIModel)
+def bump_ai_models_version(sender, instance, **kwargs):
+    _changed('ai_models', origin=kwargs.get('origin'))
+
+
+@receiver([post_save, post_delete], sender=SearchLog)
+@receiver([post_save, post_delete], sender=Analysis)
+def bump_search_logs_version(sender, instance, **kwargs):
+    if not _deleted_with_business(kwargs):
+        _changed('search_logs', instance.business_profile_id, kwargs.get('origin'))
+
+
+@receiver(post_save, sender=Analysis)
+def record_analysis_in_daily_stats(sender, instance, created, **kwargs):
+    if created:
+        record_analysis(instance)
+
+
+@receiver(post_delete, sender=Analysis)
+def remove_analysis_from_daily_stats(sender, instance, **kwargs):
+    # The rollup rows of a deleted business, search term or AI model cascade with it
+    if not _deleted_with(kwargs, BusinessProfile, CustomUser, SearchTerm, AIModel):
+        record_analysis(instance, sign=-1)
+
+
+@receiver(post_delete, sender=SearchLogArchive)
+def delete_archive_file(sender, instance, **kwargs):
+    archive_storage().delete(instance.file)
@@ -0,0 +1,117 @@
+"""
+Per-stage timing spans for request pipelines such as the AI search.
+
+``@traced(name)`` starts a trace for each request to a view; inside it,
+``with span(stage):`` times a block and ``current_trace()`` returns the running
+trace. A span is two ``perf_counter`` readings appended to a list, so every
+request is traced; only the logging is sampled. When the request finishes,
+the trace is logged as one JSON record on the ``users.tracing`` logger (with
+the same dict as ``extra={'trace': ...}`` for structured handlers). That
+happens for a ``TRACE_SAMPLE_RATE`` share of requests, and always for requests
+slower than ``TRACE_SLOW_MS`` or answered with a 5xx. Outside a traced
+request ``span`` does nothing, so services can be instrumented unconditionally.
+"""
+import json
+import logging
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_trace = ContextVar('trace', default=None)
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.spans = []
+        self.attributes = {}
+        self.sampled = random.random() < getattr(settings, 'TRACE_SAMPLE_RATE', 1.0)
+
+    def add_span(self, name, started, ended):
+        self.spans.append({
+            'name': name,
+            'start_ms': round((started - self.started) * 1000, 1),
+            'duration_ms': round((ended - started) * 1000, 1),
+        })
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, started, time.perf_counter())
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def timings(self):
+        """``{stage: ms}`` so far, with repeated stages added up"""
+        timings = defaultdict(float)
+        for span_ in self.spans:
+            timings[span_['name']] += span_['duration_ms']
+        return {name: round(ms, 1) for name, ms in timings.items()}
+
+    def finish(self, status_code):
+        duration_ms = self.elapsed_ms()
+        slow = duration_ms >= getattr(settings, 'TRACE_SLOW_MS', 30000)
+        if not (self.sampled or slow or status_code >= 500):
+            return
+        record = {
+            'trace': self.name,
+            'trace_id': self.trace_id,
+            'status': status_code,
+            'duration_ms': duration_ms,
+            'spans': self.spans,
+            **self.attributes,
+        }
+        logger.info(json.dumps(record, default=str), extra={'trace': record})
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name):
+    """Time the block as stage ``name`` of the current trace, if there is one"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def traced(name):
+    """
+    Trace every request to a view.
+
+    Goes above ``@api_view`` so the trace also covers DRF's authentication,
+    permission and throttle checks, which run before the view body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            trace = Trace(name)
+            token = _current_trace.set(trace)
+            status_code = 500
+            try:
+                response = view(request, *args, **kwargs)
+                status_code = response.status_code
+                return response
+            finally:
+                _current_trace.reset(token)
+                trace.finish(status_code)
+        return wrapper
+    return decorator
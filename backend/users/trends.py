@@ -0,0 +1,160 @@
+"""
+Time-series trend math for the analytics endpoints.
+
+Aggregation happens in the database; this module turns the sparse per-bucket
+rows into dense NumPy arrays and derives rates, rolling averages and Wilson
+confidence intervals for whole series at once.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+BUCKET_STEPS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+# Per-bucket counters returned by the time-series query
+COUNT_FIELDS = ('searches', 'mentions', 'positive', 'neutral', 'negative', 'mixed')
+MEAN_FIELDS = ('avg_confidence', 'avg_response_time_ms')
+
+
+def bucket_start(moment, bucket):
+    """Truncate ``moment`` the same way as TruncHour/TruncDay/TruncWeek"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if bucket == 'week':
+        moment -= timedelta(days=moment.weekday())
+    return moment
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """
+    Wilson score interval for arrays of successes out of trials.
+
+    Returns ``(low, high)`` arrays, NaN where there were no trials.
+    """
+    successes = np.asarray(successes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / trials
+        z2 = z * z
+        denominator = 1 + z2 / trials
+        centre = (p + z2 / (2 * trials)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / trials + z2 / (4 * trials * trials)) / denominator
+    return centre - margin, centre + margin
+
+
+def rolling_sum(values, window):
+    """Trailing sum over ``window`` buckets (shorter at the start of the series)"""
+    cumulative = np.cumsum(np.asarray(values, dtype=float))
+    totals = cumulative.copy()
+    totals[window:] -= cumulative[:-window]
+    return totals
+
+
+def rolling_rate(successes, trials, window):
+    """Pooled success rate over a trailing window, NaN where the window is empty"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rolling_sum(successes, window) / rolling_sum(trials, window)
+
+
+def to_list(values, digits):
+    """Round an array for JSON output, turning NaN into None"""
+    values = np.round(np.asarray(values, dtype=float), digits)
+    output = values.astype(object)
+    output[np.isnan(values)] = None
+    return output.tolist()
+
+
+def merge_rows(group_fields, *row_sets):
+    """
+    Combine aggregated rows of several sources (live and archived search logs)
+    that share a bucket and group: counts are added, means are weighted by the
+    searches (the mentions for ``avg_confidence``) of the rows that have them.
+    """
+    weights = {'avg_confidence': 'mentions', 'avg_response_time_ms': 'searches'}
+    merged = {}
+    for rows in row_sets:
+        for row in rows:
+            key = (row['bucket'],) + tuple(row[name] for name in group_fields)
+            total = merged.setdefault(key, {
+                'bucket': row['bucket'], **{name: row[name] for name in group_fields},
+                **dict.fromkeys(COUNT_FIELDS, 0), **{f'{name}_weight': 0 for name in MEAN_FIELDS},
+                **dict.fromkeys(MEAN_FIELDS, 0.0),
+            })
+            for name in COUNT_FIELDS:
+                total[name] += row[name]
+            for name in MEAN_FIELDS:
+                if row.get(name) is not None and row[weights[name]]:
+                    total[name] += float(row[name]) * row[weights[name]]
+                    total[f'{name}_weight'] += row[weights[name]]
+
+    for total in merged.values():
+        for name in MEAN_FIELDS:
+            weight = total.pop(f'{name}_weight')
+            total[name] = total[name] / weight if weight else None
+    return list(merged.values())
+
+
+def build_series(rows, group_fields, start, end, bucket, window=7, z=1.96):
+    """
+    Turn aggregated rows into dense per-group series with derived trend values.
+
+    ``rows`` are dicts with a ``bucket`` datetime, the ``group_fields`` and the
+    COUNT_FIELDS/MEAN_FIELDS aggregates. Every series covers all buckets from
+    ``start`` to ``end`` so rolling windows are measured in buckets, not rows.
+    """
+    step = BUCKET_STEPS[bucket]
+    first = bucket_start(start, bucket)
+    size = int((bucket_start(end, bucket) - first) / step) + 1
+    buckets = [first + i * step for i in range(size)]
+
+    grouped = {}
+    for row in rows:
+        key = tuple(row[name] for name in group_fields)
+        grouped.setdefault(key, []).append(row)
+
+    series = []
+    for key, group_rows in grouped.items():
+        index = np.array([int((row['bucket'] - first) / step) for row in group_rows])
+        arrays = {}
+        for name in COUNT_FIELDS:
+            arrays[name] = np.zeros(size)
+            arrays[name][index] = [row[name] for row in group_rows]
+        for name in MEAN_FIELDS:
+            arrays[name] = np.full(size, np.nan)
+            arrays[name][index] = [np.nan if row[name] is None else float(row[name]) for row in group_rows]
+
+        searches = arrays['searches']
+        mentions = arrays['mentions']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mention_rate = mentions / searches
+            net_sentiment = (arrays['positive'] - arrays['negative']) / mentions
+        low, high = wilson_interval(mentions, searches, z)
+
+        points = {
+            'bucket': [moment.isoformat() for moment in buckets],
+            'mention_rate': to_list(mention_rate * 100, 2),
+            'mention_rate_low': to_list(low * 100, 2),
+            'mention_rate_high': to_list(high * 100, 2),
+            'rolling_mention_rate': to_list(rolling_rate(mentions, searches, window) * 100, 2),
+            'net_sentiment': to_list(net_sentiment, 3),
+            'rolling_net_sentiment': to_list(
+                rolling_rate(arrays['positive'] - arrays['negative'], mentions, window), 3
+            ),
+            'avg_confidence': to_list(arrays['avg_confidence'], 3),
+            'avg_response_time_ms': to_list(arrays['avg_response_time_ms'], 0),
+        }
+        for name in COUNT_FIELDS:
+            points[name] = arrays[name].astype(int).tolist()
+
+        series.append({
+            'group': dict(zip(group_fields, key)),
+            'points': [dict(zip(points, values)) for values in zip(*points.values())],
+        })
+
+    return buckets, series